@@ -1,15 +1,32 @@
 from flask import Flask, render_template, redirect, url_for, request, flash, jsonify, send_file, make_response, session
-import uuid
 from flask_login import LoginManager, login_user, login_required, logout_user, current_user
 from models import (db, User, Role, Product, Order, ProductionTask, FinancialTransaction, InventoryItem, 
                    SupplierOrder, Notification, Company, Resource, ResourceRequest, CustomOrder, OrderItem,
                    SalaryPayment, PaymentMethod, Client, Contract, ExpenseCategory, Budget, InventoryTransaction,
-                   QualityControl, MaintenanceRecord, Report)
+                   QualityControl, MaintenanceRecord, Report, ImportJob)
+from dashboard_stats import StatusCounts, KPI_SNAPSHOTS, period_summary, monthly_income_expense
+from periods import period_from_request, MAX_MONTHS
+from finance_rollup import register_rollup_events, timeseries, bucket_count, GRANULARITIES, DEFAULT_PERIODS, MAX_BUCKETS
+from commands import init_commands
+from sqlite_profile import init_sqlite_profile
+from db_pool import init_db_pool, pool_stats
+from read_replica import init_read_replica, read_replica, read_primary
+from conditional_get import init_conditional_get, render_static_page, versioned
+from static_assets import init_static_assets
+from compression import init_compression
+from template_cache import init_template_cache
+from kpi_cache import init_kpi_cache
+from principal_cache import init_principal_cache
+from request_metrics import init_metrics
+from query_diagnostics import init_query_diagnostics
+from pagination import page_args, apply_filters, keyset_page
+from streaming import stream_query, wants_stream
+from import_jobs import enqueue_import, run_job, job_to_dict
 from functools import wraps
-import os, io, csv, random, string
+import os
 from datetime import datetime, timedelta
-from openpyxl import Workbook
 from flask_migrate import Migrate
+from sqlalchemy.orm import joinedload, selectinload
 
 def create_app(config_name=None):
     app = Flask(__name__, static_folder='static', template_folder='templates')
@@ -20,16 +37,60 @@ def create_app(config_name=None):
     
     try:
         from config import config
+    except ModuleNotFoundError as exc:
+        # Ошибка внутри config.py (в том числе его импортов) не должна подменять конфигурацию
+        if exc.name != 'config':
+            raise
+        config = None
+    if config is not None:
         app.config.from_object(config[config_name])
-    except ImportError:
-        # Fallback к старой конфигурации
+    else:
+        # Fallback к старой конфигурации, если файла config.py нет
+        app.logger.warning('config.py не найден: используется конфигурация по умолчанию (sqlite:///crm.db)')
         app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY') or 'dev-change-this-secret'
         app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL') or 'sqlite:///crm.db'
         app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+    # Пул со статистикой ожидания; движки сбрасываются после fork (post_fork в gunicorn.conf.py)
+    init_db_pool(app)
     db.init_app(app)
+    # PRAGMA профиля SQLite (WAL, busy_timeout и т.д.) для каждого нового соединения
+    init_sqlite_profile(app)
+    # Чтение дашбордов и GET /api/* с реплики, если она задана в SQLALCHEMY_BINDS
+    init_read_replica(app, db)
+    # Счётчики изменений таблиц для ETag списков API
+    init_conditional_get(app)
+
+    # Байткод шаблонов на диске: новый воркер не компилирует шаблоны заново
+    init_template_cache(app)
+
+    # Имена статики с хешем содержимого и сжатые варианты (build_assets.py)
+    init_static_assets(app)
+    # gzip/brotli для HTML и JSON по Accept-Encoding (COMPRESS_*)
+    init_compression(app)
 
     migrate = Migrate(app, db)
+    init_commands(app)
+
+    # Дневная сводка финансовых операций обновляется вместе с каждой операцией
+    register_rollup_events()
+
+    # Кэш снимков KPI для дашбордов
+    kpi_cache = init_kpi_cache(app)
+    for key, (compute, models) in KPI_SNAPSHOTS.items():
+        kpi_cache.register(key, *models)
+
+    def dashboard_kpis(key):
+        return kpi_cache.get_or_compute(key, KPI_SNAPSHOTS[key][0])
+
+    # Пользователь и его роли для проверки доступа без запросов к БД
+    principals = init_principal_cache(app, kpi_cache.backend)
+
+    # Длительность, число SQL-запросов и размер ответа по каждому endpoint
+    metrics = init_metrics(app)
+
+    # Медленные запросы и шаблоны N+1 в лог (SQL_DIAGNOSTICS)
+    init_query_diagnostics(app)
 
     login_manager = LoginManager()
     login_manager.login_view = 'login'
@@ -38,6 +99,8 @@ def create_app(config_name=None):
     @login_manager.user_loader
     def load_user(user_id):
         try:
+            if app.config.get('PRINCIPAL_CACHE', True):
+                return principals.load(int(user_id))
             return User.query.get(int(user_id))
         except Exception:
             return None
@@ -49,7 +112,7 @@ def create_app(config_name=None):
             @wraps(f)
             @login_required
             def decorated_function(*args, **kwargs):
-                if not any(current_user.has_role(r) for r in roles):
+                if not current_user.has_any_role(roles):
                     flash('У вас нет доступа к этой странице', 'danger')
                     return redirect(url_for('login'))
                 return f(*args, **kwargs)
@@ -87,6 +150,7 @@ def create_app(config_name=None):
             
             if user and user.check_password(password):
                 login_user(user)
+                principals.remember(user)
                 flash('Успешный вход в систему!', 'success')
                 print(f"Успешный вход для пользователя: {username}")
                 return redirect(url_for('index'))
@@ -99,43 +163,27 @@ def create_app(config_name=None):
     @app.route('/logout')
     @login_required
     def logout():
+        principals.forget(current_user.id)
         logout_user()
         flash('Вы вышли из системы', 'info')
         return redirect(url_for('login'))
 
     # Директор
     @app.route('/director')
+    @read_replica()
     @role_required('director')
     def director_dashboard():
-        # Получаем данные для директора
-        users = User.query.all()
+        # Получаем данные для директора (роли нужны шаблону для каждого пользователя)
+        users = User.query.options(selectinload(User.roles)).all()
         
         # Финансовые данные
-        income = FinancialTransaction.query.filter_by(transaction_type='income').with_entities(db.func.sum(FinancialTransaction.amount)).scalar() or 0
-        expense = FinancialTransaction.query.filter_by(transaction_type='expense').with_entities(db.func.sum(FinancialTransaction.amount)).scalar() or 0
+        kpis = dashboard_kpis('director')
+        income, expense = kpis['income'], kpis['expense']
         profit = income - expense
-        # Статистика заказов
-        orders_by_status = type('obj', (object,), {
-            'new': Order.query.filter_by(status='new').count(),
-            'in_production': Order.query.filter_by(status='in_production').count(),
-            'completed': Order.query.filter_by(status='completed').count(),
-            'cancelled': Order.query.filter_by(status='cancelled').count()
-        })()
-        
-        # Статистика задач
-        tasks_by_status = type('obj', (object,), {
-            'waiting': ProductionTask.query.filter_by(status='waiting').count(),
-            'in_progress': ProductionTask.query.filter_by(status='in_progress').count(),
-            'completed': ProductionTask.query.filter_by(status='completed').count()
-        })()
-        
-        # Статистика запросов
-        requests_by_status = type('obj', (object,), {
-            'pending': ResourceRequest.query.filter_by(status='pending').count(),
-            'approved': ResourceRequest.query.filter_by(status='approved').count(),
-            'purchased': ResourceRequest.query.filter_by(status='purchased').count(),
-            'delivered': ResourceRequest.query.filter_by(status='delivered').count()
-        })()
+        # Статистика заказов, задач и запросов
+        orders_by_status = StatusCounts(kpis['orders_by_status'])
+        tasks_by_status = StatusCounts(kpis['tasks_by_status'])
+        requests_by_status = StatusCounts(kpis['requests_by_status'])
         
         # Последние транзакции
         txs = FinancialTransaction.query.order_by(FinancialTransaction.created_at.desc()).limit(10).all()
@@ -148,22 +196,18 @@ def create_app(config_name=None):
     @app.route('/director/company-settings')
     @role_required('director')
     def director_company_settings():
-        return render_template('director_company_settings.html')
+        return render_static_page('director_company_settings.html')
 
     # Менеджер
     @app.route('/manager', methods=['GET','POST', 'DELETE'])
     @role_required('manager')
     def manager_dashboard():
 
-        # Получаем данные для менеджера
-        orders = Order.query.all()
-        users = User.query.all()
-        products = Product.query.all()
-
         if request.method == "DELETE":
             order = Order.query.get(request.get_json().get('order_id'))
             db.session.delete(order)
             db.session.commit()
+            kpi_cache.invalidate_for(Order)
             
         if request.method == "POST":
             order_data = request.get_json()
@@ -202,11 +246,19 @@ def create_app(config_name=None):
 
             db.session.add(order_item)
             db.session.commit()
+            kpi_cache.invalidate_for(Order)
+
+        # Данные для менеджера читаются после изменений: commit() сбрасывает загруженные
+        # объекты, и шаблон перечитывал бы каждый заказ отдельным запросом
+        orders = Order.query.all()
+        users = User.query.all()
+        products = Product.query.all()
         
         # Статистика заказов
-        total_orders = Order.query.count()
-        pending_orders = Order.query.filter_by(status='pending').count()
-        completed_orders = Order.query.filter_by(status='completed').count()
+        orders_by_status = StatusCounts(dashboard_kpis('manager')['orders_by_status'])
+        total_orders = orders_by_status.total
+        pending_orders = orders_by_status.pending
+        completed_orders = orders_by_status.completed
         
         return render_template('manager.html', 
                              orders=orders, users=users,
@@ -218,118 +270,117 @@ def create_app(config_name=None):
     @role_required('supplier')
     def supplier_dashboard():
         # Получаем данные для поставщика
-        resources = Resource.query.all()
+        resources = Resource.query.options(joinedload(Resource.company)).all()
         requests = ResourceRequest.query.all()
         
         # Статистика запросов
-        total_requests = ResourceRequest.query.count()
-        pending_requests = ResourceRequest.query.filter_by(status='pending').count()
-        approved_requests = ResourceRequest.query.filter_by(status='approved').count()
-        delivered_requests = ResourceRequest.query.filter_by(status='delivered').count()
+        kpis = dashboard_kpis('supplier')
+        requests_by_status = StatusCounts(kpis['requests_by_status'])
+        total_requests = requests_by_status.total
+        pending_requests = requests_by_status.pending
+        approved_requests = requests_by_status.approved
+        delivered_requests = requests_by_status.delivered
         
         return render_template('supplier.html', 
                              resources=resources, requests=requests,
                              total_requests=total_requests, pending_requests=pending_requests,
-                             approved_requests=approved_requests, delivered_requests=delivered_requests)
+                             approved_requests=approved_requests, delivered_requests=delivered_requests,
+                             total_resources=kpis['total_resources'])
 
     @app.route('/supplier/contracts')
     @role_required('supplier')
     def supplier_contracts():
-        return render_template('supplier_contracts.html')
+        return render_static_page('supplier_contracts.html')
 
     @app.route('/supplier/quality-control')
     @role_required('supplier')
     def supplier_quality_control():
-        return render_template('supplier_quality_control.html')
+        return render_static_page('supplier_quality_control.html')
 
     @app.route('/supplier/emergency-orders')
     @role_required('supplier')
     def supplier_emergency_orders():
-        return render_template('supplier_emergency_orders.html')
+        return render_static_page('supplier_emergency_orders.html')
 
     @app.route('/supplier/budget-management')
     @role_required('supplier')
     def supplier_budget_management():
-        return render_template('supplier_budget_management.html')
+        return render_static_page('supplier_budget_management.html')
 
     @app.route('/supplier/recommendations')
     @role_required('supplier')
     def supplier_recommendations():
-        return render_template('supplier_recommendations.html')
+        return render_static_page('supplier_recommendations.html')
 
     @app.route('/supplier/reports')
     @role_required('supplier')
     def supplier_reports():
-        return render_template('supplier_reports.html')
+        return render_static_page('supplier_reports.html')
 
     # Склад
     @app.route('/warehouse')
+    @read_replica()
     @role_required('warehouse')
     def warehouse_dashboard():
         # Получаем данные для склада
         inventory_items = InventoryItem.query.all()
-        resources = Resource.query.all()
+        resources = Resource.query.options(joinedload(Resource.company)).all()
         
         # Статистика склада
-        total_items = InventoryItem.query.count()
-        low_stock_items = InventoryItem.query.filter(InventoryItem.quantity < InventoryItem.min_stock).count()
-        out_of_stock_items = InventoryItem.query.filter_by(quantity=0).count()
-        total_value = db.session.query(db.func.sum(InventoryItem.quantity * InventoryItem.price_per_unit)).scalar() or 0
+        kpis = dashboard_kpis('warehouse')
         
         return render_template('warehouse.html', 
-                             inventory_items=inventory_items, resources=resources,
-                             total_items=total_items, low_stock_items=low_stock_items,
-                             out_of_stock_items=out_of_stock_items, total_value=total_value)
+                             inventory_items=inventory_items, resources=resources, **kpis)
 
     @app.route('/warehouse/stock-alerts')
     @role_required('warehouse')
     def warehouse_stock_alerts():
-        return render_template('warehouse.html')
+        return render_static_page('warehouse.html')
 
     @app.route('/warehouse/analytics')
     @role_required('warehouse')
     def warehouse_analytics():
-        return render_template('warehouse.html')
+        return render_static_page('warehouse.html')
 
     @app.route('/warehouse/supplier-performance')
     @role_required('warehouse')
     def warehouse_supplier_performance():
-        return render_template('warehouse.html')
+        return render_static_page('warehouse.html')
 
     @app.route('/warehouse/automated-reordering')
     @role_required('warehouse')
     def warehouse_automated_reordering():
-        return render_template('warehouse_automated_reordering.html')
+        return render_static_page('warehouse_automated_reordering.html')
 
     @app.route('/warehouse/barcode-scanner')
     @role_required('warehouse')
     def warehouse_barcode_scanner():
-        return render_template('warehouse_barcode_scanner.html')
+        return render_static_page('warehouse_barcode_scanner.html')
 
     @app.route('/warehouse/cycle-counting')
     @role_required('warehouse')
     def warehouse_cycle_counting():
-        return render_template('warehouse_cycle_counting.html')
+        return render_static_page('warehouse_cycle_counting.html')
 
     @app.route('/warehouse/expected-deliveries')
     @role_required('warehouse')
     def warehouse_expected_deliveries():
-        return render_template('warehouse_expected_deliveries.html')
+        return render_static_page('warehouse_expected_deliveries.html')
 
     @app.route('/warehouse/quality-inspection')
     @role_required('warehouse')
     def warehouse_quality_inspection():
-        return render_template('warehouse_quality_inspection.html')
+        return render_static_page('warehouse_quality_inspection.html')
 
     @app.route('/warehouse/reports')
     @role_required('warehouse')
     def warehouse_reports():
-        return render_template('warehouse_reports.html')
+        return render_static_page('warehouse_reports.html')
 
     @app.route('/warehouse/zones')
     @role_required('warehouse')
     def warehouse_zones():
-        return render_template('warehouse_zones.html')
+        return render_static_page('warehouse_zones.html')
 
     # Производство
     @app.route('/production')
@@ -341,9 +392,10 @@ def create_app(config_name=None):
         users = User.query.all()
         
         # Статистика производства
-        total_tasks = ProductionTask.query.count()
-        active_tasks = ProductionTask.query.filter_by(status='in_progress').count()
-        completed_tasks = ProductionTask.query.filter_by(status='completed').count()
+        tasks_by_status = StatusCounts(dashboard_kpis('production')['tasks_by_status'])
+        total_tasks = tasks_by_status.total
+        active_tasks = tasks_by_status.in_progress
+        completed_tasks = tasks_by_status.completed
         efficiency = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
         
         return render_template('production.html', 
@@ -354,40 +406,41 @@ def create_app(config_name=None):
     @app.route('/production/planning')
     @role_required('production')
     def production_planning():
-        return render_template('production_planning.html')
+        return render_static_page('production_planning.html')
 
     @app.route('/production/equipment-management')
     @role_required('production')
     def production_equipment_management():
-        return render_template('production_equipment_management.html')
+        return render_static_page('production_equipment_management.html')
 
     @app.route('/production/material-requirements')
     @role_required('production')
     def production_material_requirements():
-        return render_template('production_material_requirements.html')
+        return render_static_page('production_material_requirements.html')
 
     @app.route('/production/check-materials')
     @role_required('production')
     def production_check_materials():
-        return render_template('production_check_materials.html')
+        return render_static_page('production_check_materials.html')
 
     @app.route('/production/worker-productivity')
     @role_required('production')
     def production_worker_productivity():
-        return render_template('production_worker_productivity.html')
+        return render_static_page('production_worker_productivity.html')
 
     @app.route('/production/safety-compliance')
     @role_required('production')
     def production_safety_compliance():
-        return render_template('production_safety_compliance.html')
+        return render_static_page('production_safety_compliance.html')
 
     @app.route('/production/reports')
     @role_required('production')
     def production_reports():
-        return render_template('production_reports.html')
+        return render_static_page('production_reports.html')
 
     # Бухгалтер
     @app.route('/accountant')
+    @read_replica()
     @role_required('accountant')
     def accountant_dashboard():
         # Получаем данные для бухгалтера
@@ -395,97 +448,114 @@ def create_app(config_name=None):
         salary_payments = SalaryPayment.query.all()
         
         # Финансовые данные
-        total_income = FinancialTransaction.query.filter_by(transaction_type='income').with_entities(db.func.sum(FinancialTransaction.amount)).scalar() or 0
-        total_expense = FinancialTransaction.query.filter_by(transaction_type='expense').with_entities(db.func.sum(FinancialTransaction.amount)).scalar() or 0
-        current_balance = total_income - total_expense
-        
-        # Ежемесячные данные
-        current_month = datetime.now().month
-        current_year = datetime.now().year
-        monthly_income = FinancialTransaction.query.filter(
-            db.extract('month', FinancialTransaction.created_at) == current_month,
-            db.extract('year', FinancialTransaction.created_at) == current_year,
-            FinancialTransaction.transaction_type == 'income'
-        ).with_entities(db.func.sum(FinancialTransaction.amount)).scalar() or 0
-        
-        monthly_expense = FinancialTransaction.query.filter(
-            db.extract('month', FinancialTransaction.created_at) == current_month,
-            db.extract('year', FinancialTransaction.created_at) == current_year,
-            FinancialTransaction.transaction_type == 'expense'
-        ).with_entities(db.func.sum(FinancialTransaction.amount)).scalar() or 0
+        # Финансовые данные, включая показатели текущего месяца
+        kpis = dashboard_kpis('accountant')
+        current_balance = kpis['total_income'] - kpis['total_expense']
         
         return render_template('accountant.html', 
                              recent_transactions=recent_transactions, salary_payments=salary_payments,
-                             total_income=total_income, total_expense=total_expense, current_balance=current_balance,
-                             monthly_income=monthly_income, monthly_expense=monthly_expense)
+                             current_balance=current_balance, **kpis)
 
     @app.route('/accountant/invoice-management')
     @role_required('accountant')
     def accountant_invoice_management():
-        return render_template('accountant_invoice_management.html')
+        return render_static_page('accountant_invoice_management.html')
 
     @app.route('/accountant/payroll-management')
     @role_required('accountant')
     def accountant_payroll_management():
-        return render_template('accountant_payroll_management.html')
+        return render_static_page('accountant_payroll_management.html')
 
     @app.route('/accountant/tax-management')
     @role_required('accountant')
     def accountant_tax_management():
-        return render_template('accountant_tax_management.html')
+        return render_static_page('accountant_tax_management.html')
 
     @app.route('/accountant/budget-planning')
     @role_required('accountant')
     def accountant_budget_planning():
-        return render_template('accountant_budget_planning.html')
+        return render_static_page('accountant_budget_planning.html')
 
     @app.route('/accountant/cash-flow')
+    @read_replica()
     @role_required('accountant')
     def accountant_cash_flow():
-        return render_template('accountant_cash_flow.html')
+        period = period_from_request('month')
+        cash_flow_stats = period_summary(period)
+        cash_flow_operations = (FinancialTransaction.query
+                                .filter(*period.filter(FinancialTransaction.created_at))
+                                .order_by(FinancialTransaction.created_at.desc())
+                                .limit(200).all())
+        return render_template('accountant_cash_flow.html', period=period,
+                             cash_flow_stats=cash_flow_stats, cash_flow_operations=cash_flow_operations)
 
     @app.route('/accountant/financial-analysis')
+    @read_replica()
     @role_required('accountant')
     def accountant_financial_analysis():
-        return render_template('accountant_financial_analysis.html')
+        # Таблица по месяцам: период длиннее MAX_MONTHS заменяется текущим годом
+        period = period_from_request('year', max_months=MAX_MONTHS)
+        financial_periods = []
+        for month in monthly_income_expense(period):
+            profit = month['income'] - month['expense']
+            financial_periods.append({
+                'id': month['month'].strftime('%Y%m'),
+                'period': month['month'].strftime('%m.%Y'),
+                'revenue': month['income'],
+                'expenses': month['expense'],
+                'profit': profit,
+                'profitability': profit / month['income'] * 100 if month['income'] else 0,
+            })
+
+        # Итоги периода складываются из помесячных сумм без отдельного запроса
+        revenue = sum(p['revenue'] for p in financial_periods)
+        expenses = sum(p['expenses'] for p in financial_periods)
+        analysis_stats = {
+            'revenue': revenue,
+            'expenses': expenses,
+            'profit': revenue - expenses,
+            'profitability': (revenue - expenses) / revenue * 100 if revenue else 0,
+        }
+        return render_template('accountant_financial_analysis.html', period=period,
+                             analysis_stats=analysis_stats, financial_periods=financial_periods)
 
     @app.route('/accountant/asset-management')
     @role_required('accountant')
     def accountant_asset_management():
-        return render_template('accountant_asset_management.html')
+        return render_static_page('accountant_asset_management.html')
 
     @app.route('/accountant/expense-approval')
     @role_required('accountant')
     def accountant_expense_approval():
-        return render_template('accountant_expense_approval.html')
+        return render_static_page('accountant_expense_approval.html')
 
     @app.route('/accountant/audit-trail')
     @role_required('accountant')
     def accountant_audit_trail():
-        return render_template('accountant_audit_trail.html')
+        return render_static_page('accountant_audit_trail.html')
 
     @app.route('/accountant/compliance')
     @role_required('accountant')
     def accountant_compliance():
-        return render_template('accountant_compliance.html')
+        return render_static_page('accountant_compliance.html')
 
     # Калькуляторы
     @app.route('/itp-calculator')
     @login_required
     def itp_calculator():
-        return render_template('itp_calculator.html')
+        return render_static_page('itp_calculator.html')
 
     @app.route('/gvs-calculator')
     @login_required
     def gvs_calculator():
-        return render_template('gvs_calculator.html')
+        return render_static_page('gvs_calculator.html')
 
     # Центр аккаунта
     @app.route('/account')
     @login_required
     def account_center():
         
-        users = User.query.all()
+        users = User.query.options(selectinload(User.roles)).all()
         roles = Role.query.all()
         return render_template('account_center.html', users=users, roles=roles)
     
@@ -574,13 +644,9 @@ def create_app(config_name=None):
         flash(f'Пароль пользователя {user.username} сброшен на "123"', 'success')
         return redirect(url_for('account_center'))
 
-    # API для работы с ресурсами
-    @app.route('/api/resources', methods=['GET'])
-    @login_required
-    def get_resources():
-        """Получение списка ресурсов"""
-        resources = Resource.query.all()
-        return jsonify([{
+    # Сериализация моделей для API
+    def resource_to_dict(r):
+        return {
             'id': r.id,
             'name': r.name,
             'resource_type': r.resource_type,
@@ -589,7 +655,78 @@ def create_app(config_name=None):
             'cost_per_unit': r.cost_per_unit,
             'company_name': r.company.name if r.company else 'N/A',
             'company_id': r.company_id
-        } for r in resources])
+        }
+
+    def resource_request_to_dict(r):
+        return {
+            'id': r.id,
+            'resource_name': r.resource_name,
+            'quantity': r.quantity,
+            'priority': r.priority,
+            'status': r.status,
+            'requested_by': r.requested_by,
+            'created_at': r.created_at.isoformat()
+        }
+
+    def company_to_dict(c):
+        return {
+            'id': c.id,
+            'name': c.name,
+            'address': c.address,
+            'phone': c.phone,
+            'email': c.email
+        }
+
+    def order_to_dict(o):
+        return {
+            'id': o.id,
+            'order_number': o.order_number,
+            'customer_name': o.customer_name,
+            'customer_phone': o.customer_phone,
+            'customer_email': o.customer_email,
+            'total_amount': o.total_amount,
+            'status': o.status,
+            'order_date': o.order_date.isoformat() if o.order_date else None,
+            'delivery_date': o.delivery_date.isoformat() if o.delivery_date else None,
+            'user_id': o.user_id
+        }
+
+    def transaction_to_dict(t):
+        return {
+            'id': t.id,
+            'transaction_type': t.transaction_type,
+            'amount': t.amount,
+            'description': t.description,
+            'category': t.category,
+            'date': t.date.isoformat() if t.date else None,
+            'created_at': t.created_at.isoformat() if t.created_at else None
+        }
+
+    def list_response(query, model, serialize):
+        """Страница коллекции или, при ?stream=1 / Accept: application/x-ndjson, потоковая выгрузка целиком"""
+        if wants_stream():
+            return stream_query(query.order_by(model.id), serialize)
+        after_id, limit = page_args()
+        rows, next_cursor = keyset_page(query, model, after_id, limit)
+        return jsonify({'items': [serialize(r) for r in rows], 'next_cursor': next_cursor})
+
+    # API для работы с ресурсами
+    @app.route('/api/resources', methods=['GET'])
+    @login_required
+    @versioned(Resource, Company)
+    def get_resources():
+        """Получение списка ресурсов постранично (?after_id=&limit=)"""
+        query = Resource.query.options(joinedload(Resource.company))
+        query = apply_filters(query, Resource, {'resource_type': str, 'company_id': int})
+        return list_response(query, Resource, resource_to_dict)
+
+    @app.route('/api/resources/<int:resource_id>', methods=['GET'])
+    @login_required
+    @versioned(Resource, Company)
+    def get_resource(resource_id):
+        """Один ресурс (для записей, которых нет на загруженных страницах списка)"""
+        resource = Resource.query.options(joinedload(Resource.company)).get_or_404(resource_id)
+        return jsonify(resource_to_dict(resource))
 
     @app.route('/api/resources', methods=['POST'])
     @role_required(['supplier', 'director'])
@@ -608,6 +745,7 @@ def create_app(config_name=None):
         
         db.session.add(resource)
         db.session.commit()
+        kpi_cache.invalidate_for(Resource)
         
         return jsonify({'message': 'Ресурс создан успешно', 'id': resource.id}), 201
 
@@ -626,6 +764,7 @@ def create_app(config_name=None):
         resource.company_id = data.get('company_id', resource.company_id)
         
         db.session.commit()
+        kpi_cache.invalidate_for(Resource)
         
         return jsonify({'message': 'Ресурс обновлен успешно'})
 
@@ -636,23 +775,17 @@ def create_app(config_name=None):
         resource = Resource.query.get_or_404(resource_id)
         db.session.delete(resource)
         db.session.commit()
+        kpi_cache.invalidate_for(Resource)
         
         return jsonify({'message': 'Ресурс удален успешно'})
 
     @app.route('/api/resource-requests', methods=['GET'])
     @login_required
+    @versioned(ResourceRequest)
     def get_resource_requests():
-        """Получение списка запросов на ресурсы"""
-        requests = ResourceRequest.query.all()
-        return jsonify([{
-            'id': r.id,
-            'resource_name': r.resource_name,
-            'quantity': r.quantity,
-            'priority': r.priority,
-            'status': r.status,
-            'requested_by': r.requested_by,
-            'created_at': r.created_at.isoformat()
-        } for r in requests])
+        """Получение списка запросов на ресурсы постранично (?after_id=&limit=)"""
+        query = apply_filters(ResourceRequest.query, ResourceRequest, {'status': str, 'priority': str})
+        return list_response(query, ResourceRequest, resource_request_to_dict)
 
     @app.route('/api/resource-requests', methods=['POST'])
     @login_required
@@ -670,6 +803,7 @@ def create_app(config_name=None):
         
         db.session.add(request_obj)
         db.session.commit()
+        kpi_cache.invalidate_for(ResourceRequest)
         
         return jsonify({'message': 'Запрос создан успешно', 'id': request_obj.id}), 201
 
@@ -680,6 +814,7 @@ def create_app(config_name=None):
         request_obj = ResourceRequest.query.get_or_404(request_id)
         request_obj.status = 'approved'
         db.session.commit()
+        kpi_cache.invalidate_for(ResourceRequest)
         
         return jsonify({'message': 'Запрос одобрен'})
 
@@ -690,21 +825,16 @@ def create_app(config_name=None):
         request_obj = ResourceRequest.query.get_or_404(request_id)
         request_obj.status = 'rejected'
         db.session.commit()
+        kpi_cache.invalidate_for(ResourceRequest)
         
         return jsonify({'message': 'Запрос отклонен'})
 
     @app.route('/api/companies', methods=['GET'])
     @login_required
+    @versioned(Company)
     def get_companies():
-        """Получение списка компаний"""
-        companies = Company.query.all()
-        return jsonify([{
-            'id': c.id,
-            'name': c.name,
-            'address': c.address,
-            'phone': c.phone,
-            'email': c.email
-        } for c in companies])
+        """Получение списка компаний (потоковый JSON-массив или NDJSON)"""
+        return stream_query(Company.query.order_by(Company.id), company_to_dict)
 
     @app.route('/api/companies', methods=['POST'])
     @role_required(['supplier', 'director'])
@@ -724,11 +854,76 @@ def create_app(config_name=None):
         
         return jsonify({'message': 'Компания создана успешно', 'id': company.id}), 201
 
+    @app.route('/api/orders', methods=['GET'])
+    @role_required(['manager', 'director', 'production'])
+    @versioned(Order)
+    def get_orders():
+        """Получение списка заказов постранично (?after_id=&limit=)"""
+        query = apply_filters(Order.query, Order, {'status': str, 'user_id': int})
+        return list_response(query, Order, order_to_dict)
+
+    @app.route('/api/financial-transactions', methods=['GET'])
+    @role_required(['accountant', 'director'])
+    @versioned(FinancialTransaction)
+    def get_financial_transactions():
+        """Получение списка финансовых операций постранично (?after_id=&limit=)"""
+        query = apply_filters(FinancialTransaction.query, FinancialTransaction,
+                              {'transaction_type': str, 'category': str})
+        return list_response(query, FinancialTransaction, transaction_to_dict)
+
+    @app.route('/api/finance/timeseries', methods=['GET'])
+    @role_required(['accountant', 'director'])
+    def finance_timeseries():
+        """Доходы и расходы по дням, неделям или месяцам из дневной сводки (?granularity=&period=&start=&end=)"""
+        granularity = request.args.get('granularity', 'day')
+        if granularity not in GRANULARITIES:
+            return jsonify({'error': 'Детализация должна быть day, week или month'}), 400
+
+        period = period_from_request(DEFAULT_PERIODS[granularity])
+        # Пустые интервалы заполняются нулями: длина ответа зависит только от периода
+        if bucket_count(period, granularity) > MAX_BUCKETS[granularity]:
+            return jsonify({'error': f'Слишком длинный период: не больше {MAX_BUCKETS[granularity]} '
+                                     f'интервалов для детализации {granularity}'}), 400
+        series = timeseries(period, granularity,
+                            transaction_type=request.args.get('transaction_type'),
+                            category=request.args.get('category'))
+        return jsonify({
+            'granularity': granularity,
+            'start': period.start.date().isoformat(),
+            'end': period.last_day.isoformat(),
+            'series': series,
+        })
+
+    @app.route('/metrics')
+    def prometheus_metrics():
+        """Метрики всех воркеров в формате Prometheus: директору или с локального адреса (METRICS_ALLOW_LOCAL)"""
+        # Запрос через локальный прокси с X-Forwarded-For не считается локальным
+        is_local = (app.config.get('METRICS_ALLOW_LOCAL', False)
+                    and request.remote_addr in ('127.0.0.1', '::1') and 'X-Forwarded-For' not in request.headers)
+        is_director = current_user.is_authenticated and current_user.has_role('director')
+        if not (is_local or is_director):
+            return jsonify({'error': 'Доступ запрещён'}), 403
+        if metrics is None:
+            return jsonify({'error': 'Сбор метрик отключён (METRICS_ENABLED)'}), 404
+        return app.response_class(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+    @app.route('/api/kpi-cache/stats', methods=['GET'])
+    @role_required('director')
+    def kpi_cache_stats():
+        """Счётчики попаданий и промахов кэша KPI текущего воркера"""
+        return jsonify(kpi_cache.stats())
+
+    @app.route('/api/db-pool/stats', methods=['GET'])
+    @role_required('director')
+    def db_pool_stats():
+        """Занятые соединения, переполнение и ожидание пула текущего воркера"""
+        return jsonify(pool_stats(app))
+
     # Загрузка Excel файлов
     @app.route('/upload-excel', methods=['POST'])
     @role_required(['supplier', 'director'])
     def upload_excel():
-        """Загрузка Excel файла с данными"""
+        """Загрузка файла с данными (Excel или CSV)"""
         if 'file' not in request.files:
             return jsonify({'error': 'Файл не выбран'}), 400
         
@@ -736,36 +931,47 @@ def create_app(config_name=None):
         if file.filename == '':
             return jsonify({'error': 'Файл не выбран'}), 400
         
-        if file and file.filename.endswith(('.xlsx', '.xls')):
+        if file and file.filename.lower().endswith(('.xlsx', '.xls', '.csv')):
+            file_type = request.form.get('file_type', 'resources')
+            if file_type not in ('companies', 'resources', 'products'):
+                return jsonify({'error': 'Неизвестный тип данных'}), 400
+            
             try:
-                # Сохраняем файл
-                filename = f"upload_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{file.filename}"
+                import uuid
+
+                # Сохраняем файл для обработчика очереди
+                os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+                filename = f"upload_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}_{file.filename}"
                 filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
                 file.save(filepath)
                 
-                # Загружаем данные в зависимости от типа файла
-                file_type = request.form.get('file_type', 'resources')
-                
-                if file_type == 'companies':
-                    from load_excel_data import load_companies_from_excel
-                    load_companies_from_excel(filepath)
-                elif file_type == 'resources':
-                    from load_excel_data import load_resources_from_excel
-                    load_resources_from_excel(filepath)
-                elif file_type == 'products':
-                    from load_excel_data import load_products_from_excel
-                    load_products_from_excel(filepath)
+                job = enqueue_import(file_type, filepath, original_filename=file.filename,
+                                     created_by=current_user.username)
                 
-                # Удаляем временный файл
-                os.remove(filepath)
+                # Без отдельного обработчика (разработка) импорт выполняется сразу
+                if app.config.get('EXCEL_IMPORT_MODE', 'queue') == 'inline':
+                    run_job(job)
                 
-                return jsonify({'message': 'Данные успешно загружены'})
+                return jsonify({
+                    'message': 'Файл принят в обработку',
+                    'job_id': job.id,
+                    'status_url': url_for('get_job', job_id=job.id),
+                    'job': job_to_dict(job)
+                }), 202
                 
             except Exception as e:
                 return jsonify({'error': f'Ошибка при загрузке файла: {str(e)}'}), 500
         
         return jsonify({'error': 'Неподдерживаемый формат файла'}), 400
 
+    @app.route('/api/jobs/<int:job_id>', methods=['GET'])
+    @read_primary  # прогресс пишет import_worker.py, опрашивается каждые несколько секунд
+    @role_required(['supplier', 'director'])
+    def get_job(job_id):
+        """Состояние задачи импорта: прогресс и ошибки по строкам"""
+        job = ImportJob.query.get_or_404(job_id)
+        return jsonify(job_to_dict(job))
+
     @app.route('/change-password', methods=['GET', 'POST'])
     @login_required
     def change_password():
@@ -774,7 +980,8 @@ def create_app(config_name=None):
             new_password = request.form['new_password']
             confirm_password = request.form['confirm_password']
             
-            if not current_user.check_password(current_password):
+            user = db.session.get(User, current_user.id)
+            if not user.check_password(current_password):
                 flash('Текущий пароль неверен', 'danger')
                 return render_template('change_password.html')
             
@@ -782,7 +989,7 @@ def create_app(config_name=None):
                 flash('Новые пароли не совпадают', 'danger')
                 return render_template('change_password.html')
             
-            current_user.set_password(new_password)
+            user.set_password(new_password)
             db.session.commit()
             flash('Пароль успешно изменен', 'success')
             return redirect(url_for('account_center'))
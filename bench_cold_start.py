@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Бенчмарк первого запроса в новом воркере (template_cache.py).
+Каждый прогон - новый процесс, как воркер gunicorn после max_requests: вход под ролью
+и два запроса к её дашборду; первый включает загрузку шаблонов, второй - нет.
+Режимы:
+  compile  - без кэша байткода, шаблоны разбираются и компилируются при первом запросе;
+  bytecode - байткод из заполненного TEMPLATE_CACHE_DIR;
+  preload  - шаблоны скомпилированы до запроса (warm_templates в мастере с preload_app),
+             время прогрева выводится отдельно - его платит мастер один раз.
+Данные - временная SQLite с seed_data; выводятся медианы по --runs процессам.
+
+Запуск: python bench_cold_start.py [--runs 5] [--scale 0.1]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+MODES = ['compile', 'bytecode', 'preload']
+ROUTES = [(None, '/login'), ('director', '/director'), ('manager', '/manager'), ('supplier', '/supplier'),
+          ('warehouse', '/warehouse'), ('production', '/production'), ('accountant', '/accountant')]
+
+
+def _timed_get(client, path):
+    started = time.perf_counter()
+    response = client.get(path)
+    response.get_data()
+    return (time.perf_counter() - started) * 1000, response.status_code
+
+
+def run_child(mode, db_path, tmp):
+    # Настройки читаются при импорте config (до create_app)
+    os.environ['TEMPLATE_BYTECODE_CACHE'] = '1' if mode == 'bytecode' else '0'
+    os.environ['TEMPLATE_CACHE_DIR'] = os.path.join(tmp, 'jinja_cache')
+    import check_query_budget
+    from template_cache import warm_templates
+
+    result = {'routes': {}}
+    with contextlib.redirect_stdout(io.StringIO()):
+        app = check_query_budget.create_budget_app(db_path, os.path.join(tmp, 'metrics'))
+        if mode == 'preload':
+            _, seconds, _ = warm_templates(app)
+            result['warmup_ms'] = seconds * 1000
+        for role, path in ROUTES:
+            client = app.test_client()
+            if role is not None:
+                client.post('/login', data=dict(zip(('username', 'password'), check_query_budget.ROLE_ACCOUNTS[role])))
+            first, status = _timed_get(client, path)
+            second, _ = _timed_get(client, path)
+            result['routes'][path] = {'first_ms': first, 'warm_ms': second, 'status': status}
+    print(json.dumps(result))
+
+
+def spawn(mode, db_path, tmp):
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', mode, '--db', db_path, '--tmp', tmp],
+        check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def seed(db_path, tmp, scale):
+    import check_query_budget
+    import seed_data
+    from models import db
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        app = check_query_budget.create_budget_app(db_path, os.path.join(tmp, 'metrics'))
+        with app.app_context():
+            db.create_all()
+            seed_data.seed(scale=scale)
+            db.engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help='процессов на режим')
+    parser.add_argument('--scale', type=float, default=0.1, help='объём данных seed_data')
+    parser.add_argument('--child', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--db', help=argparse.SUPPRESS)
+    parser.add_argument('--tmp', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.db, args.tmp)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        seed(db_path, tmp, args.scale)
+        # Первый процесс заполняет кэш байткода, его время не учитывается
+        spawn('bytecode', db_path, tmp)
+        results = {mode: [spawn(mode, db_path, tmp) for _ in range(args.runs)] for mode in MODES}
+
+    print(f'Первый запрос в новом процессе, мс (медиана {args.runs} процессов)')
+    print(f"{'Маршрут':<14}" + ''.join(f'{mode:>10}' for mode in MODES) + f"{'повторный':>11}")
+    for _, path in ROUTES:
+        first = [statistics.median(run['routes'][path]['first_ms'] for run in results[mode]) for mode in MODES]
+        warm = statistics.median(run['routes'][path]['warm_ms'] for run in results['compile'])
+        status = results['compile'][0]['routes'][path]['status']
+        note = '' if status == 200 else f'  (HTTP {status})'
+        print(f'{path:<14}' + ''.join(f'{value:>10.1f}' for value in first) + f'{warm:>11.1f}{note}')
+    totals = [statistics.median(sum(r['first_ms'] for r in run['routes'].values()) for run in results[mode])
+              for mode in MODES]
+    print(f"{'Всего':<14}" + ''.join(f'{value:>10.1f}' for value in totals))
+    warmup = statistics.median(run['warmup_ms'] for run in results['preload'])
+    print(f'Прогрев всех шаблонов в мастере (preload): {warmup:.1f} мс')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Бенчмарк сжатия ответов (compression.py): байты на выходе и время CPU на ответ.
+Образцы - настоящие ответы приложения на временной SQLite с синтетическими данными
+(seed_data.py): дашборды ролей (HTML) и выгрузка /api/orders?stream=1 (JSON), обрезанная
+до 1 КБ-1 МБ. Каждый образец сжимается CompressionMiddleware с уровнями gzip COMPRESS_LEVELS
+(и brotli, если установлен) целиком и потоково по 64 КБ (как stream_query).
+
+Запуск: python bench_compression.py [--scale 0.5] [--repeat 20]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from compression import CompressionMiddleware, brotli
+from streaming import CHUNK_SIZE
+
+DASHBOARDS = ['director', 'manager', 'supplier', 'warehouse', 'production', 'accountant']
+JSON_SIZES = [1024, 10 * 1024, 100 * 1024, 1024 * 1024]
+COMPRESS_LEVELS = [1, 6, 9]
+BROTLI_QUALITIES = [4, 11]
+
+
+def collect_samples(scale):
+    """Несжатые ответы приложения: {имя: (Content-Type, байты)}"""
+    import check_query_budget
+    from models import db
+    import seed_data
+
+    samples = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        app = check_query_budget.create_budget_app(os.path.join(tmp, 'bench.db'), os.path.join(tmp, 'metrics'))
+        # Вход и сидирование печатают отладочные строки
+        with contextlib.redirect_stdout(io.StringIO()):
+            with app.app_context():
+                db.create_all()
+                seed_data.seed(scale=scale)
+                db.session.remove()
+            clients = {}
+            for role in DASHBOARDS:
+                client = clients[role] = app.test_client()
+                client.post('/login', data=dict(zip(('username', 'password'), check_query_budget.ROLE_ACCOUNTS[role])))
+                response = client.get(f'/{role}')
+                samples[f'{role}.html'] = ('text/html; charset=utf-8', response.get_data())
+            orders = clients['director'].get('/api/orders?stream=1').get_data()
+        with app.app_context():
+            db.engine.dispose()
+
+    for size in JSON_SIZES:
+        if len(orders) >= size:
+            samples[f'orders {size // 1024} КБ.json'] = ('application/json', orders[:size])
+    return samples
+
+
+def encoders():
+    """(название, Accept-Encoding, параметры CompressionMiddleware)"""
+    for level in COMPRESS_LEVELS:
+        yield f'gzip-{level}', 'gzip', {'level': level}
+    if brotli is not None:
+        for quality in BROTLI_QUALITIES:
+            yield f'br-{quality}', 'br', {'brotli_quality': quality}
+
+
+def compress_once(content_type, body, accept, options, streaming):
+    """Байты на выходе и время CPU одного прохода через middleware"""
+    def app(environ, start_response):
+        headers = [('Content-Type', content_type)]
+        if streaming:
+            start_response('200 OK', headers)
+            return (body[i:i + CHUNK_SIZE] for i in range(0, len(body), CHUNK_SIZE))
+        start_response('200 OK', headers + [('Content-Length', str(len(body)))])
+        return [body]
+
+    middleware = CompressionMiddleware(app, min_size=0, **options)
+    environ = {'REQUEST_METHOD': 'GET', 'HTTP_ACCEPT_ENCODING': accept}
+    started = time.process_time()
+    size = sum(len(chunk) for chunk in middleware(environ, lambda status, headers, exc_info=None: None))
+    return size, time.process_time() - started
+
+
+def measure(content_type, body, accept, options, streaming, repeat):
+    size, _ = compress_once(content_type, body, accept, options, streaming)
+    times = [compress_once(content_type, body, accept, options, streaming)[1] for _ in range(repeat)]
+    return size, statistics.median(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', type=float, default=0.5, help='объём данных seed_data (для размера дашбордов)')
+    parser.add_argument('--repeat', type=int, default=20, help='повторов на замер (медиана)')
+    args = parser.parse_args()
+
+    samples = collect_samples(args.scale)
+    if brotli is None:
+        print('brotli не установлен (pip install brotli): только gzip', file=sys.stderr)
+    print(f"{'Ответ':<24}{'Исходный':>10}{'Сжатие':>14}{'Байт':>10}{'Доля':>7}{'CPU, мс':>9}{'МБ/с':>8}")
+    for name, (content_type, body) in samples.items():
+        modes = [False, True] if len(body) > CHUNK_SIZE else [False]
+        for label, accept, options in encoders():
+            for streaming in modes:
+                size, cpu_ms = measure(content_type, body, accept, options, streaming, args.repeat)
+                mode = label + (' поток' if streaming else '')
+                throughput = len(body) / 1024 / 1024 / (cpu_ms / 1000) if cpu_ms else float('inf')
+                print(f'{name:<24}{len(body):>10}{mode:>14}{size:>10}{size / len(body):>7.1%}'
+                      f'{cpu_ms:>9.2f}{throughput:>8.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Бенчмарк количества SQL-запросов на отрисовку дашбордов.
+Сравнивает старый подход (отдельный COUNT(*) на каждый статус и отдельные SUM)
+с агрегированной статистикой из dashboard_stats.
+
+Запуск: python bench_dashboard_queries.py [--rows 5000]
+"""
+
+import argparse
+import random
+import time
+
+from sqlalchemy import event
+
+from app import create_app
+from models import (db, User, Role, Order, ProductionTask, ResourceRequest,
+                    FinancialTransaction)
+from dashboard_stats import count_by_status, income_expense_totals
+
+ROLES = ['director', 'manager', 'supplier', 'warehouse', 'production', 'accountant']
+
+DASHBOARDS = {
+    'director': '/director',
+    'manager': '/manager',
+    'supplier': '/supplier',
+    'warehouse': '/warehouse',
+    'production': '/production',
+    'accountant': '/accountant',
+}
+
+ORDER_STATUSES = ['new', 'pending', 'in_production', 'completed', 'cancelled']
+TASK_STATUSES = ['waiting', 'in_progress', 'completed']
+REQUEST_STATUSES = ['pending', 'approved', 'purchased', 'delivered']
+
+
+class QueryCounter:
+    """Подсчёт SQL-запросов через событие before_cursor_execute"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        self.count = 0
+        event.listen(self.engine, 'before_cursor_execute', self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._on_execute)
+
+
+def seed(rows):
+    """Создание ролей, пользователей и данных по статусам"""
+    rnd = random.Random(42)
+    db.create_all()
+
+    for name in ROLES:
+        role = Role(name=name)
+        user = User(username=name, email=f'{name}@bench.local',
+                    first_name=name, last_name='bench')
+        user.set_password('bench')
+        user.roles.append(role)
+        db.session.add(user)
+    db.session.commit()
+
+    db.session.bulk_insert_mappings(Order, [
+        {'customer_name': f'Клиент {i}', 'total_amount': rnd.randint(1, 1000),
+         'status': rnd.choice(ORDER_STATUSES), 'user_id': 1}
+        for i in range(rows)])
+    db.session.bulk_insert_mappings(ProductionTask, [
+        {'name': f'Задача {i}', 'status': rnd.choice(TASK_STATUSES)}
+        for i in range(rows)])
+    db.session.bulk_insert_mappings(ResourceRequest, [
+        {'resource_name': f'Ресурс {i}', 'quantity': 1, 'status': rnd.choice(REQUEST_STATUSES)}
+        for i in range(rows)])
+    db.session.bulk_insert_mappings(FinancialTransaction, [
+        {'transaction_type': rnd.choice(['income', 'expense']), 'amount': rnd.randint(1, 10000)}
+        for i in range(rows)])
+    db.session.commit()
+
+
+def legacy_director_stats():
+    """Статистика директора в старом виде: по запросу на каждый статус"""
+    income = FinancialTransaction.query.filter_by(transaction_type='income').with_entities(db.func.sum(FinancialTransaction.amount)).scalar() or 0
+    expense = FinancialTransaction.query.filter_by(transaction_type='expense').with_entities(db.func.sum(FinancialTransaction.amount)).scalar() or 0
+    orders = {s: Order.query.filter_by(status=s).count() for s in ['new', 'in_production', 'completed', 'cancelled']}
+    tasks = {s: ProductionTask.query.filter_by(status=s).count() for s in TASK_STATUSES}
+    requests = {s: ResourceRequest.query.filter_by(status=s).count() for s in REQUEST_STATUSES}
+    return income, expense, orders, tasks, requests
+
+
+def aggregated_director_stats():
+    """Та же статистика через dashboard_stats"""
+    income, expense = income_expense_totals()
+    return (income, expense, count_by_status(Order).as_dict(),
+            count_by_status(ProductionTask).as_dict(), count_by_status(ResourceRequest).as_dict())
+
+
+def measure(engine, func, repeat):
+    with QueryCounter(engine) as counter:
+        func()
+    queries = counter.count
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    elapsed = (time.perf_counter() - start) / repeat * 1000
+    return queries, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=5000, help='записей в каждой таблице')
+    parser.add_argument('--repeat', type=int, default=20, help='повторов для замера времени')
+    args = parser.parse_args()
+
+    app = create_app('testing')
+    app.config['SESSION_COOKIE_SECURE'] = False
+
+    with app.app_context():
+        seed(args.rows)
+        engine = db.engine
+
+        print(f"=== Статистика директора ({args.rows} записей в таблице) ===")
+        print(f"{'Вариант':<14}{'Запросов':>10}{'мс':>10}")
+        for label, func in [('до', legacy_director_stats), ('после', aggregated_director_stats)]:
+            queries, elapsed = measure(engine, func, args.repeat)
+            print(f"{label:<14}{queries:>10}{elapsed:>10.2f}")
+
+        print("\n=== Запросов на отрисовку дашборда ===")
+        print(f"{'Маршрут':<14}{'Запросов':>10}{'мс':>10}")
+        for role, path in DASHBOARDS.items():
+            client = app.test_client()
+            client.post('/login', data={'username': role, 'password': 'bench'})
+            with QueryCounter(engine) as counter:
+                response = client.get(path)
+            start = time.perf_counter()
+            client.get(path)
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"{path:<14}{counter.count:>10}{elapsed:>10.2f}  [{response.status_code}]")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Бенчмарк импорта файлов: pd.read_excel целиком против потокового чтения
+(openpyxl read_only для .xlsx, модуль csv для .csv) с фиксацией пачками.
+Файлы генерируются заново; каждый режим выполняется в отдельном процессе
+с чистой БД, чтобы пиковый RSS не смешивался.
+Прогон на нескольких размерах файла: у потоковых режимов пик памяти Python
+(tracemalloc) не зависит от числа строк, у pandas-xlsx растёт вместе с файлом
+(у streaming-xlsx растёт только таблица общих строк книги, openpyxl держит её целиком).
+Прирост RSS включает страничный кэш и mmap SQLite, они ограничены cache_size
+и mmap_size профиля SQLITE_PROFILES. Время включает накладные расходы tracemalloc.
+
+Запуск: python bench_excel_ingestion.py [--sizes 20000 100000] [--chunk 1000]
+"""
+
+import argparse
+import csv
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+MODES = ['pandas-xlsx', 'streaming-xlsx', 'streaming-csv']
+HEADER = ['company_name', 'resource_name', 'resource_type', 'quantity', 'unit', 'cost_per_unit']
+
+
+def generate_rows(rows):
+    for i in range(rows):
+        yield [f'Компания {i % 200}', f'Ресурс {i}', 'material', i % 1000, 'шт', float(i % 5000)]
+
+
+def generate_files(directory, rows):
+    """Файлы .xlsx и .csv с одинаковыми данными"""
+    from openpyxl import Workbook
+
+    xlsx_path = os.path.join(directory, f'resources_{rows}.xlsx')
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(HEADER)
+    for row in generate_rows(rows):
+        sheet.append(row)
+    workbook.save(xlsx_path)
+
+    csv_path = os.path.join(directory, f'resources_{rows}.csv')
+    with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        writer.writerows(generate_rows(rows))
+
+    return xlsx_path, csv_path
+
+
+def run_child(mode, file_path, db_path, chunk_size):
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    from app import create_app
+    from models import db
+    from bulk_import import import_resources
+    from table_reader import iter_table_chunks
+
+    app = create_app('development')
+    with app.app_context():
+        db.create_all()
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        tracemalloc.start()
+        start = time.perf_counter()
+
+        if mode == 'pandas-xlsx':
+            import pandas as pd
+            data = pd.read_excel(file_path)
+        else:
+            data = iter_table_chunks(file_path, chunk_size)
+        report = import_resources(data, chunk_size=chunk_size)
+
+        elapsed = time.perf_counter() - start
+        _, python_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    print(json.dumps({
+        'mode': mode,
+        'inserted': report.inserted,
+        'seconds': round(elapsed, 2),
+        'python_peak_mb': round(python_peak / 2 ** 20, 1),
+        'peak_rss_mb': round(rss_after / 1024, 1),
+        'rss_growth_mb': round((rss_after - rss_before) / 1024, 1),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[20000, 100000], help='строк в файле')
+    parser.add_argument('--chunk', type=int, default=1000, help='строк между фиксациями')
+    parser.add_argument('--child', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--file', help=argparse.SUPPRESS)
+    parser.add_argument('--db', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.file, args.db, args.chunk)
+        return
+
+    growth = {mode: {} for mode in MODES}
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'Строк':>8}  {'Режим':<16}{'Добавлено':>10}{'Время, с':>10}{'Python, МБ':>12}{'Пик RSS, МБ':>13}{'Прирост, МБ':>13}")
+        for rows in args.sizes:
+            xlsx_path, csv_path = generate_files(tmp, rows)
+            files = {'pandas-xlsx': xlsx_path, 'streaming-xlsx': xlsx_path, 'streaming-csv': csv_path}
+            for mode in MODES:
+                db_path = os.path.join(tmp, f'{mode}_{rows}.db')
+                output = subprocess.run(
+                    [sys.executable, __file__, '--child', mode, '--file', files[mode],
+                     '--db', db_path, '--chunk', str(args.chunk)],
+                    capture_output=True, text=True, check=True
+                ).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                growth[mode][rows] = (result['python_peak_mb'], result['rss_growth_mb'])
+                print(f"{rows:>8}  {mode:<16}{result['inserted']:>10}{result['seconds']:>10}{result['python_peak_mb']:>12}"
+                      f"{result['peak_rss_mb']:>13}{result['rss_growth_mb']:>13}")
+
+    if len(args.sizes) > 1:
+        print('Пик Python / прирост RSS по размерам файла, МБ:')
+        for mode in MODES:
+            print(f'  {mode:<16}' + ' -> '.join(f'{growth[mode][rows][0]} / {growth[mode][rows][1]} ({rows})'
+                                                for rows in args.sizes))
+
+
+if __name__ == '__main__':
+    main()
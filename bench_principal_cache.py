@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Бенчмарк проверки доступа: запросов в секунду к маршрутам с role_required
+с кэшем принципалов (PRINCIPAL_CACHE) и без него (User.query.get + ленивая загрузка ролей).
+Используется временная SQLite-база в файле, запросы идут через тестовый клиент Flask.
+
+Запуск: python bench_principal_cache.py [--requests 2000]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from bench_dashboard_queries import QueryCounter
+
+ROUTES = [
+    '/api/kpi-cache/stats',  # JSON без запросов приложения
+    '/director',             # дашборд (KPI из кэша): base.html проверяет роли для меню
+]
+
+
+def setup(db_path):
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    from app import create_app
+    from models import db, User, Role
+
+    app = create_app('development')
+    app.config['DEBUG'] = False
+    with app.app_context():
+        db.create_all()
+        user = User(username='bench', email='bench@bench.local', first_name='bench', last_name='bench')
+        user.set_password('bench')
+        user.roles.extend([Role(name='director'), Role(name='production')])
+        db.session.add(user)
+        db.session.commit()
+        engine = db.engine
+    return app, engine
+
+
+def measure(app, engine, path, requests):
+    client = app.test_client()
+    client.post('/login', data={'username': 'bench', 'password': 'bench'})
+    client.get(path)  # прогрев
+
+    with QueryCounter(engine) as counter:
+        start = time.perf_counter()
+        for _ in range(requests):
+            response = client.get(path)
+            assert response.status_code == 200, response.status_code
+        elapsed = time.perf_counter() - start
+    return requests / elapsed, counter.count / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app, engine = setup(os.path.join(tmp, 'bench.db'))
+
+        print(f"{'Маршрут':<24}{'Кэш':<8}{'Запросов/с':>12}{'SQL/запрос':>12}")
+        for path in ROUTES:
+            for enabled in (False, True):
+                app.config['PRINCIPAL_CACHE'] = enabled
+                rps, sql = measure(app, engine, path, args.requests)
+                print(f"{path:<24}{'да' if enabled else 'нет':<8}{rps:>12.0f}{sql:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
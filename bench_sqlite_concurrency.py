@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Бенчмарк конкурентного чтения и записи в файловую SQLite для профилей SQLITE_PROFILES.
+Несколько процессов-читателей выполняют запросы дашборда бухгалтера, процессы-писатели
+добавляют заказы и финансовые операции (с обновлением дневной сводки), как воркеры gunicorn.
+Для каждого профиля - новая БД; выводятся операции в секунду, p95 записи и доля ошибок
+"database is locked".
+
+Запуск: python bench_sqlite_concurrency.py [--readers 4] [--writers 4] [--seconds 10]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+PROFILES = ['default', 'performance']
+
+
+def child_env(profile, db_path):
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{db_path}', SQLITE_PROFILE=profile, METRICS_ENABLED='0')
+    return env
+
+
+def seed(rows):
+    from models import db, Order, FinancialTransaction, User
+    from finance_rollup import backfill_rollup
+
+    db.create_all()
+    user = User(username='bench', email='bench@bench.local', first_name='bench', last_name='bench')
+    user.set_password('bench')
+    db.session.add(user)
+    db.session.flush()
+    db.session.bulk_insert_mappings(Order, [
+        {'customer_name': f'Клиент {i}', 'total_amount': i % 1000, 'status': ('pending', 'completed')[i % 2],
+         'user_id': user.id}
+        for i in range(rows)])
+    db.session.bulk_insert_mappings(FinancialTransaction, [
+        {'transaction_type': ('income', 'expense')[i % 2], 'amount': float(i % 500), 'category': 'bench'}
+        for i in range(rows)])
+    db.session.commit()
+    backfill_rollup()
+
+
+def run_child(role, seconds, rows):
+    from sqlalchemy.exc import OperationalError
+
+    from app import create_app
+    from models import db, Order, FinancialTransaction
+    from dashboard_stats import count_by_status, period_summary
+    from periods import current_period
+
+    app = create_app('development')
+    with app.app_context():
+        if role == 'seed':
+            seed(rows)
+            return
+
+        operations = errors = 0
+        latencies = []
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                if role == 'reader':
+                    count_by_status(Order)
+                    period_summary(current_period('year'))
+                    FinancialTransaction.query.order_by(FinancialTransaction.created_at.desc()).limit(10).all()
+                else:
+                    db.session.add(Order(customer_name='Запись', total_amount=1, status='pending', user_id=1))
+                    db.session.add(FinancialTransaction(transaction_type='income', amount=1.0, category='bench'))
+                    db.session.commit()
+                operations += 1
+            except OperationalError as e:
+                db.session.rollback()
+                if 'locked' not in str(e) and 'busy' not in str(e):
+                    raise
+                errors += 1
+            finally:
+                # Читатель не должен держать снимок между итерациями
+                db.session.remove()
+            latencies.append(time.perf_counter() - start)
+
+    latencies.sort()
+    print(json.dumps({
+        'role': role,
+        'operations': operations,
+        'errors': errors,
+        'p95_ms': round(latencies[int(len(latencies) * 0.95)] * 1000, 1) if latencies else 0,
+    }))
+
+
+def run_profile(profile, args, directory):
+    db_path = os.path.join(directory, f'{profile}.db')
+    env = child_env(profile, db_path)
+    command = [sys.executable, __file__, '--seconds', str(args.seconds), '--rows', str(args.rows)]
+    subprocess.run(command + ['--child', 'seed'], env=env, check=True, capture_output=True)
+
+    roles = ['reader'] * args.readers + ['writer'] * args.writers
+    processes = [subprocess.Popen(command + ['--child', role], env=env, stdout=subprocess.PIPE, text=True)
+                 for role in roles]
+    results = []
+    for process in processes:
+        output, _ = process.communicate()
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    summary = {}
+    for role in ('reader', 'writer'):
+        part = [r for r in results if r['role'] == role]
+        operations = sum(r['operations'] for r in part)
+        errors = sum(r['errors'] for r in part)
+        summary[role] = {
+            'per_second': operations / args.seconds,
+            'error_rate': errors / (operations + errors) if operations + errors else 0.0,
+            'p95_ms': max((r['p95_ms'] for r in part), default=0),
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--rows', type=int, default=20000, help='начальный объём заказов и операций')
+    parser.add_argument('--profiles', nargs='+', default=PROFILES)
+    parser.add_argument('--child', choices=['seed', 'reader', 'writer'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.seconds, args.rows)
+        return
+
+    print(f"Читателей: {args.readers}, писателей: {args.writers}, {args.seconds} с на профиль")
+    print(f"{'Профиль':<14}{'Чтений/с':>10}{'p95, мс':>9}{'Записей/с':>11}{'p95, мс':>9}{'Ошибок блокировки':>19}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for profile in args.profiles:
+            result = run_profile(profile, args, tmp)
+            reader, writer = result['reader'], result['writer']
+            errors = max(reader['error_rate'], writer['error_rate'])
+            print(f"{profile:<14}{reader['per_second']:>10.0f}{reader['p95_ms']:>9}"
+                  f"{writer['per_second']:>11.0f}{writer['p95_ms']:>9}{errors:>18.1%}")
+
+
+if __name__ == '__main__':
+    main()
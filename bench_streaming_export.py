@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Бенчмарк потоковой выгрузки API-коллекций.
+Сравнивает старый вариант (jsonify списка всех строк) с потоковым JSON-массивом
+и NDJSON по пиковому приросту RSS и времени до первого байта (TTFB).
+Каждый замер выполняется в отдельном процессе, чтобы пиковый RSS не смешивался.
+
+Запуск: python bench_streaming_export.py [--rows 1000 100000]
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+MODES = ['jsonify', 'stream-json', 'stream-ndjson']
+
+
+def seed(db, Resource, Company, User, Role, rows):
+    """Заполнение файловой БД ресурсами пачками"""
+    db.create_all()
+    role = Role(name='director')
+    user = User(username='bench', email='bench@bench.local', first_name='bench', last_name='bench')
+    user.set_password('bench')
+    user.roles.append(role)
+    db.session.add(user)
+    db.session.bulk_insert_mappings(Company, [{'name': f'Компания {i}'} for i in range(50)])
+    db.session.commit()
+
+    batch = 10000
+    for start in range(0, rows, batch):
+        db.session.bulk_insert_mappings(Resource, [
+            {'name': f'Ресурс {i}', 'resource_type': 'material', 'quantity': i % 1000,
+             'unit': 'шт', 'cost_per_unit': float(i % 5000), 'company_id': i % 50 + 1}
+            for i in range(start, min(start + batch, rows))])
+        db.session.commit()
+
+
+def run_child(mode, rows, db_path):
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    from flask import jsonify
+    from app import create_app
+    from models import db, Resource, Company, User, Role
+
+    app = create_app('development')
+    app.config['SESSION_COOKIE_SECURE'] = False
+
+    @app.route('/bench/legacy-resources')
+    def legacy_resources():
+        # Старый вариант: весь список в памяти перед сериализацией
+        return jsonify([{
+            'id': r.id, 'name': r.name, 'resource_type': r.resource_type,
+            'quantity': r.quantity, 'unit': r.unit, 'cost_per_unit': r.cost_per_unit,
+            'company_name': r.company.name if r.company else 'N/A', 'company_id': r.company_id
+        } for r in Resource.query.all()])
+
+    if mode == 'seed':
+        # Заполнение БД в отдельном процессе, чтобы не поднимать базовый RSS замеров
+        with app.app_context():
+            seed(db, Resource, Company, User, Role, rows)
+        return
+
+    client = app.test_client()
+    client.post('/login', data={'username': 'bench', 'password': 'bench'})
+
+    if mode == 'jsonify':
+        path, headers = '/bench/legacy-resources', {}
+    elif mode == 'stream-json':
+        path, headers = '/api/resources?stream=1', {}
+    else:
+        path, headers = '/api/resources', {'Accept': 'application/x-ndjson'}
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    response = client.get(path, headers=headers, buffered=False)
+    body = iter(response.response)
+    size = len(next(body, b''))
+    ttfb = time.perf_counter() - start
+    for chunk in body:
+        size += len(chunk)
+    total = time.perf_counter() - start
+    response.close()
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    print(json.dumps({
+        'mode': mode, 'rows': rows, 'bytes': size,
+        'ttfb_ms': round(ttfb * 1000, 2), 'total_ms': round(total * 1000, 2),
+        'peak_rss_growth_mb': round((rss_after - rss_before) / 1024, 2),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 100000])
+    parser.add_argument('--child', choices=['seed'] + MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--db', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.rows[0], args.db)
+        return
+
+    print(f"{'Строк':>10}  {'Режим':<15}{'TTFB, мс':>10}{'Всего, мс':>12}{'Пик RSS, МБ':>14}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            db_path = os.path.join(tmp, f'bench_{rows}.db')
+            subprocess.run([sys.executable, __file__, '--child', 'seed', '--rows', str(rows), '--db', db_path],
+                           capture_output=True, check=True)
+            for mode in MODES:
+                output = subprocess.run(
+                    [sys.executable, __file__, '--child', mode, '--rows', str(rows), '--db', db_path],
+                    capture_output=True, text=True, check=True
+                ).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                print(f"{rows:>10}  {mode:<15}{result['ttfb_ms']:>10}{result['total_ms']:>12}"
+                      f"{result['peak_rss_growth_mb']:>14}")
+
+
+if __name__ == '__main__':
+    main()
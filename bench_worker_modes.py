@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Бенчмарк профилей воркеров gunicorn (WORKER_PROFILES в gunicorn.conf.py): sync, gthread, gevent.
+Для каждого профиля запускается gunicorn -c gunicorn.conf.py с GUNICORN_WORKER_CLASS на свободном
+порту, затем сценарии ролей load_test.py при разном числе одновременных пользователей;
+выводятся запросы в секунду, p50/p95 и ошибки. Медленные маршруты (загрузка Excel, дашборды
+с полными списками) в sync занимают воркер целиком, в gthread/gevent - только поток или greenlet.
+
+Перед прогоном gthread и gevent проверяется область видимости сессий (--check-scoping): каждый
+одновременный поток или greenlet получает свою сессию SQLAlchemy и своё соединение, после выхода
+из контекста приложения все соединения возвращены в пул.
+
+Конфигурация production (пул из pool_options), если FLASK_ENV не задан.
+Данные: flask crm seed --scale 1 --reset (БД из DATABASE_URL, общая для всех профилей).
+Для gevent нужен пакет gevent и mysql+pymysql:// (или SQLite).
+
+Запуск: python bench_worker_modes.py [--profiles sync gthread gevent] [--concurrency 4 16 48] [--duration 20]
+        python bench_worker_modes.py --check-scoping gthread|gevent [--concurrency 16]
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from urllib import error, request as urlrequest
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+PROFILES = ['sync', 'gthread', 'gevent']
+CONCURRENCY = [4, 16, 48]
+STARTUP_TIMEOUT = 60  # секунд на загрузку приложения и запуск воркеров
+
+
+def check_scoping(mode, concurrency):
+    """Одновременные контексты приложения в потоках или greenlet не делят сессию и соединение"""
+    if mode == 'gevent':
+        from gevent import monkey
+        monkey.patch_all()
+    import threading
+
+    # Соединение на каждый одновременный контекст, как DB_POOL_SIZE профиля
+    os.environ.setdefault('DB_POOL_SIZE', str(concurrency))
+    from app import create_app
+    from models import db
+
+    app = create_app(os.environ.get('FLASK_ENV', 'production'))
+    barrier = threading.Barrier(concurrency, timeout=30)
+    seen = []
+    errors = []
+
+    def worker():
+        try:
+            with app.app_context():
+                session = db.session()
+                connection = session.connection().connection.dbapi_connection
+                # Все контексты открыты одновременно, пока остальные не получили свои сессии
+                barrier.wait()
+                session.execute(db.text('SELECT 1'))
+                seen.append((id(session), id(connection)))
+        except Exception as e:
+            errors.append(repr(e))
+
+    if mode == 'gevent':
+        import gevent
+        gevent.joinall([gevent.spawn(worker) for _ in range(concurrency)])
+    else:
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    with app.app_context():
+        checked_out = {bind or 'default': engine.pool.checkedout() for bind, engine in db.engines.items()
+                       if hasattr(engine.pool, 'checkedout')}
+    result = {
+        'mode': mode,
+        'concurrency': concurrency,
+        'sessions': len({session for session, _ in seen}),
+        'connections': len({connection for _, connection in seen}),
+        'checked_out_after': sum(checked_out.values()),
+        'errors': errors[:3],
+    }
+    result['ok'] = (not errors and result['sessions'] == result['connections'] == concurrency
+                    and result['checked_out_after'] == 0)
+    return result
+
+
+def run_scoping_check(mode, concurrency):
+    output = subprocess.run([sys.executable, __file__, '--check-scoping', mode, '--concurrency', str(concurrency)],
+                            capture_output=True, text=True, cwd=ROOT)
+    # Последняя строка - JSON результата; выше - вывод приложения
+    lines = output.stdout.strip().splitlines()
+    try:
+        return json.loads(lines[-1])
+    except (IndexError, ValueError):
+        return {'mode': mode, 'ok': False, 'errors': [output.stderr.strip()[-500:]]}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(url, server):
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            return False
+        try:
+            urlrequest.urlopen(f'{url}/login', timeout=2).close()
+            return True
+        except (error.URLError, OSError):
+            time.sleep(0.5)
+    return False
+
+
+def run_profile(profile, args):
+    """Результаты load_test.run для каждого уровня конкурентности на одном запуске gunicorn"""
+    import load_test
+
+    port = free_port()
+    url = f'http://127.0.0.1:{port}'
+    env = dict(os.environ, GUNICORN_WORKER_CLASS=profile)
+    env.setdefault('FLASK_ENV', 'production')
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '-b', f'127.0.0.1:{port}',
+                               'wsgi:application'], cwd=ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        if not wait_ready(url, server):
+            print(f'{profile}: gunicorn не запустился за {STARTUP_TIMEOUT} с')
+            return []
+        results = []
+        for users in args.concurrency:
+            run_args = argparse.Namespace(target=url, users=users, duration=args.duration, roles=load_test.ROLES)
+            results.append((users, load_test.run(run_args)['total']))
+        return results
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profiles', nargs='+', default=PROFILES, choices=PROFILES)
+    parser.add_argument('--concurrency', nargs='+', type=int, default=CONCURRENCY,
+                        help='одновременных виртуальных пользователей')
+    parser.add_argument('--duration', type=float, default=20, help='секунд на каждый уровень')
+    parser.add_argument('--check-scoping', choices=['gthread', 'gevent'],
+                        help='только проверка сессий в потоках или greenlet')
+    args = parser.parse_args()
+
+    if args.check_scoping:
+        print(json.dumps(check_scoping(args.check_scoping, max(args.concurrency))))
+        return
+
+    if importlib.util.find_spec('gunicorn') is None:
+        sys.exit('Нужен gunicorn: pip install gunicorn (для профиля gevent также gevent)')
+
+    profiles = []
+    for profile in args.profiles:
+        if profile == 'gevent' and importlib.util.find_spec('gevent') is None:
+            print('gevent: пакет gevent не установлен, профиль пропущен')
+            continue
+        if profile != 'sync':
+            check = run_scoping_check(profile, max(args.concurrency))
+            status = 'OK' if check['ok'] else f"ОШИБКА {check}"
+            print(f'{profile}: сессии в {check.get("concurrency")} одновременных контекстах - {status}')
+            if not check['ok']:
+                continue
+        profiles.append(profile)
+
+    print(f"\n{'Профиль':<10}{'Польз.':>8}{'Запр/с':>10}{'p50, мс':>10}{'p95, мс':>10}{'Ошибки':>8}")
+    for profile in profiles:
+        for users, total in run_profile(profile, args):
+            print(f"{profile:<10}{users:>8}{total['rps']:>10}{total['p50_ms']:>10}{total['p95_ms']:>10}"
+                  f"{total['errors']:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Сборка статики: отпечатки содержимого и заранее сжатые варианты (см. static_assets.py).
+Каждый файл static/ копируется в static/dist/ с хешем содержимого в имени
+(css/custom.css -> dist/css/custom.3f2a9c1b7d4e.css); ссылки url(...) в CSS заменяются на файлы
+с хешем, поэтому CSS меняет имя и при изменении шрифта. Для текстовых форматов пишутся .gz
+и, если установлен пакет brotli, .br. Соответствие имён - static/dist/manifest.json.
+Прежние файлы сборки остаются (их могут запрашивать закэшированные страницы), --clean удаляет их.
+
+--vendor скачивает шрифт Inter (Google Fonts) и Font Awesome в static/vendor/ с переписыванием
+ссылок на локальные файлы; нужен доступ в интернет, результат добавляется в репозиторий.
+--vendor-missing скачивает только отсутствующие копии, а без доступа к CDN сообщает об этом
+и продолжает сборку (страницы подключают CDN); так сборка запускается при старте web в Procfile.
+
+Запуск: python build_assets.py [--vendor | --vendor-missing] [--clean]   # после изменения static/ и при деплое
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import posixpath
+import re
+import sys
+from urllib import request as urlrequest
+from urllib.parse import urljoin, urlsplit
+
+from static_assets import BUILD_DIR, MANIFEST, VENDOR_STYLESHEETS
+
+try:
+    import brotli
+except ImportError:  # .br не создаются, отдаётся .gz
+    brotli = None
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+COMPRESSIBLE = {'.css', '.js', '.svg', '.json', '.txt', '.html', '.ttf', '.eot', '.map'}
+MIN_COMPRESS_SIZE = 256  # байт; меньше - заголовки сжатия не окупаются
+# Google Fonts отдаёт woff2 только современным браузерам
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36'
+CSS_URL = re.compile(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)')
+
+
+def _fetch(url):
+    with urlrequest.urlopen(urlrequest.Request(url, headers={'User-Agent': USER_AGENT}), timeout=30) as response:
+        return response.read()
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def _is_external(ref):
+    return ref.startswith(('data:', '#', 'http:', 'https:', '//'))
+
+
+def vendor(only_missing=False):
+    """Локальные копии сторонних стилей и файлов, на которые они ссылаются"""
+    for name, (cdn, local) in VENDOR_STYLESHEETS.items():
+        if only_missing and os.path.exists(os.path.join(STATIC_DIR, local)):
+            continue
+        try:
+            files = _vendor_stylesheet(cdn, local)
+        except OSError as exc:  # URLError - подкласс OSError
+            if not only_missing:
+                raise
+            print(f'{name}: не удалось скачать ({exc}), остаётся CDN', file=sys.stderr)
+            continue
+        print(f'{name}: {local}, файлов {files}')
+
+
+def _vendor_stylesheet(cdn, local):
+    """Стиль с CDN и файлы, на которые он ссылается; всё скачивается до записи на диск,
+    поэтому при обрыве загрузки копия не появляется без своих шрифтов. Возвращает число файлов"""
+    css = _fetch(cdn).decode('utf-8')
+    css_dir = posixpath.dirname(local)
+    fetched = {}
+
+    def localize(match):
+        ref = match.group(2)
+        if ref.startswith('data:'):
+            return match.group(0)
+        url = urljoin(cdn, ref)
+        if _is_external(ref):
+            # Файлы с другого домена (fonts.gstatic.com) - рядом со стилем
+            target = posixpath.join(css_dir, 'files', posixpath.basename(urlsplit(url).path))
+            suffix = ''
+        else:
+            # Относительные пути (../webfonts/...) сохраняют структуру CDN, ?v= и #iefix остаются
+            parts = urlsplit(ref)
+            target = posixpath.normpath(posixpath.join(css_dir, parts.path))
+            suffix = ref[len(parts.path):]
+        if target not in fetched:
+            fetched[target] = _fetch(url)
+        return f'url({posixpath.relpath(target, css_dir)}{suffix})'
+
+    css = CSS_URL.sub(localize, css)
+    for target, data in fetched.items():
+        _write(os.path.join(STATIC_DIR, target), data)
+    _write(os.path.join(STATIC_DIR, local), css.encode('utf-8'))
+    return len(fetched)
+
+
+def _source_files():
+    for root, dirs, files in os.walk(STATIC_DIR):
+        rel_root = os.path.relpath(root, STATIC_DIR).replace(os.sep, '/')
+        if rel_root == BUILD_DIR or rel_root.startswith(BUILD_DIR + '/'):
+            dirs[:] = []
+            continue
+        for filename in files:
+            if not filename.startswith('.'):
+                yield posixpath.normpath(posixpath.join(rel_root, filename))
+
+
+def _hashed_name(logical, data):
+    stem, ext = posixpath.splitext(logical)
+    return posixpath.join(BUILD_DIR, f'{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}')
+
+
+def _rewrite_css(logical, css, manifest):
+    """Ссылки url(...) на файлы static -> файлы сборки (пути относительно будущего места CSS)"""
+    css_dir = posixpath.dirname(logical)
+    built_dir = posixpath.join(BUILD_DIR, css_dir)
+
+    def replace(match):
+        ref = match.group(2)
+        if _is_external(ref):
+            return match.group(0)
+        parts = urlsplit(ref)
+        target = posixpath.normpath(posixpath.join(css_dir, parts.path))
+        if target not in manifest:
+            return match.group(0)
+        suffix = ref[len(parts.path):]
+        return f'url({posixpath.relpath(manifest[target], built_dir)}{suffix})'
+
+    return CSS_URL.sub(replace, css)
+
+
+def build():
+    """Файлы с хешем, сжатые варианты и manifest.json; возвращает (manifest, размеры)"""
+    sources = sorted(_source_files(), key=lambda name: (name.endswith('.css'), name))
+    manifest = {}
+    sizes = {'files': 0, 'original': 0, 'gzip': 0, 'brotli': 0}
+    # CSS после остальных файлов: в них подставляются имена шрифтов и картинок с хешем
+    for logical in sources:
+        with open(os.path.join(STATIC_DIR, logical), 'rb') as f:
+            data = f.read()
+        if logical.endswith('.css'):
+            data = _rewrite_css(logical, data.decode('utf-8'), manifest).encode('utf-8')
+        built = _hashed_name(logical, data)
+        manifest[logical] = built
+        path = os.path.join(STATIC_DIR, built)
+        _write(path, data)
+        sizes['files'] += 1
+        sizes['original'] += len(data)
+
+        if posixpath.splitext(logical)[1] in COMPRESSIBLE and len(data) >= MIN_COMPRESS_SIZE:
+            # mtime=0: одинаковый .gz при повторной сборке
+            compressed = gzip.compress(data, compresslevel=9, mtime=0)
+            _write(path + '.gz', compressed)
+            sizes['gzip'] += len(compressed)
+            if brotli is not None:
+                compressed = brotli.compress(data, quality=11)
+                _write(path + '.br', compressed)
+                sizes['brotli'] += len(compressed)
+
+    _write(os.path.join(STATIC_DIR, BUILD_DIR, MANIFEST),
+           json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    return manifest, sizes
+
+
+def clean(manifest):
+    """Удалить файлы прежних сборок"""
+    keep = set(manifest.values())
+    removed = 0
+    build_root = os.path.join(STATIC_DIR, BUILD_DIR)
+    for root, _, files in os.walk(build_root):
+        for filename in files:
+            rel = posixpath.join(BUILD_DIR, os.path.relpath(os.path.join(root, filename), build_root).replace(os.sep, '/'))
+            base = re.sub(r'\.(gz|br)$', '', rel)
+            if filename != MANIFEST and base not in keep:
+                os.remove(os.path.join(root, filename))
+                removed += 1
+    return removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--vendor', action='store_true', help='скачать шрифты и иконки в static/vendor/')
+    parser.add_argument('--vendor-missing', action='store_true',
+                        help='скачать только отсутствующие копии; без доступа к CDN продолжить сборку')
+    parser.add_argument('--clean', action='store_true', help='удалить файлы прежних сборок')
+    args = parser.parse_args()
+
+    if args.vendor or args.vendor_missing:
+        vendor(only_missing=not args.vendor)
+    manifest, sizes = build()
+    print(f"Файлов: {sizes['files']}, {sizes['original']} байт; gzip {sizes['gzip']} байт"
+          + (f", brotli {sizes['brotli']} байт" if brotli is not None else ' (brotli не установлен: pip install brotli)'))
+    if args.clean:
+        print(f'Удалено файлов прежних сборок: {clean(manifest)}')
+    if not any(os.path.exists(os.path.join(STATIC_DIR, local)) for _, local in VENDOR_STYLESHEETS.values()):
+        print('Шрифты и иконки ещё загружаются из CDN: python build_assets.py --vendor', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Пакетный импорт компаний, ресурсов и продуктов из таблиц (DataFrame).
+Для каждой пачки уже существующие записи и компании ищутся запросами WHERE name IN (...)
+по именам пачки (индексы по name), новые строки определяются средствами pandas
+и вставляются через bulk_insert_mappings. Память не зависит от размера файла и таблиц:
+между пачками хранятся только счётчики и первые MAX_REPORTED_ERRORS ошибок.
+Принимает DataFrame целиком или последовательность пачек (см. table_reader).
+Вызывать внутри контекста приложения.
+"""
+
+import pandas as pd
+
+from models import db, Company, Resource, Product
+
+CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+LOOKUP_BATCH = 500  # имён в одном IN (...): меньше лимита параметров SQLite
+HEADER_ROWS = 1  # номер строки в файле = индекс DataFrame + 1 + HEADER_ROWS
+
+
+class ImportReport:
+    """Итог импорта: вставлено, пропущено (дубликаты), число строк с ошибками и первые из них"""
+
+    def __init__(self):
+        self.inserted = 0
+        self.skipped = 0
+        self.failed_count = 0
+        self.failed = []  # не больше MAX_REPORTED_ERRORS
+
+    def fail(self, rows, error):
+        self.failed_count += len(rows)
+        room = max(MAX_REPORTED_ERRORS - len(self.failed), 0)
+        for index in rows[:room]:
+            self.failed.append({'row': int(index) + 1 + HEADER_ROWS, 'error': str(error)})
+
+    def merge(self, other):
+        self.inserted += other.inserted
+        self.skipped += other.skipped
+        self.failed_count += other.failed_count
+        self.failed.extend(other.failed[:max(MAX_REPORTED_ERRORS - len(self.failed), 0)])
+        return self
+
+    def as_dict(self):
+        return {
+            'inserted': self.inserted,
+            'skipped': self.skipped,
+            'failed': self.failed_count,
+            'errors': self.failed,
+        }
+
+    def __repr__(self):
+        return f'<ImportReport inserted={self.inserted} skipped={self.skipped} failed={self.failed_count}>'
+
+
+def _column(df, name, default):
+    """Колонка с подставленным значением по умолчанию для отсутствующих и пустых ячеек"""
+    if name not in df.columns:
+        return pd.Series([default] * len(df), index=df.index, dtype=object)
+    return df[name].astype(object).where(df[name].notna(), default)
+
+
+def _text(df, name, default=''):
+    return _column(df, name, default).astype(str).str.strip()
+
+
+def _numeric(df, name, default):
+    # Нечисловые значения становятся NaN и отсеиваются как ошибки
+    return pd.to_numeric(_column(df, name, default), errors='coerce')
+
+
+def _numbered_names(df, name, template):
+    """Имена из колонки; пустые заменяются шаблоном с номером строки, как в прежних загрузчиках"""
+    fallback = pd.Series([template.format(i + 1) for i in df.index], index=df.index)
+    names = _text(df, name, '')
+    return names.where(names != '', fallback)
+
+
+def _frames(data):
+    """DataFrame целиком или последовательность DataFrame-пачек (потоковое чтение файла)"""
+    if isinstance(data, pd.DataFrame):
+        yield data
+    else:
+        yield from data
+
+
+def _reject(frame, mask, error, report):
+    """Убрать строки по маске, записав их в отчёт как ошибочные"""
+    if mask.any():
+        report.fail(frame.index[mask], error)
+    return frame[~mask]
+
+
+def _keys(frame, key_columns):
+    if len(key_columns) == 1:
+        return frame[key_columns[0]].tolist()
+    return list(zip(*(frame[column].tolist() for column in key_columns)))
+
+
+def _lookup(columns, names):
+    """Строки columns с name из names: запросы WHERE name IN (...) по LOOKUP_BATCH имён"""
+    names = list(dict.fromkeys(names))
+    for start in range(0, len(names), LOOKUP_BATCH):
+        yield from db.session.query(*columns).filter(columns[0].in_(names[start:start + LOOKUP_BATCH]))
+
+
+def _skip_existing(frame, model, key_columns, report):
+    """Убрать дубликаты внутри пачки и строки, уже имеющиеся в БД.
+    Вставленные ранее пачки уже зафиксированы, поэтому дубликаты между пачками тоже находятся."""
+    keys = _keys(frame, key_columns)
+    columns = [getattr(model, column) for column in key_columns]
+    if len(key_columns) == 1:
+        existing = {name for (name,) in _lookup(columns, keys)}
+    else:
+        existing = {tuple(row) for row in _lookup(columns, (key[0] for key in keys))}
+    in_db = pd.Series([key in existing for key in keys], index=frame.index, dtype=bool)
+    duplicate = frame.duplicated(subset=key_columns) | in_db
+    report.skipped += int(duplicate.sum())
+    return frame[~duplicate]
+
+
+def _insert_chunks(model, frame, columns, report, chunk_size=CHUNK_SIZE, progress=None):
+    """Вставка строк пачками с фиксацией каждой пачки; progress(report) вызывается после каждой"""
+    for start in range(0, len(frame), chunk_size):
+        chunk = frame.iloc[start:start + chunk_size]
+        try:
+            db.session.bulk_insert_mappings(model, chunk[columns].to_dict('records'))
+            db.session.commit()
+            report.inserted += len(chunk)
+        except Exception as e:
+            db.session.rollback()
+            report.fail(chunk.index, e)
+        if progress:
+            progress(report)
+    if progress and not len(frame):
+        progress(report)
+
+
+def import_companies(data, chunk_size=CHUNK_SIZE, progress=None):
+    """Импорт компаний: колонки company_name, address, phone, email"""
+    report = ImportReport()
+
+    for df in _frames(data):
+        frame = pd.DataFrame({
+            'name': _numbered_names(df, 'company_name', 'Компания {}'),
+            'address': _text(df, 'address'),
+            'phone': _text(df, 'phone'),
+            'email': _text(df, 'email'),
+        }, index=df.index)
+
+        frame = _skip_existing(frame, Company, ['name'], report)
+        _insert_chunks(Company, frame, ['name', 'address', 'phone', 'email'], report, chunk_size, progress)
+    return report
+
+
+def _add_companies(frame, company_ids, report, chunk_size):
+    """Создать пачкой компании, которых нет в company_ids (id компаний пачки), и дополнить словарь их id"""
+    new_companies = frame[~frame['company_name'].isin(company_ids.keys())]
+    new_companies = new_companies.drop_duplicates(subset=['company_name'])
+    if not len(new_companies):
+        return
+
+    mappings = [{
+        'name': row.company_name,
+        'address': row.company_address,
+        'phone': row.company_phone,
+        'email': row.company_email,
+    } for row in new_companies.itertuples(index=False)]
+    try:
+        for start in range(0, len(mappings), chunk_size):
+            db.session.bulk_insert_mappings(Company, mappings[start:start + chunk_size])
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        failed = frame['company_name'].isin(new_companies['company_name'])
+        report.fail(frame.index[failed], e)
+        return
+
+    company_ids.update(_lookup([Company.name, Company.id], new_companies['company_name'].tolist()))
+
+
+def import_resources(data, chunk_size=CHUNK_SIZE, progress=None):
+    """Импорт ресурсов: компании ищутся по company_name и создаются при отсутствии"""
+    report = ImportReport()
+
+    for df in _frames(data):
+        frame = pd.DataFrame({
+            'company_name': _text(df, 'company_name'),
+            'company_address': _text(df, 'company_address'),
+            'company_phone': _text(df, 'company_phone'),
+            'company_email': _text(df, 'company_email'),
+            'name': _numbered_names(df, 'resource_name', 'Ресурс {}'),
+            'resource_type': _text(df, 'resource_type', 'material'),
+            'quantity': _numeric(df, 'quantity', 0),
+            'unit': _text(df, 'unit', 'шт'),
+            'cost_per_unit': _numeric(df, 'cost_per_unit', 0.0),
+        }, index=df.index)
+
+        frame = _reject(frame, frame['company_name'] == '', 'Не указана компания', report)
+        frame = _reject(frame, frame['quantity'].isna(), 'Некорректное количество', report)
+        frame = _reject(frame, frame['cost_per_unit'].isna(), 'Некорректная цена', report)
+
+        company_ids = dict(_lookup([Company.name, Company.id], frame['company_name'].tolist()))
+        _add_companies(frame, company_ids, report, chunk_size)
+        frame = frame.assign(company_id=frame['company_name'].map(company_ids))
+        frame = frame[frame['company_id'].notna()]
+        frame = frame.assign(company_id=frame['company_id'].astype(int), quantity=frame['quantity'].astype(int))
+
+        frame = _skip_existing(frame, Resource, ['name', 'company_id'], report)
+        _insert_chunks(Resource, frame,
+                       ['name', 'resource_type', 'quantity', 'unit', 'cost_per_unit', 'company_id'],
+                       report, chunk_size, progress)
+    return report
+
+
+def import_products(data, chunk_size=CHUNK_SIZE, progress=None):
+    """Импорт продуктов: уникальность по product_name"""
+    report = ImportReport()
+
+    for df in _frames(data):
+        frame = pd.DataFrame({
+            'name': _numbered_names(df, 'product_name', 'Продукт {}'),
+            'description': _text(df, 'description'),
+            'price': _numeric(df, 'price', 0.0),
+            'category': _text(df, 'category', 'general'),
+            'stock_quantity': _numeric(df, 'stock_quantity', 0),
+            'min_stock_level': _numeric(df, 'min_stock_level', 10),
+        }, index=df.index)
+
+        frame = _reject(frame, frame['price'].isna(), 'Некорректная цена', report)
+        frame = _reject(frame, frame['stock_quantity'].isna() | frame['min_stock_level'].isna(),
+                        'Некорректный остаток', report)
+        frame = frame.assign(stock_quantity=frame['stock_quantity'].astype(int),
+                             min_stock_level=frame['min_stock_level'].astype(int))
+
+        frame = _skip_existing(frame, Product, ['name'], report)
+        _insert_chunks(Product, frame,
+                       ['name', 'description', 'price', 'category', 'stock_quantity', 'min_stock_level'],
+                       report, chunk_size, progress)
+    return report
+
+
+# Тип файла из формы загрузки -> функция импорта
+IMPORTERS = {
+    'companies': import_companies,
+    'resources': import_resources,
+    'products': import_products,
+}
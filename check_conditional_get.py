@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Проверка условных GET через middleware сжатия (conditional_get.py, compression.py).
+На временной SQLite с синтетическими данными для каждого адреса из PAGES и каждого
+Accept-Encoding из ENCODINGS: ответ 200 с ETag, затем запрос с этим ETag в If-None-Match.
+Ошибка, если повтор не 304, если ETag ответа 304 отличается от ETag ответа 200,
+если ETag сильный или если ETag сжатого и несжатого ответа разные.
+Для адресов с compressed=True ответ с Accept-Encoding: gzip должен быть сжат.
+
+Запуск: python check_conditional_get.py
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+
+# (роль, адрес, должен ли ответ 200 сжиматься при Accept-Encoding: gzip)
+PAGES = [
+    ('supplier', '/api/resources?limit=50', True),
+    ('supplier', '/api/resources/{resource_id}', False),  # короче COMPRESS_MIN_SIZE
+    ('accountant', '/api/financial-transactions', True),
+    ('supplier', '/supplier/contracts', True),
+]
+ENCODINGS = ['gzip', 'identity']
+
+
+def round_trip(client, path, encoding):
+    """(статус 200, ETag 200, Content-Encoding 200, статус повтора, ETag повтора)"""
+    first = client.get(path, headers={'Accept-Encoding': encoding})
+    first.get_data()
+    etag = first.headers.get('ETag')
+    second = client.get(path, headers={'Accept-Encoding': encoding, 'If-None-Match': etag or ''})
+    second.get_data()
+    return (first.status_code, etag, first.headers.get('Content-Encoding'),
+            second.status_code, second.headers.get('ETag'))
+
+
+def run_checks(app):
+    from check_query_budget import ROLE_ACCOUNTS, fixtures
+
+    problems = []
+    clients = {}
+    with app.app_context():
+        ids = fixtures()
+    for role, path, compressed in PAGES:
+        path = path.format(**ids)
+        client = clients.get(role)
+        if client is None:
+            client = clients[role] = app.test_client()
+            with contextlib.redirect_stdout(io.StringIO()):
+                # Стартовая страница после входа забирает flash-сообщение: страница с ним отдаётся без ETag
+                client.post('/login', data=dict(zip(('username', 'password'), ROLE_ACCOUNTS[role])),
+                            follow_redirects=True)
+
+        etags = {}
+        for encoding in ENCODINGS:
+            status, etag, content_encoding, repeat_status, repeat_etag = round_trip(client, path, encoding)
+            name = f'{path} ({encoding})'
+            print(f'{name:<52}{status:>5} {etag or "-":<46}{content_encoding or "-":<10}{repeat_status:>5}')
+            if status != 200 or etag is None:
+                problems.append(f'{name}: статус {status}, ETag {etag}')
+                continue
+            etags[encoding] = etag
+            if not etag.startswith('W/'):
+                problems.append(f'{name}: сильный ETag {etag}')
+            if encoding == 'gzip' and compressed and content_encoding != 'gzip':
+                problems.append(f'{name}: ответ не сжат')
+            if repeat_status != 304:
+                problems.append(f'{name}: повтор с If-None-Match - статус {repeat_status}, ожидался 304')
+            elif repeat_etag != etag:
+                problems.append(f'{name}: ETag 304 {repeat_etag} отличается от ETag 200 {etag}')
+        if len(set(etags.values())) > 1:
+            problems.append(f'{path}: ETag зависит от Accept-Encoding: {etags}')
+    return problems
+
+
+def main():
+    import check_query_budget
+    from models import db
+    from seed_data import seed
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with contextlib.redirect_stdout(io.StringIO()):
+            app = check_query_budget.create_budget_app(os.path.join(tmp, 'etag.db'), os.path.join(tmp, 'metrics'))
+            with app.app_context():
+                db.create_all()
+                seed(check_query_budget.SMALL_SCALE, 1, progress=lambda message: None)
+        problems = run_checks(app)
+        with app.app_context():
+            db.engine.dispose()
+
+    for problem in problems:
+        print(f'ОШИБКА {problem}')
+    print(f'Проверено адресов: {len(PAGES)}, ошибок: {len(problems)}')
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Бюджет SQL-запросов по маршрутам.
+Заполняет временную SQLite синтетическими данными (seed_data.py), открывает каждый маршрут
+приложения от имени пользователя нужной роли и сравнивает с таблицей BUDGETS:
+- число SQL-запросов на один HTTP-запрос не больше queries;
+- число строк, прочитанных из БД, не больше rows (None - растёт с данными, см. комментарий);
+- число запросов одинаково на малом и на увеличенном наборе: рост означает N+1.
+Маршрут без записи в BUDGETS тоже считается ошибкой - бюджет задаётся вместе с маршрутом.
+Известные неисправные страницы (BROKEN_PAGES) не считаются пройденными: каждая выводится
+строкой XFAIL и отдельно в итоге, а исправленная страница в списке - ошибка.
+Снимки KPI сбрасываются перед каждым запросом, поэтому измеряется худший случай (промах кэша).
+Страницы отрисовываются в строгом режиме (SQL_STRICT_RENDERING): ленивая загрузка связи
+в шаблоне даёт ошибку с текстом исключения, а не лишние запросы в бюджете.
+
+Запуск: python check_query_budget.py [--report]   # --report - таблица измеренных значений
+"""
+
+import argparse
+import contextlib
+import io
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+
+# Маршрут (endpoint, метод) -> роль, бюджет и, при необходимости, путь, тело и ожидаемый статус.
+# queries - SQL-запросов на HTTP-запрос при пустом кэше KPI; rows - прочитанных строк
+# (None - страница читает таблицу целиком, строк тем больше, чем больше данных).
+# В path подставляются id последних строк (см. fixtures); json и data могут быть функциями от этих id.
+# Проверки выполняются в порядке таблицы: запись идёт после чтения, удаление - после создания.
+BUDGETS = {
+    ('index', 'GET'): dict(role='director', queries=0, rows=0, status=302),
+    ('login', 'GET'): dict(role='director', queries=0, rows=0),
+    ('account_center', 'GET'): dict(role='director', queries=3, rows=None),  # все пользователи
+    ('change_password', 'GET'): dict(role='director', queries=0, rows=0),
+
+    # Панели ролей: KPI - агрегаты в SQL, списки - целиком (кроме последних операций)
+    ('director_dashboard', 'GET'): dict(role='director', queries=5, rows=None),  # все пользователи
+    ('manager_dashboard', 'GET'): dict(role='manager', queries=4, rows=None),  # заказы, пользователи, продукты
+    ('supplier_dashboard', 'GET'): dict(role='supplier', queries=4, rows=None),  # ресурсы и запросы
+    ('warehouse_dashboard', 'GET'): dict(role='warehouse', queries=3, rows=None),  # склад
+    ('production_dashboard', 'GET'): dict(role='production', queries=4, rows=None),  # задачи и заказы
+    ('accountant_dashboard', 'GET'): dict(role='accountant', queries=4, rows=None),  # операции за период
+    ('accountant_cash_flow', 'GET'): dict(role='accountant', queries=2, rows=201),
+    ('accountant_financial_analysis', 'GET'): dict(role='accountant', queries=1, rows=10),
+
+    # API: счётчики изменений таблиц для ETag (conditional_get.py), затем коллекция постранично
+    # (limit + 1 строка для курсора) или, для компаний, потоком целиком
+    ('get_resources', 'GET'): dict(role='supplier', queries=2, rows=103),
+    ('get_resource', 'GET'): dict(role='supplier', queries=2, rows=3, path='/api/resources/{resource_id}'),
+    ('get_resource_requests', 'GET'): dict(role='supplier', queries=2, rows=102),
+    ('get_companies', 'GET'): dict(role='supplier', queries=2, rows=None),
+    ('get_orders', 'GET'): dict(role='manager', queries=2, rows=102),
+    ('get_financial_transactions', 'GET'): dict(role='accountant', queries=2, rows=102),
+    ('finance_timeseries', 'GET'): dict(role='accountant', queries=1, rows=36),
+    ('kpi_cache_stats', 'GET'): dict(role='director', queries=0, rows=0),
+    ('db_pool_stats', 'GET'): dict(role='director', queries=0, rows=0),
+    ('prometheus_metrics', 'GET'): dict(role='director', queries=0, rows=0),
+
+    # Запись: счётчик изменений таблицы увеличивается в той же транзакции
+    ('create_company', 'POST'): dict(role='supplier', queries=3, rows=1, status=201,
+                                     json={'name': 'Бюджетная компания'}),
+    ('create_resource', 'POST'): dict(role='supplier', queries=3, rows=1, status=201,
+                                      json=lambda ids: {'name': 'Бюджетный ресурс', 'company_id': ids['company_id']}),
+    ('update_resource', 'PUT'): dict(role='supplier', queries=3, rows=1, path='/api/resources/{resource_id}',
+                                     json={'quantity': 10}),
+    ('delete_resource', 'DELETE'): dict(role='supplier', queries=3, rows=1, path='/api/resources/{resource_id}'),
+    ('create_resource_request', 'POST'): dict(role='production', queries=3, rows=1, status=201,
+                                              json={'resource_name': 'Сталь', 'quantity': 5}),
+    ('approve_resource_request', 'POST'): dict(role='supplier', queries=3, rows=1,
+                                               path='/api/resource-requests/{request_id}/approve'),
+    ('reject_resource_request', 'POST'): dict(role='supplier', queries=3, rows=1,
+                                              path='/api/resource-requests/{request_id}/reject'),
+    # Создание и удаление заказа (вставка или удаление с позициями, счётчик версий) и та же страница из 4 запросов
+    ('manager_dashboard', 'POST'): dict(role='manager', queries=8, rows=None,
+                                        json=lambda ids: {'customer_name': 'Бюджет', 'total_amount': 2, 'unit_price': 100,
+                                                          'product_id': ids['product_id'], 'delivery_date': '01/15/2025'}),
+    ('manager_dashboard', 'DELETE'): dict(role='manager', queries=10, rows=None,
+                                          json=lambda ids: {'order_id': ids['order_id']}),
+    ('upload_excel', 'POST'): dict(role='supplier', queries=2, rows=1, status=202,
+                                   data=lambda ids: {'file_type': 'resources',
+                                                     'file': (io.BytesIO(b'name,company\n'), 'budget.csv')}),
+    ('get_job', 'GET'): dict(role='supplier', queries=1, rows=1, path='/api/jobs/{job_id}'),
+    ('create_user', 'POST'): dict(role='director', queries=5, rows=1, status=302,
+                                  data={'username': 'budget', 'email': 'budget@example.com', 'password': 'budget',
+                                        'first_name': 'Бюджет', 'last_name': 'Проверка', 'role': 'manager'}),
+    ('reset_user_password', 'POST'): dict(role='director', queries=3, rows=2, status=302,
+                                          path='/account/reset-password/{user_id}'),
+    ('delete_user', 'POST'): dict(role='director', queries=6, rows=2, status=302,
+                                  path='/account/delete-user/{user_id}'),
+    ('change_password', 'POST'): dict(role='director', queries=2, rows=1, status=302,
+                                      data={'current_password': '1234', 'new_password': '1234',
+                                            'confirm_password': '1234'}),
+    ('login', 'POST'): dict(role='director', queries=2, rows=2, status=302,
+                            data={'username': 'director', 'password': '1234'}),
+    ('logout', 'GET'): dict(role='director', queries=0, rows=0, status=302),
+}
+
+# Статические страницы разделов: данные подгружаются из API, сама страница к БД не обращается
+STATIC_PAGES = {
+    'director': ['director_company_settings', 'itp_calculator', 'gvs_calculator'],
+    'supplier': ['supplier_contracts', 'supplier_quality_control', 'supplier_emergency_orders',
+                 'supplier_budget_management', 'supplier_recommendations', 'supplier_reports'],
+    'warehouse': ['warehouse_stock_alerts', 'warehouse_analytics', 'warehouse_supplier_performance',
+                  'warehouse_automated_reordering', 'warehouse_barcode_scanner', 'warehouse_cycle_counting',
+                  'warehouse_expected_deliveries', 'warehouse_quality_inspection', 'warehouse_reports',
+                  'warehouse_zones'],
+    'production': ['production_planning', 'production_equipment_management', 'production_material_requirements',
+                   'production_check_materials', 'production_worker_productivity', 'production_safety_compliance',
+                   'production_reports'],
+    'accountant': ['accountant_invoice_management', 'accountant_payroll_management', 'accountant_tax_management',
+                   'accountant_budget_planning', 'accountant_asset_management', 'accountant_expense_approval',
+                   'accountant_audit_trail', 'accountant_compliance'],
+}
+# Шаблоны этих страниц ссылаются на переменные и маршруты, которых нет, и отвечают 500 (XFAIL в отчёте);
+# после исправления страницу нужно убрать из списка
+BROKEN_PAGES = {
+    'director_company_settings', 'supplier_quality_control', 'supplier_emergency_orders',
+    'supplier_budget_management', 'supplier_recommendations', 'supplier_reports',
+    'warehouse_stock_alerts', 'warehouse_analytics', 'warehouse_supplier_performance',
+    'production_planning', 'production_equipment_management', 'production_material_requirements',
+    'production_check_materials', 'production_worker_productivity', 'production_safety_compliance',
+    'production_reports', 'accountant_invoice_management', 'accountant_payroll_management',
+    'accountant_tax_management', 'accountant_budget_planning', 'accountant_asset_management',
+    'accountant_expense_approval', 'accountant_audit_trail', 'accountant_compliance',
+}
+for _role, _endpoints in STATIC_PAGES.items():
+    for _endpoint in _endpoints:
+        BUDGETS[(_endpoint, 'GET')] = dict(role=_role, queries=0, rows=0, known_broken=_endpoint in BROKEN_PAGES)
+
+ROLE_ACCOUNTS = {
+    'director': ('director', '1234'),
+    'manager': ('a1', '123'),
+    'supplier': ('a2', '123'),
+    'warehouse': ('a3', '123'),
+    'production': ('a4', '123'),
+    'accountant': ('a5', '123'),
+}
+# Объёмы: малый набор и добавка, после которой число запросов не должно измениться
+SMALL_SCALE = 0.1
+GROWTH_SCALE = 0.3
+
+
+class RowCounter:
+    """Строки, полученные из курсоров SQLite (fetchone/fetchmany/fetchall)"""
+    rows = 0
+
+
+class CountingCursor(sqlite3.Cursor):
+    def fetchone(self):
+        row = super().fetchone()
+        if row is not None:
+            RowCounter.rows += 1
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = super().fetchmany(*args, **kwargs)
+        RowCounter.rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        RowCounter.rows += len(rows)
+        return rows
+
+
+class CountingConnection(sqlite3.Connection):
+    def cursor(self, factory=CountingCursor):
+        return super().cursor(factory)
+
+
+def create_budget_app(db_path, metrics_dir):
+    """Приложение с подсчётом строк на соединениях SQLite"""
+    import config
+    from app import create_app
+
+    class BudgetConfig(config.DevelopmentConfig):
+        DEBUG = False
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+        SQLALCHEMY_ENGINE_OPTIONS = {
+            'creator': lambda: sqlite3.connect(db_path, factory=CountingConnection, check_same_thread=False),
+        }
+        SQLALCHEMY_BINDS = {}
+        KPI_CACHE_BACKEND = 'memory'
+        METRICS_DIR = metrics_dir
+        SQL_DIAGNOSTICS = True
+        SQL_STRICT_RENDERING = True
+        EXCEL_IMPORT_MODE = 'queue'
+
+    config.config['query_budget'] = BudgetConfig
+    app = create_app('query_budget')
+    # Трассировки известных 500 (BROKEN_PAGES) не нужны: статус проверяется отдельно
+    app.logger.disabled = True
+    # Медленные запросы и N+1 проверяются здесь по числу запросов; нужна только строгая отрисовка
+    logging.getLogger('sql_diagnostics').setLevel(logging.ERROR)
+    return app
+
+
+def fixtures():
+    """id последних строк для маршрутов с параметрами"""
+    from models import db, Company, ImportJob, Order, Product, Resource, ResourceRequest, User
+
+    def last_id(model):
+        return db.session.query(db.func.max(model.id)).scalar()
+
+    return {
+        'company_id': last_id(Company),
+        'product_id': last_id(Product),
+        'order_id': last_id(Order),
+        'resource_id': last_id(Resource),
+        'request_id': last_id(ResourceRequest),
+        'job_id': last_id(ImportJob),
+        'user_id': last_id(User),
+    }
+
+
+def measure(app, engine, clients, endpoint, method, spec, ids):
+    """Статус, число запросов и строк одного HTTP-запроса и исключение обработчика (или None)"""
+    from flask import got_request_exception, url_for
+    from bench_dashboard_queries import QueryCounter
+
+    if 'path' in spec:
+        path = spec['path'].format(**ids)
+    else:
+        with app.test_request_context():
+            path = url_for(endpoint)
+    kwargs = {}
+    for key in ('json', 'data'):
+        if key in spec:
+            kwargs[key] = spec[key](ids) if callable(spec[key]) else spec[key]
+
+    # Вход печатает отладочные строки (см. login в app.py)
+    with contextlib.redirect_stdout(io.StringIO()):
+        client = clients.get(spec['role'])
+        if client is None:
+            # Хеш пароля проверяется долго: один вход на роль
+            client = clients[spec['role']] = app.test_client()
+            client.post('/login', data=dict(zip(('username', 'password'), ROLE_ACCOUNTS[spec['role']])))
+        app.extensions['kpi_cache'].backend.clear()
+
+        RowCounter.rows = 0
+        errors = []
+        record_error = lambda sender, exception, **extra: errors.append(exception)
+        with got_request_exception.connected_to(record_error, app), QueryCounter(engine) as counter:
+            response = client.open(path, method=method, **kwargs)
+            response.get_data()
+    if endpoint == 'logout':
+        del clients[spec['role']]
+    error = f'{type(errors[0]).__name__}: {errors[0]}' if errors else None
+    return response.status_code, counter.count, RowCounter.rows, error
+
+
+def run_checks(app, engine, report):
+    from models import db
+    from seed_data import seed
+
+    problems, broken = [], []
+    routes = {(rule.endpoint, method) for rule in app.url_map.iter_rules() if rule.endpoint != 'static'
+              for method in rule.methods - {'HEAD', 'OPTIONS'}}
+    for key in sorted(routes - set(BUDGETS)):
+        problems.append(f'{key[1]} {key[0]}: нет бюджета в BUDGETS')
+    for key in sorted(set(BUDGETS) - routes):
+        problems.append(f'{key[1]} {key[0]}: маршрута нет в приложении')
+
+    checks = [(key, spec) for key, spec in BUDGETS.items() if key in routes]
+    quiet = lambda message: None
+
+    measured = {}
+    for size, scale, seed_value in (('small', SMALL_SCALE, 1), ('large', GROWTH_SCALE, 2)):
+        with app.app_context():
+            seed(scale, seed_value, progress=quiet)
+        clients = {}
+        for key, spec in checks:
+            with app.app_context():
+                ids = fixtures()
+            measured.setdefault(key, {})[size] = measure(app, engine, clients, *key, spec, ids)
+        with app.app_context():
+            db.session.remove()
+
+    if report:
+        print(f"{'Маршрут':<46}{'Статус':>7}{'SQL мал.':>9}{'SQL бол.':>9}{'Строк мал.':>11}{'Строк бол.':>11}")
+    for key, spec in checks:
+        (_, small_queries, small_rows, _), (large_status, large_queries, rows, error) = \
+            measured[key]['small'], measured[key]['large']
+        name = f'{key[1]} {key[0]}'
+        if report:
+            print(f'{name:<46}{large_status:>7}{small_queries:>9}{large_queries:>9}{small_rows:>11}{rows:>11}')
+        expected_status = spec.get('status', 200)
+        if spec.get('known_broken'):
+            # Бюджет страницы, которая падает до отрисовки, ничего не говорит
+            if large_status == expected_status:
+                problems.append(f'{name}: страница отвечает {large_status}, уберите её из BROKEN_PAGES')
+            else:
+                broken.append(f'{name}: статус {large_status}, известная ошибка (BROKEN_PAGES)')
+            continue
+        if large_status != expected_status:
+            problems.append(f'{name}: статус {large_status}, ожидался {expected_status}'
+                            + (f' ({error})' if error else ''))
+        if large_queries > spec['queries'] or small_queries > spec['queries']:
+            problems.append(f'{name}: {max(small_queries, large_queries)} SQL-запросов, бюджет {spec["queries"]}')
+        if large_queries != small_queries:
+            problems.append(f'{name}: число запросов растёт с данными ({small_queries} -> {large_queries}), похоже на N+1')
+        if spec.get('rows') is not None and rows > spec['rows']:
+            problems.append(f'{name}: прочитано {rows} строк, бюджет {spec["rows"]}')
+    return len(checks), problems, broken
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--report', action='store_true', help='вывести измеренные значения по всем маршрутам')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_budget_app(os.path.join(tmp, 'budget.db'), os.path.join(tmp, 'metrics'))
+        app.config['UPLOAD_FOLDER'] = os.path.join(tmp, 'uploads')
+        from models import db
+        with app.app_context():
+            db.create_all()
+            engine = db.engine
+        checked, problems, broken = run_checks(app, engine, args.report)
+
+    for page in broken:
+        print(f'XFAIL {page}')
+    for problem in problems:
+        print(f'ОШИБКА {problem}')
+    print(f'Проверено маршрутов: {checked - len(broken)}, известных неисправных (XFAIL): {len(broken)}, '
+          f'нарушений бюджета: {len(problems)}')
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
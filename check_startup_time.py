@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Проверка времени запуска: холодный импорт wsgi (модули приложения и create_app)
+в новом интерпретаторе по python -X importtime.
+Ошибка, если медиана по --runs запускам больше бюджета или при запуске импортируются
+модули из HEAVY_MODULES - они нужны только импорту и выгрузкам Excel и загружаются там лениво.
+Выводятся самые тяжёлые импорты app.py и create_app.
+
+Запуск: python check_startup_time.py [--budget 600] [--runs 3]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+IMPORT_BUDGET_MS = 600
+HEAVY_MODULES = ('pandas', 'numpy', 'openpyxl')
+
+
+def import_times():
+    """[(глубина, собственное время, суммарное время в мкс, модуль)] одного холодного импорта wsgi"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import wsgi'],
+                            cwd=os.path.dirname(os.path.abspath(__file__)),
+                            capture_output=True, text=True, check=True)
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((depth, int(self_us), int(cumulative_us), name.strip()))
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--budget', type=float, default=IMPORT_BUDGET_MS, help='бюджет, мс')
+    parser.add_argument('--runs', type=int, default=3, help='запусков (медиана)')
+    parser.add_argument('--top', type=int, default=10, help='сколько импортов app.py показать')
+    args = parser.parse_args()
+
+    runs = [import_times() for _ in range(args.runs)]
+    totals = [next(cumulative for _, _, cumulative, name in entries if name == 'wsgi') / 1000 for entries in runs]
+    total = statistics.median(totals)
+
+    # Второй уровень последнего запуска: модули, импортируемые app.py и при вызове create_app
+    entries = runs[-1]
+    children = sorted(((cumulative, name) for depth, _, cumulative, name in entries if depth == 2), reverse=True)
+    print('Самые тяжёлые импорты app.py и create_app, мс:')
+    for cumulative, name in children[:args.top]:
+        print(f'  {name:<40}{cumulative / 1000:>8.1f}')
+
+    problems = []
+    heavy = sorted({name for _, _, _, name in entries if name.split('.')[0] in HEAVY_MODULES})
+    if heavy:
+        problems.append(f"при запуске импортируются {', '.join(sorted({name.split('.')[0] for name in heavy}))}")
+    if total > args.budget:
+        problems.append(f'импорт wsgi {total:.0f} мс больше бюджета {args.budget:.0f} мс')
+
+    for problem in problems:
+        print(f'ОШИБКА {problem}')
+    print(f"Импорт wsgi: {total:.0f} мс (медиана {args.runs}: {', '.join(f'{t:.0f}' for t in totals)}), "
+          f'бюджет {args.budget:.0f} мс')
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
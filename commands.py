@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Служебные команды приложения: flask crm <команда>.
+"""
+
+import sqlite3
+import time
+from datetime import date
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+crm = AppGroup('crm', help='Служебные команды CRM')
+
+
+@crm.command('backfill-rollup')
+@click.option('--start', help='первый день периода (YYYY-MM-DD); по умолчанию вся история')
+@click.option('--end', help='последний день периода включительно (YYYY-MM-DD)')
+def backfill_rollup_command(start, end):
+    """Пересчитать дневную сводку финансовых операций"""
+    from finance_rollup import backfill_rollup
+    from periods import custom_period
+
+    period = None
+    if start or end:
+        first_day = date.fromisoformat(start) if start else date.min
+        last_day = date.fromisoformat(end) if end else date.today()
+        period = custom_period(first_day, last_day)
+
+    rows = backfill_rollup(period)
+    click.echo(f'Сводка пересчитана: {rows} строк')
+
+
+@crm.command('replica-heartbeat')
+@click.option('--interval', type=float, default=0, help='секунд между отметками; 0 - одна отметка')
+def replica_heartbeat_command(interval):
+    """Обновить отметку времени на основной БД, по которой измеряется задержка реплики"""
+    from read_replica import stamp_heartbeat
+
+    while True:
+        stamp_heartbeat()
+        if not interval:
+            break
+        time.sleep(interval)
+
+
+@crm.command('replicate-sqlite')
+@click.option('--interval', type=float, default=0, help='секунд между копиями; 0 - одна копия')
+def replicate_sqlite_command(interval):
+    """Скопировать основную SQLite-базу в файл реплики (локальная проверка чтения с реплики)"""
+    from models import db
+    from read_replica import stamp_heartbeat
+
+    bind = current_app.config.get('REPLICA_BIND', 'replica')
+    engines = db.engines
+    if bind not in engines:
+        raise click.ClickException('Реплика не настроена: задайте REPLICA_DATABASE_URL')
+    if engines[None].dialect.name != 'sqlite' or engines[bind].dialect.name != 'sqlite':
+        raise click.ClickException('Копирование поддерживается только для SQLite')
+
+    while True:
+        # Отметка попадает в копию: задержка реплики - время с начала последнего копирования
+        beat = stamp_heartbeat()
+        source = sqlite3.connect(engines[None].url.database)
+        target = sqlite3.connect(engines[bind].url.database, timeout=30)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+        click.echo(f'Реплика обновлена: {beat:%H:%M:%S}')
+        if not interval:
+            break
+        time.sleep(interval)
+
+
+@crm.command('seed')
+@click.option('--scale', type=float, default=1, show_default=True,
+              help='множитель объёмов seed_data.VOLUMES (50 - порядка продакшена)')
+@click.option('--seed', 'seed_value', type=int, default=42, show_default=True, help='начальное значение генератора')
+@click.option('--anchor', help='последний день истории (YYYY-MM-DD); по умолчанию сегодня')
+@click.option('--reset', is_flag=True, help='предварительно очистить базу')
+def seed_command(scale, seed_value, anchor, reset):
+    """Заполнить базу синтетическими данными для нагрузочных проверок"""
+    from seed_data import reset_database, seed
+
+    if reset:
+        reset_database()
+    started = time.perf_counter()
+    counts = seed(scale, seed_value, date.fromisoformat(anchor) if anchor else None, progress=click.echo)
+    _clear_shared_cache()
+    click.echo(f'Добавлено строк: {sum(counts.values())} за {time.perf_counter() - started:.0f} с')
+
+
+@crm.command('reset')
+@click.option('--empty', is_flag=True, help='не создавать роли и учётные записи по умолчанию')
+@click.confirmation_option(prompt='Удалить все данные?')
+def reset_command(empty):
+    """Удалить все данные, сохранив схему; создать роли и учётные записи из setup_data.py"""
+    from seed_data import reset_database
+
+    reset_database(accounts=not empty)
+    _clear_shared_cache()
+    click.echo('База очищена' + ('' if empty else ': director / 1234, a1..a5 / 123'))
+
+
+def _clear_shared_cache():
+    # Снимки KPI и версии принципалов в общем кэше относятся к прежним данным
+    cache = current_app.extensions.get('kpi_cache')
+    if cache is not None:
+        cache.backend.clear()
+
+
+def init_commands(app):
+    app.cli.add_command(crm)
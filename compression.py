@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Сжатие ответов на уровне WSGI (gzip, brotli - если установлен пакет brotli).
+- Кодировка выбирается по Accept-Encoding с учётом q; brotli предпочтительнее при равном q.
+- Сжимаются только типы из COMPRESS_MIMETYPES; ответы с известной длиной меньше
+  COMPRESS_MIN_SIZE, уже сжатые (Content-Encoding), 206, HEAD и Cache-Control: no-transform - нет.
+- Ответ с Content-Length сжимается целиком и получает новую длину; потоковый ответ
+  (stream_query, без Content-Length) сжимается по фрагментам со сбросом после каждого,
+  чтобы клиент получал данные сразу, а память не росла с размером выгрузки.
+- Сильный ETag становится слабым (W/"..."): байты сжатого ответа отличаются от несжатого.
+  ETag из conditional_get.py слабые изначально, поэтому у 200 и 304 (он не сжимается) они совпадают.
+"""
+
+import zlib
+
+from werkzeug.datastructures import Headers
+from werkzeug.http import parse_accept_header, parse_options_header
+
+try:
+    import brotli
+except ImportError:  # только gzip
+    brotli = None
+
+DEFAULT_MIMETYPES = (
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'text/xml', 'text/javascript',
+    'application/javascript', 'application/json', 'application/x-ndjson', 'application/xml',
+    'image/svg+xml',
+)
+
+
+class _GzipEncoder:
+    def __init__(self, level):
+        # wbits=31 - формат gzip (заголовок и CRC), а не голый deflate
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliEncoder:
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class CompressionMiddleware:
+    """WSGI-обёртка, сжимающая ответы приложения"""
+
+    def __init__(self, wsgi_app, min_size=500, level=6, brotli_quality=4, mimetypes=DEFAULT_MIMETYPES):
+        self.wsgi_app = wsgi_app
+        self.min_size = min_size
+        self.level = level
+        self.brotli_quality = brotli_quality
+        self.mimetypes = frozenset(mimetypes)
+        self.encodings = ['br', 'gzip'] if brotli is not None else ['gzip']
+
+    def encoder(self, encoding):
+        if encoding == 'br':
+            return _BrotliEncoder(self.brotli_quality)
+        return _GzipEncoder(self.level)
+
+    def negotiate(self, environ):
+        """Кодировка для запроса или None"""
+        if environ.get('REQUEST_METHOD') == 'HEAD':
+            return None
+        accept = parse_accept_header(environ.get('HTTP_ACCEPT_ENCODING'))
+        return accept.best_match(self.encodings)
+
+    def compressible(self, headers):
+        """Тип ответа из списка; для таких ответов выставляется Vary: Accept-Encoding"""
+        mimetype, _ = parse_options_header(headers.get('Content-Type', ''))
+        return mimetype in self.mimetypes
+
+    def should_compress(self, status, headers):
+        if int(status.split(' ', 1)[0]) in (204, 206, 304) or 'Content-Encoding' in headers:
+            return False
+        if 'no-transform' in headers.get('Cache-Control', ''):
+            return False
+        length = headers.get('Content-Length', type=int)
+        return length is None or length >= self.min_size
+
+    def __call__(self, environ, start_response):
+        captured = {}
+        written = []
+
+        def capture(status, headers, exc_info=None):
+            captured['args'] = (status, Headers(headers), exc_info)
+            return written.append
+
+        app_iter = self.wsgi_app(environ, capture)
+        status, headers, exc_info = captured['args']
+        if not self.compressible(headers):
+            start_response(status, headers.to_wsgi_list(), exc_info)
+            return _prepend(written, app_iter)
+
+        # Кэши между клиентом и сервером хранят сжатый и несжатый варианты отдельно
+        headers['Vary'] = _add_vary(headers.get('Vary', ''))
+        encoding = self.negotiate(environ)
+        if encoding is None or not self.should_compress(status, headers):
+            start_response(status, headers.to_wsgi_list(), exc_info)
+            return _prepend(written, app_iter)
+
+        headers['Content-Encoding'] = encoding
+        headers.remove('Accept-Ranges')  # диапазоны относились бы к несжатым байтам
+        etag = headers.get('ETag')
+        if etag and not etag.startswith('W/'):
+            headers['ETag'] = 'W/' + etag
+
+        encoder = self.encoder(encoding)
+        if 'Content-Length' in headers:
+            try:
+                body = b''.join(encoder.compress(chunk) for chunk in _prepend(written, app_iter))
+            finally:
+                if hasattr(app_iter, 'close'):
+                    app_iter.close()
+            body += encoder.finish()
+            headers['Content-Length'] = str(len(body))
+            start_response(status, headers.to_wsgi_list(), exc_info)
+            return [body]
+
+        start_response(status, headers.to_wsgi_list(), exc_info)
+        return _StreamingBody(_prepend(written, app_iter), app_iter, encoder)
+
+
+class _StreamingBody:
+    """Сжатие потокового ответа по фрагментам; close() передаётся исходному итератору"""
+
+    def __init__(self, chunks, app_iter, encoder):
+        self._chunks = chunks
+        self._app_iter = app_iter
+        self._encoder = encoder
+
+    def __iter__(self):
+        for chunk in self._chunks:
+            if chunk:
+                yield self._encoder.compress(chunk) + self._encoder.flush()
+        yield self._encoder.finish()
+
+    def close(self):
+        if hasattr(self._app_iter, 'close'):
+            self._app_iter.close()
+
+
+def _prepend(written, app_iter):
+    # Данные, переданные через write() из start_response (PEP 3333), идут перед телом
+    if not written:
+        return app_iter
+    return _chain(written, app_iter)
+
+
+def _chain(written, app_iter):
+    yield from written
+    yield from app_iter
+
+
+def _add_vary(value):
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    if not any(field.lower() == 'accept-encoding' or field == '*' for field in fields):
+        fields.append('Accept-Encoding')
+    return ', '.join(fields)
+
+
+def init_compression(app):
+    """Оборачивает app.wsgi_app, если COMPRESS_ENABLED; возвращает middleware или None"""
+    if not app.config.get('COMPRESS_ENABLED', True):
+        return None
+    middleware = CompressionMiddleware(
+        app.wsgi_app,
+        min_size=app.config.get('COMPRESS_MIN_SIZE', 500),
+        level=app.config.get('COMPRESS_LEVEL', 6),
+        brotli_quality=app.config.get('COMPRESS_BROTLI_QUALITY', 4),
+        mimetypes=app.config.get('COMPRESS_MIMETYPES') or DEFAULT_MIMETYPES,
+    )
+    app.wsgi_app = middleware
+    return middleware
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Условные GET (If-None-Match -> 304 Not Modified).
+- Страницы без данных: ETag из исходников шаблона и его родителей (extends/include),
+  вычисляется один раз на версию шаблонов, и ролей пользователя (меню base.html). При совпадении
+  шаблон не отрисовывается. Страница с flash-сообщениями отдаётся без ETag.
+- Списки API: ETag из счётчиков изменений таблиц (table_version) и URL запроса; счётчик
+  увеличивается в транзакции каждой INSERT/UPDATE/DELETE (в том числе пакетных вставок импорта),
+  поэтому при неизменных данных ответ 304 отдаётся после одного запроса по первичному ключу,
+  без выборки и сериализации.
+Cache-Control: private, no-cache - браузер хранит ответ, но перед использованием проверяет ETag.
+ETag всегда слабый (W/"..."): он описывает данные, а не байты, и у ответа 200 (сжатого или нет,
+compression.py) и у 304 для одного представления один и тот же валидатор.
+"""
+
+import hashlib
+from functools import wraps
+
+from flask import current_app, make_response, render_template, request, session
+from jinja2 import meta
+from sqlalchemy import event
+
+from models import db, TableVersion, VERSIONED_TABLES
+
+CACHE_CONTROL = 'private, no-cache'
+
+
+def _template_family(env, name, seen=None):
+    """Шаблон и все шаблоны, на которые он ссылается статически"""
+    seen = seen if seen is not None else []
+    if name in seen:
+        return seen
+    seen.append(name)
+    source, _, _ = env.loader.get_source(env, name)
+    for referenced in meta.find_referenced_templates(env.parse(source)):
+        if referenced is not None:  # имя из переменной неизвестно заранее
+            _template_family(env, referenced, seen)
+    return seen
+
+
+def template_digest(name):
+    """Хеш исходников шаблона и его родителей; пересчитывается только после изменения файлов"""
+    env = current_app.jinja_env
+    digests = current_app.extensions.setdefault('template_digests', {})
+    entry = digests.get(name)
+    if entry is not None and all(template.is_up_to_date for template in entry[1]):
+        return entry[0]
+
+    digest = hashlib.sha1()
+    templates = []
+    for template_name in _template_family(env, name):
+        source, _, _ = env.loader.get_source(env, template_name)
+        digest.update(source.encode('utf-8'))
+        templates.append(env.get_template(template_name))
+    digests[name] = (digest.hexdigest(), templates)
+    return digests[name][0]
+
+
+def not_modified(etag):
+    """304 с тем же ETag, если он есть в If-None-Match запроса"""
+    # Слабое сравнение (RFC 9110): клиент может прислать ETag и с W/, и без
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    response = current_app.response_class(status=304)
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = CACHE_CONTROL
+    return response
+
+
+def _with_etag(response, etag):
+    response = make_response(response)
+    if response.status_code == 200:
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = CACHE_CONTROL
+    return response
+
+
+def render_static_page(template_name):
+    """render_template для страницы без данных с проверкой If-None-Match до отрисовки"""
+    from flask_login import current_user
+
+    if session.get('_flashes'):
+        return render_template(template_name)
+    # Principal хранит имена ролей, User (PRINCIPAL_CACHE=0) - объекты Role
+    roles = ','.join(sorted(getattr(role, 'name', role) for role in current_user.roles)) \
+        if current_user.is_authenticated else ''
+    # После сборки статики страница ссылается на другие имена файлов с хешем
+    manifest = current_app.extensions.get('static_manifest')
+    assets = manifest.version if manifest is not None else ''
+    etag = hashlib.sha1(f'{template_digest(template_name)}|{roles}|{assets}|{request.script_root}'.encode()).hexdigest()
+    return not_modified(etag) or _with_etag(render_template(template_name), etag)
+
+
+def table_versions(*names):
+    """Счётчики изменений таблиц или None, если какого-то счётчика нет"""
+    rows = dict(db.session.query(TableVersion.name, TableVersion.version).filter(TableVersion.name.in_(names)))
+    if len(rows) != len(names):
+        return None
+    return [rows[name] for name in names]
+
+
+def versioned(*models):
+    """Список API с ETag по счётчикам изменений таблиц models (данные ответа только из них)"""
+    names = [model.__tablename__ for model in models]
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            versions = table_versions(*names)
+            if versions is None:
+                return view(*args, **kwargs)
+            # Фильтры, курсор страницы и формат (stream / Accept) входят в ETag
+            key = f"{versions}|{request.full_path}|{request.headers.get('Accept', '')}"
+            etag = hashlib.sha1(key.encode()).hexdigest()
+            return not_modified(etag) or _with_etag(view(*args, **kwargs), etag)
+        return wrapper
+    return decorator
+
+
+def _bump_versions(connection, clauseelement, multiparams, params, execution_options, result):
+    # INSERT/UPDATE/DELETE ORM и Core; text() сюда не относится (см. reset_database в seed_data.py)
+    if not getattr(clauseelement, 'is_dml', False):
+        return
+    name = clauseelement.table.name
+    if name in VERSIONED_TABLES:
+        table = TableVersion.__table__
+        connection.execute(table.update().where(table.c.name == name).values(version=table.c.version + 1))
+
+
+def init_conditional_get(app):
+    """Счётчики изменений обновляются при каждой записи в основную БД приложения"""
+    with app.app_context():
+        engine = db.engine
+    if not event.contains(engine, 'after_execute', _bump_versions):
+        event.listen(engine, 'after_execute', _bump_versions)
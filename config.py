@@ -1,10 +1,17 @@
 import os
 
+# Профили PRAGMA и параметры пула живут вне файлов конфигурации: config_server.py,
+# скопированный поверх config.py, импортирует их так же
+from db_pool import pool_options
+from sqlite_profile import SQLITE_PROFILES, sqlite_profile
+
+
 class Config:
     """Базовая конфигурация"""
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'your-secret-key-change-this-in-production'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///crm.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLITE_PRAGMAS = sqlite_profile('performance')  # только для sqlite:// URI
     
     # Настройки для продакшена
     DEBUG = False
@@ -13,6 +20,57 @@ class Config:
     # Настройки для загрузки файлов
     UPLOAD_FOLDER = 'uploads'
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
+    # 'queue' - импорт Excel выполняет import_worker.py, 'inline' - сразу в запросе
+    EXCEL_IMPORT_MODE = os.environ.get('EXCEL_IMPORT_MODE') or 'queue'
+    # 'streaming' - openpyxl read_only / csv пачками, 'pandas' - pd.read_excel целиком
+    EXCEL_IMPORT_READER = os.environ.get('EXCEL_IMPORT_READER') or 'streaming'
+    IMPORT_CHUNK_SIZE = 1000  # строк между фиксациями транзакции
+    # Задача без продления аренды дольше IMPORT_JOB_TIMEOUT секунд считается брошенной:
+    # возвращается в очередь, после IMPORT_MAX_ATTEMPTS попыток - завершается с ошибкой
+    IMPORT_JOB_TIMEOUT = int(os.environ.get('IMPORT_JOB_TIMEOUT', 600))
+    IMPORT_MAX_ATTEMPTS = 2
+    
+    # Кэш снимков KPI: 'memory' (в процессе) или 'sqlite' (общий для воркеров)
+    KPI_CACHE_BACKEND = os.environ.get('KPI_CACHE_BACKEND') or 'memory'
+    KPI_CACHE_PATH = os.environ.get('KPI_CACHE_PATH')  # по умолчанию instance/kpi_cache.db
+    KPI_CACHE_TTL = 60  # секунд
+    KPI_CACHE_SIZE = 128
+    
+    # Кэш принципалов (пользователь и роли) для load_user и role_required без запросов к БД;
+    # версии пользователей хранятся в бэкенде кэша KPI
+    PRINCIPAL_CACHE = os.environ.get('PRINCIPAL_CACHE', '1') != '0'
+    PRINCIPAL_CACHE_SIZE = 1024
+    
+    # Метрики запросов для /metrics; каждый воркер пишет свой файл в METRICS_DIR
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') != '0'
+    METRICS_DIR = os.environ.get('METRICS_DIR')  # по умолчанию instance/metrics
+    METRICS_FLUSH_INTERVAL = 1.0  # секунд
+    # /metrics без входа с 127.0.0.1 и ::1; включать, только если на этом адресе нет чужих процессов
+    METRICS_ALLOW_LOCAL = os.environ.get('METRICS_ALLOW_LOCAL') == '1'
+    
+    # Диагностика SQL: медленные запросы и N+1 в лог sql_diagnostics (включать при отладке)
+    SQL_DIAGNOSTICS = os.environ.get('SQL_DIAGNOSTICS') == '1'
+    SLOW_QUERY_MS = int(os.environ.get('SLOW_QUERY_MS', 100))
+    N_PLUS_ONE_THRESHOLD = 5  # одинаковых запросов за один HTTP-запрос
+    SQL_STRICT_RENDERING = False  # ошибка при ленивой загрузке связи во время отрисовки шаблона
+    
+    # Реплика для чтения (read_replica.py): страницы с @read_replica и GET /api/*;
+    # локально - копия SQLite-файла, которую обновляет flask crm replicate-sqlite
+    SQLALCHEMY_BINDS = {'replica': os.environ['REPLICA_DATABASE_URL']} if os.environ.get('REPLICA_DATABASE_URL') else {}
+    REPLICA_BIND = 'replica'
+    REPLICA_MAX_LAG = int(os.environ.get('REPLICA_MAX_LAG', 30))  # секунд; при большей задержке - основная БД
+    REPLICA_STICKY_SECONDS = 10  # после записи пользователь читает с основной БД
+    REPLICA_LAG_CHECK_INTERVAL = 1.0  # секунд между проверками задержки в воркере
+    # Статика с хешем в имени и сжатыми вариантами из static/dist (python build_assets.py)
+    STATIC_FINGERPRINT = os.environ.get('STATIC_FINGERPRINT', '1') != '0'
+    # Сжатие HTML и JSON в приложении; COMPRESS_ENABLED=0, если сжимает nginx
+    COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED', '1') != '0'
+    COMPRESS_MIN_SIZE = 500  # байт; меньшие ответы не сжимаются
+    COMPRESS_LEVEL = 6  # gzip 1-9 (python bench_compression.py)
+    COMPRESS_BROTLI_QUALITY = 4  # brotli 0-11, если установлен пакет brotli
+    # Байткод шаблонов Jinja (по умолчанию instance/jinja_cache)
+    TEMPLATE_BYTECODE_CACHE = os.environ.get('TEMPLATE_BYTECODE_CACHE', '1') != '0'
+    TEMPLATE_CACHE_DIR = os.environ.get('TEMPLATE_CACHE_DIR')
     
     # Настройки безопасности
     SESSION_COOKIE_SECURE = True  # Только для HTTPS
@@ -23,6 +81,8 @@ class DevelopmentConfig(Config):
     """Конфигурация для разработки"""
     DEBUG = True
     SESSION_COOKIE_SECURE = False  # Для HTTP в разработке
+    EXCEL_IMPORT_MODE = os.environ.get('EXCEL_IMPORT_MODE') or 'inline'
+    STATIC_FINGERPRINT = False  # изменения static видны без пересборки
 
 class ProductionConfig(Config):
     """Конфигурация для продакшена"""
@@ -31,11 +91,24 @@ class ProductionConfig(Config):
     
     # Для продакшена используется MySQL
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///crm.db'
+    SQLALCHEMY_ENGINE_OPTIONS = pool_options(SQLALCHEMY_DATABASE_URI)
+    
+    # Несколько воркеров gunicorn делят один кэш
+    KPI_CACHE_BACKEND = os.environ.get('KPI_CACHE_BACKEND') or 'sqlite'
 
 class TestingConfig(Config):
     """Конфигурация для тестирования"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLITE_PRAGMAS = sqlite_profile('testing')
+    SQLALCHEMY_BINDS = {}
+    KPI_CACHE_BACKEND = 'memory'
+    EXCEL_IMPORT_MODE = 'inline'
+    METRICS_ENABLED = False
+    SQL_DIAGNOSTICS = True
+    SQL_STRICT_RENDERING = True
+    STATIC_FINGERPRINT = False
+    TEMPLATE_BYTECODE_CACHE = False
 
 # Словарь конфигураций
 config = {
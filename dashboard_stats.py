@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Агрегированная статистика для дашбордов.
+Все счётчики по статусам получаются одним запросом GROUP BY (для нескольких таблиц -
+одним UNION ALL таких запросов), а доходы и расходы - одним запросом с условной агрегацией.
+Периоды задаются полуинтервалом created_at >= start AND created_at < end (см. periods.py).
+"""
+
+from models import (db, FinancialTransaction, Order, ProductionTask, ResourceRequest,
+                    Resource, InventoryItem)
+from periods import current_period
+
+
+class StatusCounts:
+    """Количество записей по статусам с доступом через атрибуты"""
+
+    def __init__(self, counts):
+        self._counts = dict(counts)
+
+    def __getattr__(self, name):
+        # Статусы без записей не попадают в GROUP BY - для них возвращаем 0
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return self._counts.get(name, 0)
+
+    def __getitem__(self, status):
+        return self._counts.get(status, 0)
+
+    @property
+    def total(self):
+        return sum(self._counts.values())
+
+    def as_dict(self):
+        return dict(self._counts)
+
+    def __repr__(self):
+        return f'<StatusCounts {self._counts}>'
+
+
+def count_by_status(model, column=None, *criteria):
+    """Количество записей модели по каждому статусу одним запросом"""
+    if column is None:
+        column = model.status
+
+    rows = (db.session.query(column, db.func.count(model.id))
+            .filter(*criteria)
+            .group_by(column)
+            .all())
+    return StatusCounts(rows)
+
+
+def counts_by_status(*models):
+    """Количество записей по статусам для нескольких моделей одним запросом UNION ALL;
+    возвращает StatusCounts в порядке моделей"""
+    selects = [db.select(db.literal(index), model.status, db.func.count(model.id)).group_by(model.status)
+               for index, model in enumerate(models)]
+    counts = [{} for _ in models]
+    for index, status, count in db.session.execute(db.union_all(*selects)):
+        counts[index][status] = count
+    return [StatusCounts(model_counts) for model_counts in counts]
+
+
+def income_expense_totals(*criteria):
+    """Суммы доходов и расходов одним запросом с условной агрегацией"""
+    amount = FinancialTransaction.amount
+    transaction_type = FinancialTransaction.transaction_type
+
+    income, expense = (db.session.query(
+            db.func.sum(db.case((transaction_type == 'income', amount), else_=0)),
+            db.func.sum(db.case((transaction_type == 'expense', amount), else_=0)))
+        .filter(transaction_type.in_(('income', 'expense')), *criteria)
+        .one())
+    return income or 0, expense or 0
+
+
+def period_summary(period):
+    """Доходы, расходы, баланс и число операций за период одним запросом"""
+    amount = FinancialTransaction.amount
+    transaction_type = FinancialTransaction.transaction_type
+
+    income, expense, operations = (db.session.query(
+            db.func.sum(db.case((transaction_type == 'income', amount), else_=0)),
+            db.func.sum(db.case((transaction_type == 'expense', amount), else_=0)),
+            db.func.count(FinancialTransaction.id))
+        .filter(transaction_type.in_(('income', 'expense')),
+                *period.filter(FinancialTransaction.created_at))
+        .one())
+    income, expense = income or 0, expense or 0
+    return {
+        'income': income,
+        'expense': expense,
+        'balance': income - expense,
+        'total_operations': operations or 0,
+    }
+
+
+def monthly_income_expense(period):
+    """Доходы и расходы по месяцам периода одним запросом GROUP BY.
+
+    Фильтр - диапазон по created_at (индекс), функции от даты используются только
+    в группировке уже отобранных строк. Месяцы без операций заполняются нулями.
+    """
+    amount = FinancialTransaction.amount
+    transaction_type = FinancialTransaction.transaction_type
+    year = db.extract('year', FinancialTransaction.created_at)
+    month = db.extract('month', FinancialTransaction.created_at)
+
+    rows = (db.session.query(
+            year, month,
+            db.func.sum(db.case((transaction_type == 'income', amount), else_=0)),
+            db.func.sum(db.case((transaction_type == 'expense', amount), else_=0)))
+        .filter(transaction_type.in_(('income', 'expense')),
+                *period.filter(FinancialTransaction.created_at))
+        .group_by(year, month)
+        .all())
+    totals = {(int(y), int(m)): (income or 0, expense or 0) for y, m, income, expense in rows}
+
+    months = []
+    for start in period.months():
+        income, expense = totals.get((start.year, start.month), (0, 0))
+        months.append({'month': start, 'income': income, 'expense': expense})
+    return months
+
+
+def inventory_totals():
+    """Складские показатели одним запросом"""
+    total_items, low_stock, out_of_stock, total_value = db.session.query(
+        db.func.count(InventoryItem.id),
+        db.func.sum(db.case((InventoryItem.quantity < InventoryItem.min_stock, 1), else_=0)),
+        db.func.sum(db.case((InventoryItem.quantity == 0, 1), else_=0)),
+        db.func.sum(InventoryItem.quantity * InventoryItem.price_per_unit)
+    ).one()
+    return {
+        'total_items': total_items or 0,
+        'low_stock_items': low_stock or 0,
+        'out_of_stock_items': out_of_stock or 0,
+        'total_value': total_value or 0,
+    }
+
+
+# Снимки KPI для кэша: только числа и словари, чтобы их можно было сериализовать в JSON
+
+def director_snapshot():
+    income, expense = income_expense_totals()
+    orders, tasks, requests = counts_by_status(Order, ProductionTask, ResourceRequest)
+    return {
+        'income': income,
+        'expense': expense,
+        'orders_by_status': orders.as_dict(),
+        'tasks_by_status': tasks.as_dict(),
+        'requests_by_status': requests.as_dict(),
+    }
+
+
+def manager_snapshot():
+    return {'orders_by_status': count_by_status(Order).as_dict()}
+
+
+def supplier_snapshot():
+    return {
+        'requests_by_status': count_by_status(ResourceRequest).as_dict(),
+        'total_resources': db.session.query(db.func.count(Resource.id)).scalar() or 0,
+    }
+
+
+def warehouse_snapshot():
+    return inventory_totals()
+
+
+def production_snapshot():
+    return {'tasks_by_status': count_by_status(ProductionTask).as_dict()}
+
+
+def accountant_snapshot():
+    total_income, total_expense = income_expense_totals()
+    monthly_income, monthly_expense = income_expense_totals(
+        *current_period('month').filter(FinancialTransaction.created_at))
+    return {
+        'total_income': total_income,
+        'total_expense': total_expense,
+        'monthly_income': monthly_income,
+        'monthly_expense': monthly_expense,
+    }
+
+
+# Ключ снимка -> (функция расчёта, модели, изменение которых сбрасывает снимок)
+KPI_SNAPSHOTS = {
+    'director': (director_snapshot, (FinancialTransaction, Order, ProductionTask, ResourceRequest)),
+    'manager': (manager_snapshot, (Order,)),
+    'supplier': (supplier_snapshot, (ResourceRequest, Resource)),
+    'warehouse': (warehouse_snapshot, (InventoryItem,)),
+    'production': (production_snapshot, (ProductionTask,)),
+    'accountant': (accountant_snapshot, (FinancialTransaction,)),
+}
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Пул соединений с БД: статистика использования и сброс после fork.
+С preload_app = True приложение и движки создаются в мастере gunicorn; воркеры не должны
+пользоваться унаследованными сокетами (PyMySQL), поэтому post_fork вызывает reset_pools(),
+который заменяет пулы новыми, не закрывая соединения мастера.
+Параметры пула задаются SQLALCHEMY_ENGINE_OPTIONS (pool_options, общий для config.py и config_server.py);
+профили воркеров gunicorn.conf.py задают размер пула по числу потоков воркера (DB_POOL_SIZE).
+"""
+
+import os
+import threading
+import time
+import weakref
+
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+from models import db
+
+# Приложения, движки которых сбрасываются после fork
+_apps = weakref.WeakSet()
+
+# Драйверы, не блокирующие воркер gevent: PyMySQL написан на Python и ждёт на пропатченных сокетах;
+# SQLite - локальный файл без сетевого ожидания. mysqlclient и psycopg2 ждут сервер в C и блокируют
+# все greenlet воркера
+GEVENT_DRIVERS = {'pymysql', 'pysqlite'}
+
+
+def pool_options(uri):
+    """SQLALCHEMY_ENGINE_OPTIONS пула соединений; значения переопределяются переменными DB_POOL_*"""
+    options = {
+        # Синхронный воркер gunicorn обрабатывает один запрос: 2 постоянных соединения + запас;
+        # профили gthread и gevent в gunicorn.conf.py задают DB_POOL_SIZE по числу потоков
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 2)),
+        'max_overflow': int(os.environ.get('DB_POOL_OVERFLOW', 3)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),     # секунд ожидания свободного соединения
+        # Меньше wait_timeout MySQL (на хостингах часто 300 с), чтобы не брать закрытое сервером соединение
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 280)),
+        'pool_pre_ping': True,  # проверка соединения перед выдачей из пула
+    }
+    if uri.startswith('mysql'):
+        options['connect_args'] = {
+            'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', 5)),
+            'read_timeout': int(os.environ.get('DB_READ_TIMEOUT', 30)),
+            'write_timeout': int(os.environ.get('DB_WRITE_TIMEOUT', 30)),
+        }
+    return options
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool со счётчиками выдачи соединений и времени ожидания свободного соединения"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+
+    def _do_get(self):
+        # Время включает установку нового соединения, если пул ещё не заполнен
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with self._stats_lock:
+                self.checkouts += 1
+                self.wait_seconds += waited
+                self.max_wait_seconds = max(self.max_wait_seconds, waited)
+                self.timeouts += timed_out
+
+
+def init_db_pool(app):
+    """Вызывается до db.init_app: пул с pool_size получает счётчики ожидания"""
+    options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {}
+    if 'pool_size' in options and 'poolclass' not in options:
+        # Копия: словарь опций - атрибут класса конфигурации
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = dict(options, poolclass=TimedQueuePool)
+    _apps.add(app)
+
+
+def reset_pools():
+    """Новые пулы для всех движков после fork; соединения родителя не закрываются"""
+    for app in list(_apps):
+        with app.app_context():
+            for engine in db.engines.values():
+                engine.dispose(close=False)
+
+
+def blocking_drivers():
+    """Драйверы зарегистрированных движков, которые блокируют воркер gevent"""
+    drivers = set()
+    for app in list(_apps):
+        with app.app_context():
+            drivers.update(engine.dialect.driver for engine in db.engines.values())
+    return drivers - GEVENT_DRIVERS
+
+
+def pool_stats(app):
+    """Состояние пулов текущего процесса по каждому bind"""
+    stats = {}
+    with app.app_context():
+        for bind, engine in db.engines.items():
+            pool = engine.pool
+            entry = {'pool': type(pool).__name__}
+            if isinstance(pool, QueuePool):
+                entry.update({
+                    'size': pool.size(),
+                    'checked_in': pool.checkedin(),
+                    'checked_out': pool.checkedout(),
+                    'overflow': max(pool.overflow(), 0),
+                })
+            if isinstance(pool, TimedQueuePool):
+                with pool._stats_lock:
+                    entry.update({
+                        'checkouts': pool.checkouts,
+                        'timeouts': pool.timeouts,
+                        'wait_seconds_total': round(pool.wait_seconds, 6),
+                        'wait_seconds_max': round(pool.max_wait_seconds, 6),
+                    })
+            stats[bind or 'default'] = entry
+    return stats
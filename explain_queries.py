@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Проверка планов запросов дашбордов и API-списков.
+Открывает каждый маршрут от имени пользователя с нужной ролью, записывает все
+выполненные SELECT и прогоняет их через EXPLAIN (SQLite: EXPLAIN QUERY PLAN, MySQL: EXPLAIN).
+Завершается с кодом 1, если какой-либо запрос с условием WHERE читает таблицу целиком
+или сортирует/группирует без индекса.
+
+Запуск:
+    python explain_queries.py                 # БД из конфигурации (DATABASE_URL / FLASK_ENV)
+    python explain_queries.py --sample        # временная SQLite с тестовыми пользователями
+"""
+
+import argparse
+import re
+import sys
+
+from sqlalchemy import event
+
+from app import create_app
+from models import db, User, Role
+
+# Роль -> маршруты, запросы которых проверяются
+ROUTES = {
+    'director': ['/director', '/account', '/api/resources', '/api/resources?company_id=1',
+                 '/api/resource-requests?status=pending', '/api/companies'],
+    'manager': ['/manager', '/api/orders?status=pending'],
+    'supplier': ['/supplier', '/api/resources?after_id=1&resource_type=material'],
+    'warehouse': ['/warehouse'],
+    'production': ['/production'],
+    'accountant': ['/accountant', '/accountant/cash-flow', '/accountant/financial-analysis?period=quarter',
+                   '/api/financial-transactions?transaction_type=income', '/api/finance/timeseries?granularity=week'],
+}
+
+# Запросы, которым полный просмотр или сортировка разрешены осознанно:
+# регулярное выражение по тексту SQL -> причина
+ALLOWED_PLANS = {
+    r'GROUP BY .*financial_transaction\.created_at':
+        'помесячная группировка строк, уже отобранных диапазоном created_at по индексу',
+}
+
+WHERE = re.compile(r'\bWHERE\b', re.IGNORECASE)
+
+
+def capture_selects(engine, client, path):
+    """SELECT-запросы, выполненные при открытии маршрута"""
+    statements = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', on_execute)
+    try:
+        response = client.get(path)
+    finally:
+        event.remove(engine, 'before_cursor_execute', on_execute)
+    return response.status_code, statements
+
+
+def sqlite_problems(conn, statement, parameters):
+    plan = conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).fetchall()
+    details = [row[-1] for row in plan]
+    problems = []
+    for detail in details:
+        if detail.startswith('SCAN ') and 'INDEX' not in detail and WHERE.search(statement):
+            problems.append(f'полный просмотр: {detail}')
+        if detail.startswith('USE TEMP B-TREE FOR'):
+            problems.append(f'сортировка без индекса: {detail}')
+    return details, problems
+
+
+def mysql_problems(conn, statement, parameters):
+    plan = conn.exec_driver_sql('EXPLAIN ' + statement, parameters).mappings().all()
+    details = [f"{row['table']}: type={row['type']} key={row['key']} extra={row['Extra']}" for row in plan]
+    problems = []
+    for row in plan:
+        extra = row['Extra'] or ''
+        if row['type'] == 'ALL' and WHERE.search(statement):
+            problems.append(f"полный просмотр: {row['table']}")
+        if 'Using filesort' in extra or 'Using temporary' in extra:
+            problems.append(f"сортировка без индекса: {row['table']} ({extra})")
+    return details, problems
+
+
+def explain(conn, statement, parameters):
+    dialect = conn.dialect.name
+    if dialect == 'sqlite':
+        return sqlite_problems(conn, statement, parameters)
+    if dialect == 'mysql':
+        return mysql_problems(conn, statement, parameters)
+    raise SystemExit(f'EXPLAIN для {dialect} не поддерживается')
+
+
+def create_sample_users():
+    """Пользователь на каждую роль для временной БД"""
+    db.create_all()
+    for name in ROUTES:
+        role = Role(name=name)
+        user = User(username=name, email=f'{name}@explain.local', first_name=name, last_name='explain')
+        user.set_password('explain')
+        user.roles.append(role)
+        db.session.add(user)
+    db.session.commit()
+
+
+def user_with_role(role_name):
+    return User.query.join(User.roles).filter(Role.name == role_name).first()
+
+
+def normalize(statement):
+    return ' '.join(statement.split())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--config', help='имя конфигурации (по умолчанию FLASK_ENV)')
+    parser.add_argument('--sample', action='store_true', help='временная SQLite в памяти с тестовыми пользователями')
+    parser.add_argument('--verbose', action='store_true', help='печатать планы всех запросов')
+    args = parser.parse_args()
+
+    app = create_app('testing' if args.sample else args.config)
+    app.config['SESSION_COOKIE_SECURE'] = False
+
+    with app.app_context():
+        if args.sample:
+            create_sample_users()
+        engine = db.engine
+        user_ids = {role_name: getattr(user_with_role(role_name), 'id', None) for role_name in ROUTES}
+
+    # Запросы выполняются вне общего контекста приложения, иначе current_user
+    # закэшируется в g и все маршруты откроются от имени первого пользователя
+    failures = 0
+    checked = set()
+    for role_name, paths in ROUTES.items():
+        if user_ids[role_name] is None:
+            print(f"[пропуск] нет пользователя с ролью {role_name}")
+            continue
+
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(user_ids[role_name])
+            session['_fresh'] = True
+
+        for path in paths:
+            status, statements = capture_selects(engine, client, path)
+            print(f"{path} [{status}]: {len(statements)} запросов")
+            for statement, parameters in statements:
+                key = normalize(statement)
+                if key in checked:
+                    continue
+                checked.add(key)
+
+                with engine.connect() as conn:
+                    details, problems = explain(conn, statement, parameters)
+                if problems and any(re.search(pattern, key) for pattern in ALLOWED_PLANS):
+                    problems = []
+                if problems:
+                    failures += 1
+                    print(f"  ОШИБКА: {key}")
+                    for problem in problems:
+                        print(f"    - {problem}")
+                elif args.verbose:
+                    print(f"  ok: {key}")
+                    for detail in details:
+                        print(f"    {detail}")
+
+    print(f"\nПроверено запросов: {len(checked)}, с проблемами: {failures}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
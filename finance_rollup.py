@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Дневная сводка финансовых операций (таблица financial_daily_rollup).
+Каждая вставка, изменение или удаление FinancialTransaction через ORM сразу
+прибавляет разницу к строке (день, тип, категория) в той же транзакции БД,
+поэтому аналитика читает сотни строк сводки вместо всей таблицы операций.
+Массовые операции в обход ORM (bulk_insert_mappings, query.delete) событий
+не вызывают - после них сводку нужно пересчитать: flask crm backfill-rollup.
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+from sqlalchemy.orm.attributes import get_history
+
+from models import db, FinancialTransaction, FinancialDailyRollup
+
+GRANULARITIES = ('day', 'week', 'month')
+
+# Период по умолчанию для каждой детализации
+DEFAULT_PERIODS = {'day': 'month', 'week': 'quarter', 'month': 'year'}
+
+# Наибольшее число интервалов в ответе: около 3 лет по дням, 10 лет по неделям, 50 лет по месяцам
+MAX_BUCKETS = {'day': 1100, 'week': 530, 'month': 600}
+
+KEY_COLUMNS = ('day', 'transaction_type', 'category')
+
+# Колонки операции, изменение которых переносит сумму между строками сводки
+UPDATE_COLUMNS = ('created_at', 'transaction_type', 'category', 'amount')
+
+
+def _key(created_at, transaction_type, category):
+    return (created_at or datetime.utcnow()).date(), transaction_type, category or ''
+
+
+def _upsert(connection, key, amount, count):
+    """Прибавить amount и count к строке сводки, создав её при отсутствии"""
+    table = FinancialDailyRollup.__table__
+    values = dict(zip(KEY_COLUMNS, key), total_amount=amount, transaction_count=count)
+    dialect = connection.dialect.name
+
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        statement = insert(table).values(**values)
+        statement = statement.on_conflict_do_update(
+            index_elements=list(KEY_COLUMNS),
+            set_={'total_amount': table.c.total_amount + statement.excluded.total_amount,
+                  'transaction_count': table.c.transaction_count + statement.excluded.transaction_count})
+        connection.execute(statement)
+    elif dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert
+        statement = insert(table).values(**values)
+        statement = statement.on_duplicate_key_update(
+            total_amount=table.c.total_amount + statement.inserted.total_amount,
+            transaction_count=table.c.transaction_count + statement.inserted.transaction_count)
+        connection.execute(statement)
+    else:
+        condition = db.and_(*(table.c[name] == value for name, value in zip(KEY_COLUMNS, key)))
+        updated = connection.execute(table.update().where(condition).values(
+            total_amount=table.c.total_amount + amount,
+            transaction_count=table.c.transaction_count + count))
+        if not updated.rowcount:
+            connection.execute(table.insert().values(**values))
+
+    if count < 0:
+        # Строки, в которых не осталось операций, удаляются
+        condition = db.and_(*(table.c[name] == value for name, value in zip(KEY_COLUMNS, key)))
+        connection.execute(table.delete().where(condition, table.c.transaction_count <= 0))
+
+
+def _previous(target, name):
+    history = get_history(target, name)
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(target, name)
+
+
+def _after_insert(mapper, connection, target):
+    _upsert(connection, _key(target.created_at, target.transaction_type, target.category), target.amount or 0, 1)
+
+
+def _after_delete(mapper, connection, target):
+    _upsert(connection, _key(target.created_at, target.transaction_type, target.category), -(target.amount or 0), -1)
+
+
+def _after_update(mapper, connection, target):
+    if not any(get_history(target, name).has_changes() for name in UPDATE_COLUMNS):
+        return
+    old_created_at, old_type, old_category, old_amount = (_previous(target, name) for name in UPDATE_COLUMNS)
+    _upsert(connection, _key(old_created_at, old_type, old_category), -(old_amount or 0), -1)
+    _upsert(connection, _key(target.created_at, target.transaction_type, target.category), target.amount or 0, 1)
+
+
+def _keep_old_value(target, value, oldvalue, initiator):
+    pass
+
+
+def register_rollup_events():
+    """Подписать сводку на изменения FinancialTransaction (повторный вызов ничего не делает)"""
+    for name, handler in (('after_insert', _after_insert), ('after_delete', _after_delete),
+                          ('after_update', _after_update)):
+        if not event.contains(FinancialTransaction, name, handler):
+            event.listen(FinancialTransaction, name, handler)
+
+    # active_history: после commit атрибуты сброшены, и без этого при присваивании
+    # старое значение не загружается - вычесть его из прежней строки сводки было бы нечем
+    for name in UPDATE_COLUMNS:
+        attribute = getattr(FinancialTransaction, name)
+        if not event.contains(attribute, 'set', _keep_old_value):
+            event.listen(attribute, 'set', _keep_old_value, active_history=True)
+
+
+def backfill_rollup(period=None):
+    """Пересчитать сводку из таблицы операций целиком или за период; возвращает число строк сводки"""
+    rollup = FinancialDailyRollup.__table__
+    day = db.func.date(FinancialTransaction.created_at)
+    category = db.func.coalesce(FinancialTransaction.category, '')
+
+    source = (db.select(day, FinancialTransaction.transaction_type, category,
+                        db.func.sum(FinancialTransaction.amount), db.func.count(FinancialTransaction.id))
+              .where(FinancialTransaction.created_at.isnot(None))
+              .group_by(day, FinancialTransaction.transaction_type, category))
+    delete = rollup.delete()
+    if period is not None:
+        source = source.where(*period.filter(FinancialTransaction.created_at))
+        delete = delete.where(rollup.c.day >= period.start.date(), rollup.c.day < period.end.date())
+
+    db.session.execute(delete)
+    db.session.execute(rollup.insert().from_select(
+        list(KEY_COLUMNS) + ['total_amount', 'transaction_count'], source))
+    db.session.commit()
+
+    query = db.session.query(db.func.count(FinancialDailyRollup.id))
+    if period is not None:
+        query = query.filter(FinancialDailyRollup.day >= period.start.date(),
+                             FinancialDailyRollup.day < period.end.date())
+    return query.scalar()
+
+
+def bucket_start(day, granularity):
+    """Первый день интервала детализации, в который попадает day"""
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def _next_bucket(start, granularity):
+    if granularity == 'week':
+        return start + timedelta(days=7)
+    if granularity == 'month':
+        return (start + timedelta(days=32)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def bucket_count(period, granularity):
+    """Число интервалов детализации в периоде (без их перебора)"""
+    first_day, end_day = period.start.date(), period.end.date()
+    if end_day <= first_day:
+        return 0
+    if granularity == 'week':
+        return -(-(end_day - bucket_start(first_day, 'week')).days // 7)
+    if granularity == 'month':
+        return ((end_day.year - first_day.year) * 12 + end_day.month - first_day.month
+                + (1 if end_day.day > 1 else 0))
+    return (end_day - first_day).days
+
+
+def timeseries(period, granularity='day', transaction_type=None, category=None):
+    """Доходы, расходы и число операций по дням, неделям или месяцам периода из сводки"""
+    if granularity not in GRANULARITIES:
+        raise ValueError(f'Неизвестная детализация: {granularity}')
+    if bucket_count(period, granularity) > MAX_BUCKETS[granularity]:
+        raise ValueError(f'Период длиннее {MAX_BUCKETS[granularity]} интервалов ({granularity})')
+
+    first_day, end_day = period.start.date(), period.end.date()
+    query = (db.session.query(FinancialDailyRollup.day, FinancialDailyRollup.transaction_type,
+                              db.func.sum(FinancialDailyRollup.total_amount),
+                              db.func.sum(FinancialDailyRollup.transaction_count))
+             .filter(FinancialDailyRollup.day >= first_day, FinancialDailyRollup.day < end_day))
+    if transaction_type:
+        query = query.filter(FinancialDailyRollup.transaction_type == transaction_type)
+    if category is not None:
+        query = query.filter(FinancialDailyRollup.category == category)
+    rows = query.group_by(FinancialDailyRollup.day, FinancialDailyRollup.transaction_type).all()
+
+    # Все интервалы периода, включая пустые, чтобы ряд был непрерывным
+    buckets = {}
+    start = bucket_start(first_day, granularity)
+    while start < end_day:
+        buckets[start] = {'period': start.isoformat(), 'income': 0, 'expense': 0, 'count': 0}
+        start = _next_bucket(start, granularity)
+
+    for day, row_type, amount, count in rows:
+        bucket = buckets[bucket_start(day, granularity)]
+        if row_type in ('income', 'expense'):
+            bucket[row_type] += amount or 0
+        bucket['count'] += count or 0
+
+    series = list(buckets.values())
+    for bucket in series:
+        bucket['balance'] = bucket['income'] - bucket['expense']
+    return series
@@ -1,9 +1,93 @@
+import os
+
+# Профили воркеров, выбираются GUNICORN_WORKER_CLASS (по умолчанию sync).
+# Пул БД воркера рассчитан на его одновременные запросы; соединений с MySQL во всех профилях
+# одинаково: workers * (db_pool_size + db_pool_overflow) = 20
+WORKER_PROFILES = {
+    # Процесс на запрос: медленная загрузка Excel или запрос к MySQL занимает воркер целиком
+    'sync': {'workers': 4, 'threads': 1, 'db_pool_size': 2, 'db_pool_overflow': 3},
+    # Потоки в воркере: пока один ждёт БД или диск (GIL отпущен), остальные отвечают.
+    # Соединение на поток (db_pool_size=None - по числу потоков), чтобы потоки не ждали пул
+    'gthread': {'workers': 2, 'threads': 8, 'db_pool_size': None, 'db_pool_overflow': 2},
+    # Greenlet на соединение клиента; запросов больше, чем соединений с БД, - лишние ждут в очереди
+    # пула (pool_timeout). Нужны gevent и PyMySQL: его сокеты после monkey.patch_all() кооперативные
+    'gevent': {'workers': 2, 'threads': 1, 'worker_connections': 100, 'db_pool_size': 8, 'db_pool_overflow': 2},
+}
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+_profile = WORKER_PROFILES[worker_class]
+
+if worker_class == 'gevent':
+    # До загрузки приложения в мастере (preload_app): threading.local кэшей, блокировки пула
+    # и сокеты PyMySQL создаются уже кооперативными
+    from gevent import monkey
+    monkey.patch_all()
+
 bind = "0.0.0.0:8000"
-workers = 4
-worker_class = "sync"
-worker_connections = 1000
+workers = int(os.environ.get('GUNICORN_WORKERS', _profile['workers']))
+threads = int(os.environ.get('GUNICORN_THREADS', _profile['threads']))
+worker_connections = _profile.get('worker_connections', 1000)
 timeout = 30
 keepalive = 2
 max_requests = 1000
 max_requests_jitter = 100
-preload_app = True
\ No newline at end of file
+preload_app = True
+
+# Читаются pool_options (db_pool.py) при загрузке приложения; явные DB_POOL_* важнее профиля
+os.environ.setdefault('DB_POOL_SIZE', str(_profile['db_pool_size'] or threads))
+os.environ.setdefault('DB_POOL_OVERFLOW', str(_profile['db_pool_overflow']))
+
+
+def _metrics_dir():
+    from request_metrics import default_metrics_dir
+
+    return os.environ.get('METRICS_DIR') or default_metrics_dir(os.path.dirname(os.path.abspath(__file__)))
+
+
+def on_starting(server):
+    # Метрики прошлого запуска (файлы воркеров и архив) не должны суммироваться с новыми воркерами
+    import glob
+
+    for path in glob.glob(os.path.join(_metrics_dir(), 'metrics_*.json')):
+        os.remove(path)
+
+
+def when_ready(server):
+    # Шаблоны компилируются в мастере один раз, воркеры получают их при fork
+    # (TEMPLATE_WARMUP=0 отключает; без preload_app каждый воркер компилирует при первом запросе)
+    if server.cfg.preload_app and os.environ.get('TEMPLATE_WARMUP', '1') != '0':
+        from template_cache import warm_templates
+
+        compiled, seconds, errors = warm_templates(server.app.wsgi())
+        server.log.info('Шаблонов скомпилировано: %d за %.2f с', compiled, seconds)
+        for name, exc in errors.items():
+            server.log.warning('Шаблон %s не компилируется: %s', name, exc)
+
+    if worker_class == 'gevent':
+        from db_pool import blocking_drivers
+
+        drivers = blocking_drivers()
+        if drivers:
+            server.log.warning('Драйверы %s блокируют воркер gevent целиком, нужен mysql+pymysql://',
+                               ', '.join(sorted(drivers)))
+
+
+def post_fork(server, worker):
+    # С preload_app движки созданы в мастере: воркер открывает свои соединения,
+    # а унаследованные сокеты остаются мастеру
+    from db_pool import reset_pools
+    reset_pools()
+
+
+def worker_exit(server, worker):
+    # Последние метрики воркера (после его сброса не прошёл METRICS_FLUSH_INTERVAL) попадают в файл
+    app = getattr(worker, 'wsgi', None)
+    metrics = getattr(app, 'extensions', {}).get('metrics')
+    if metrics is not None:
+        metrics.flush(force=True)
+
+
+def child_exit(server, worker):
+    # Файл завершённого воркера прибавляется к архиву и удаляется, как mark_process_dead в prometheus_client
+    from request_metrics import mark_process_dead
+    mark_process_dead(_metrics_dir(), worker.pid)
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Очередь фоновых задач импорта файлов.
+Задачи хранятся в таблице import_job; /upload-excel только ставит задачу в очередь,
+а обработчик (import_worker.py) забирает их по одной внутри одного контекста приложения.
+Взятая задача арендуется: обработчик обновляет heartbeat_at после каждой пачки, а задачу,
+аренда которой истекла (IMPORT_JOB_TIMEOUT), следующий claim_next_job возвращает в очередь
+(до IMPORT_MAX_ATTEMPTS попыток) или завершает с ошибкой. Повторный импорт пропускает уже
+добавленные строки как дубликаты.
+Все записи обработчика о задаче - условные UPDATE по токену аренды (locked_by) и неистёкшему
+heartbeat_at: обработчик, у которого аренду забрали, прерывает импорт и не трогает ни статус, ни файл.
+"""
+
+import json
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from models import db, ImportJob, Company, Resource, Product
+
+MAX_STORED_ERRORS = 100
+JOB_TIMEOUT = 600  # секунд без heartbeat_at, после которых обработчик считается умершим
+MAX_ATTEMPTS = 2
+
+
+class LeaseLost(Exception):
+    """Аренда задачи истекла или перешла к другому обработчику"""
+
+
+def enqueue_import(job_type, file_path, original_filename=None, created_by=None):
+    """Поставить файл в очередь на импорт"""
+    job = ImportJob(
+        job_type=job_type,
+        file_path=os.path.abspath(file_path),
+        original_filename=original_filename,
+        status='queued',
+        created_by=created_by
+    )
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def expire_stale_jobs():
+    """Задачи 'running' с истёкшей арендой: вернуть в очередь или, после MAX_ATTEMPTS попыток, завершить.
+    Причина записывается в error_message; возвращает число обработанных задач"""
+    timeout = current_app.config.get('IMPORT_JOB_TIMEOUT', JOB_TIMEOUT)
+    max_attempts = current_app.config.get('IMPORT_MAX_ATTEMPTS', MAX_ATTEMPTS)
+    now = datetime.utcnow()
+    last_seen = db.func.coalesce(ImportJob.heartbeat_at, ImportJob.started_at)
+    expired = db.and_(ImportJob.status == 'running', last_seen < now - timedelta(seconds=timeout))
+
+    count = 0
+    for job in ImportJob.query.filter(expired).all():
+        message = (f'Обработчик не отвечал с {(job.heartbeat_at or job.started_at):%Y-%m-%d %H:%M:%S} UTC '
+                   f'(попытка {job.attempts or 1} из {max_attempts})')
+        if (job.attempts or 1) < max_attempts:
+            values = {'status': 'queued', 'locked_by': None,
+                      'error_message': f'{message}; задача возвращена в очередь'}
+        else:
+            values = {'status': 'failed', 'locked_by': None, 'finished_at': now,
+                      'error_message': f'{message}; задача остановлена'}
+        # Условный UPDATE: аренду могли продлить или задачу уже вернул другой обработчик
+        updated = (ImportJob.query.filter(ImportJob.id == job.id, expired)
+                   .update(values, synchronize_session=False))
+        db.session.commit()
+        if updated and values['status'] == 'failed' and os.path.exists(job.file_path):
+            os.remove(job.file_path)
+        count += updated
+    return count
+
+
+def _lease_token():
+    # Хост и pid - чтобы по задаче было видно, какой обработчик её держит
+    return f'{socket.gethostname()[:40]}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+
+def _claim(job_id, token):
+    """Арендовать задачу из очереди; True, если её получил этот обработчик"""
+    now = datetime.utcnow()
+    # Условный UPDATE: задачу получит только тот, кто первым сменит статус
+    claimed = (ImportJob.query
+               .filter_by(id=job_id, status='queued')
+               .update({'status': 'running', 'locked_by': token, 'started_at': now, 'heartbeat_at': now,
+                        'attempts': db.func.coalesce(ImportJob.attempts, 0) + 1},
+                       synchronize_session=False))
+    db.session.commit()
+    return bool(claimed)
+
+
+def _update_leased(job_id, token, values):
+    """UPDATE задачи, пока аренда принадлежит token и не истекла; иначе LeaseLost"""
+    timeout = current_app.config.get('IMPORT_JOB_TIMEOUT', JOB_TIMEOUT)
+    updated = (ImportJob.query
+               .filter(ImportJob.id == job_id, ImportJob.status == 'running', ImportJob.locked_by == token,
+                       ImportJob.heartbeat_at > datetime.utcnow() - timedelta(seconds=timeout))
+               .update(values, synchronize_session=False))
+    db.session.commit()
+    if not updated:
+        raise LeaseLost(f'Импорт #{job_id}: аренда истекла или перешла к другому обработчику')
+
+
+def claim_next_job():
+    """Забрать самую старую задачу из очереди; безопасно при нескольких обработчиках"""
+    expire_stale_jobs()
+    token = _lease_token()
+    while True:
+        job = ImportJob.query.filter_by(status='queued').order_by(ImportJob.id).first()
+        if job is None:
+            return None
+        if _claim(job.id, token):
+            db.session.refresh(job)
+            return job
+
+
+def read_table(file_path, chunk_size):
+    """Файл импорта: пачки строк при потоковом чтении или DataFrame целиком (EXCEL_IMPORT_READER = 'pandas')"""
+    from table_reader import iter_table_chunks, estimate_rows
+
+    if current_app.config.get('EXCEL_IMPORT_READER', 'streaming') == 'pandas' and not file_path.endswith('.csv'):
+        import pandas as pd
+        df = pd.read_excel(file_path)
+        return df, len(df)
+    return iter_table_chunks(file_path, chunk_size), estimate_rows(file_path)
+
+
+def run_job(job):
+    """Выполнить задачу импорта с обновлением прогресса (и аренды) после каждой пачки.
+    Если аренду забрали, импорт прерывается: статус и файл остаются новому владельцу"""
+    from bulk_import import IMPORTERS
+
+    job_id, job_type, file_path = job.id, job.job_type, job.file_path
+    token = job.locked_by if job.status == 'running' else None
+    if token is None:
+        # Без claim_next_job (EXCEL_IMPORT_MODE = 'inline') задача арендуется здесь
+        token = _lease_token()
+        if not _claim(job_id, token):
+            return job
+
+    def progress(report):
+        _update_leased(job_id, token, {
+            'processed_rows': report.inserted + report.skipped + report.failed_count,
+            'inserted_rows': report.inserted,
+            'skipped_rows': report.skipped,
+            'failed_rows': report.failed_count,
+            'heartbeat_at': datetime.utcnow(),
+        })
+
+    try:
+        try:
+            if job_type not in IMPORTERS:
+                raise ValueError(f'Неизвестный тип импорта: {job_type}')
+
+            chunk_size = current_app.config.get('IMPORT_CHUNK_SIZE', 1000)
+            data, total_rows = read_table(file_path, chunk_size)
+            _update_leased(job_id, token, {'total_rows': total_rows, 'heartbeat_at': datetime.utcnow()})
+
+            report = IMPORTERS[job_type](data, chunk_size=chunk_size, progress=progress)
+            progress(report)
+            result = {'status': 'done', 'errors': json.dumps(report.failed[:MAX_STORED_ERRORS], ensure_ascii=False)}
+        except LeaseLost:
+            raise
+        except Exception as e:
+            db.session.rollback()
+            result = {'status': 'failed', 'error_message': str(e)}
+
+        _update_leased(job_id, token, dict(result, finished_at=datetime.utcnow(), locked_by=None))
+        # Файл удаляется только после того, как итог записан владельцем аренды
+        if os.path.exists(file_path):
+            os.remove(file_path)
+    except LeaseLost as e:
+        db.session.rollback()
+        current_app.logger.warning('%s; импорт прерван', e)
+
+    kpi_cache = current_app.extensions.get('kpi_cache')
+    if kpi_cache is not None:
+        kpi_cache.invalidate_for(Company, Resource, Product)
+    return job
+
+
+def run_worker(poll_interval=2.0, once=False, should_stop=lambda: False):
+    """Цикл обработчика: выполнять задачи, пока очередь не опустеет или не придёт сигнал остановки"""
+    while not should_stop():
+        job = claim_next_job()
+        if job is None:
+            if once:
+                return
+            # Снимок сессии не должен держать старые данные между опросами
+            db.session.remove()
+            time.sleep(poll_interval)
+            continue
+
+        print(f"Импорт #{job.id} ({job.job_type}): {job.original_filename or job.file_path}")
+        run_job(job)
+        if job.status == 'running':  # аренду забрал другой обработчик
+            continue
+        print(f"Импорт #{job.id} завершён со статусом {job.status}: "
+              f"добавлено {job.inserted_rows}, пропущено {job.skipped_rows}, с ошибками {job.failed_rows}")
+
+
+def job_to_dict(job):
+    return {
+        'id': job.id,
+        'job_type': job.job_type,
+        'status': job.status,
+        'file_name': job.original_filename,
+        'total_rows': job.total_rows,
+        'processed_rows': job.processed_rows or 0,
+        'inserted': job.inserted_rows or 0,
+        'skipped': job.skipped_rows or 0,
+        'failed': job.failed_rows or 0,
+        'errors': json.loads(job.errors) if job.errors else [],
+        'error_message': job.error_message,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        'heartbeat_at': job.heartbeat_at.isoformat() if job.heartbeat_at else None,
+        'attempts': job.attempts or 0,
+    }
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Обработчик фоновых задач импорта Excel.
+Создаёт приложение один раз и выполняет задачи из таблицы import_job в одном контексте.
+
+Запуск: python import_worker.py [--once] [--poll 2]
+"""
+
+import argparse
+import signal
+
+from app import create_app
+from import_jobs import run_worker
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Обработчик очереди импорта')
+    parser.add_argument('--once', action='store_true', help='обработать очередь и завершиться')
+    parser.add_argument('--poll', type=float, default=2.0, help='интервал опроса очереди, секунд')
+    args = parser.parse_args()
+
+    stop = {'requested': False}
+
+    def request_stop(signum, frame):
+        # Текущая задача доводится до конца, новые не берутся
+        stop['requested'] = True
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    app = create_app()
+    with app.app_context():
+        print("Обработчик импорта запущен")
+        run_worker(poll_interval=args.poll, once=args.once, should_stop=lambda: stop['requested'])
+        print("Обработчик импорта остановлен")
+
+
+if __name__ == '__main__':
+    main()
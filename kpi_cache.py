@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Кэш снимков KPI для дашбордов.
+Бэкенды: in-process LRU с TTL (memory) и общий для всех воркеров gunicorn
+файл SQLite (sqlite). Записи через API сбрасывают ключи, зависящие от изменённых моделей.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+MISSING = object()
+
+
+class MemoryBackend:
+    """LRU-кэш в памяти процесса с ограничением размера и TTL"""
+
+    name = 'memory'
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return MISSING
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._data[key]
+                return MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (time.time() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class SQLiteBackend:
+    """Кэш в файле SQLite, общий для всех процессов на одном сервере"""
+
+    name = 'sqlite'
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connect().execute(
+            'CREATE TABLE IF NOT EXISTS kpi_cache ('
+            'key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)'
+        )
+
+    def _connect(self):
+        # Соединение на поток; после fork воркер открывает своё
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        row = self._connect().execute(
+            'SELECT value, expires_at FROM kpi_cache WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None or row[1] < time.time():
+            return MISSING
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl):
+        self._connect().execute(
+            'INSERT OR REPLACE INTO kpi_cache (key, value, expires_at) VALUES (?, ?, ?)',
+            (key, json.dumps(value), time.time() + ttl)
+        )
+
+    def delete(self, *keys):
+        if keys:
+            self._connect().executemany('DELETE FROM kpi_cache WHERE key = ?', [(k,) for k in keys])
+
+    def clear(self):
+        self._connect().execute('DELETE FROM kpi_cache')
+
+
+class KPICache:
+    """Снимки KPI с инвалидацией по моделям и счётчиками попаданий"""
+
+    def __init__(self, backend, ttl=60):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._dependencies = {}
+        self._lock = threading.Lock()
+
+    def register(self, key, *models):
+        """Указать модели, от которых зависит снимок key"""
+        self._dependencies[key] = {model.__tablename__ for model in models}
+
+    def get_or_compute(self, key, compute, ttl=None):
+        value = self.backend.get(key)
+        if value is not MISSING:
+            with self._lock:
+                self.hits += 1
+            return value
+
+        with self._lock:
+            self.misses += 1
+        value = compute()
+        self.backend.set(key, value, ttl or self.ttl)
+        return value
+
+    def invalidate(self, *keys):
+        self.backend.delete(*keys)
+
+    def invalidate_for(self, *models):
+        """Сбросить все снимки, зависящие от переданных моделей"""
+        tables = {model.__tablename__ for model in models}
+        keys = [key for key, deps in self._dependencies.items() if deps & tables]
+        self.invalidate(*keys)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'backend': self.backend.name,
+            'pid': os.getpid(),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+def init_kpi_cache(app):
+    """Создание кэша KPI по настройкам приложения"""
+    backend_name = app.config.get('KPI_CACHE_BACKEND', 'memory')
+    if backend_name == 'sqlite':
+        path = app.config.get('KPI_CACHE_PATH') or os.path.join(app.instance_path, 'kpi_cache.db')
+        backend = SQLiteBackend(path)
+    elif backend_name == 'memory':
+        backend = MemoryBackend(app.config.get('KPI_CACHE_SIZE', 128))
+    else:
+        raise ValueError(f'Неизвестный бэкенд кэша KPI: {backend_name}')
+
+    cache = KPICache(backend, ttl=app.config.get('KPI_CACHE_TTL', 60))
+    app.extensions['kpi_cache'] = cache
+    return cache
@@ -1,148 +1,111 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import pandas as pd
-from app import create_app
+from contextlib import nullcontext
+from flask import has_app_context
 from models import db, Company, Resource, ResourceRequest, Product, InventoryItem
 from datetime import datetime
 import os
 
+def _app_context():
+    """Контекст вызывающего приложения (setup_data.py) или новое приложение при запуске из консоли"""
+    if has_app_context():
+        return nullcontext()
+    from app import create_app
+    return create_app().app_context()
+
 def load_companies_from_excel(file_path):
     """Загрузка компаний-поставщиков из Excel файла"""
-    app = create_app()
-    
-    with app.app_context():
+    with _app_context():
         try:
+            # pandas нужен только для чтения файлов, create_sample_data обходится без него
+            import pandas as pd
+            from bulk_import import import_companies
+
             # Читаем Excel файл
             df = pd.read_excel(file_path)
             
             print(f"Загружаем компании из файла: {file_path}")
             print(f"Найдено записей: {len(df)}")
             
-            for index, row in df.iterrows():
-                # Создаем компанию
-                company = Company(
-                    name=row.get('company_name', f'Компания {index + 1}'),
-                    address=row.get('address', ''),
-                    phone=row.get('phone', ''),
-                    email=row.get('email', '')
-                )
-                
-                # Проверяем, не существует ли уже такая компания
-                existing = Company.query.filter_by(name=company.name).first()
-                if not existing:
-                    db.session.add(company)
-                    print(f"Добавлена компания: {company.name}")
-                else:
-                    print(f"Компания {company.name} уже существует")
-            
-            db.session.commit()
-            print("Компании успешно загружены!")
+            report = import_companies(df)
+            print(f"Компании загружены: добавлено {report.inserted}, пропущено {report.skipped}, "
+                  f"с ошибками {report.failed_count}")
+            return report
             
         except Exception as e:
             print(f"Ошибка при загрузке компаний: {e}")
             db.session.rollback()
+            raise
 
 def load_resources_from_excel(file_path):
     """Загрузка ресурсов из Excel файла"""
-    app = create_app()
-    
-    with app.app_context():
+    with _app_context():
         try:
+            import pandas as pd
+            from bulk_import import import_resources
+
             # Читаем Excel файл
             df = pd.read_excel(file_path)
             
             print(f"Загружаем ресурсы из файла: {file_path}")
             print(f"Найдено записей: {len(df)}")
             
-            for index, row in df.iterrows():
-                # Находим компанию по имени
-                company_name = row.get('company_name', '')
-                company = Company.query.filter_by(name=company_name).first()
-                
-                if not company:
-                    # Создаем компанию если её нет
-                    company = Company(
-                        name=company_name,
-                        address=row.get('company_address', ''),
-                        phone=row.get('company_phone', ''),
-                        email=row.get('company_email', '')
-                    )
-                    db.session.add(company)
-                    db.session.flush()  # Получаем ID
-                
-                # Создаем ресурс
-                resource = Resource(
-                    name=row.get('resource_name', f'Ресурс {index + 1}'),
-                    resource_type=row.get('resource_type', 'material'),
-                    quantity=row.get('quantity', 0),
-                    unit=row.get('unit', 'шт'),
-                    cost_per_unit=row.get('cost_per_unit', 0.0),
-                    company_id=company.id
-                )
-                
-                # Проверяем, не существует ли уже такой ресурс
-                existing = Resource.query.filter_by(
-                    name=resource.name, 
-                    company_id=company.id
-                ).first()
-                
-                if not existing:
-                    db.session.add(resource)
-                    print(f"Добавлен ресурс: {resource.name} от {company.name}")
-                else:
-                    print(f"Ресурс {resource.name} от {company.name} уже существует")
-            
-            db.session.commit()
-            print("Ресурсы успешно загружены!")
+            report = import_resources(df)
+            print(f"Ресурсы загружены: добавлено {report.inserted}, пропущено {report.skipped}, "
+                  f"с ошибками {report.failed_count}")
+            return report
             
         except Exception as e:
             print(f"Ошибка при загрузке ресурсов: {e}")
             db.session.rollback()
+            raise
 
 def load_products_from_excel(file_path):
     """Загрузка продуктов из Excel файла"""
-    app = create_app()
-    
-    with app.app_context():
+    with _app_context():
         try:
+            import pandas as pd
+            from bulk_import import import_products
+
             # Читаем Excel файл
             df = pd.read_excel(file_path)
             
             print(f"Загружаем продукты из файла: {file_path}")
             print(f"Найдено записей: {len(df)}")
             
-            for index, row in df.iterrows():
-                # Создаем продукт
-                product = Product(
-                    name=row.get('product_name', f'Продукт {index + 1}'),
-                    description=row.get('description', ''),
-                    price=row.get('price', 0.0),
-                    category=row.get('category', 'general'),
-                    stock_quantity=row.get('stock_quantity', 0),
-                    min_stock_level=row.get('min_stock_level', 10)
-                )
-                
-                # Проверяем, не существует ли уже такой продукт
-                existing = Product.query.filter_by(name=product.name).first()
-                if not existing:
-                    db.session.add(product)
-                    print(f"Добавлен продукт: {product.name}")
-                else:
-                    print(f"Продукт {product.name} уже существует")
-            
-            db.session.commit()
-            print("Продукты успешно загружены!")
+            report = import_products(df)
+            print(f"Продукты загружены: добавлено {report.inserted}, пропущено {report.skipped}, "
+                  f"с ошибками {report.failed_count}")
+            return report
             
         except Exception as e:
             print(f"Ошибка при загрузке продуктов: {e}")
             db.session.rollback()
+            raise
+
+def load_from_file(file_path, file_type, chunk_size=1000):
+    """Потоковая загрузка .xlsx/.csv пачками с фиксацией каждые chunk_size строк"""
+    with _app_context():
+        try:
+            from bulk_import import IMPORTERS
+            from table_reader import iter_table_chunks
+
+            print(f"Потоковая загрузка ({file_type}) из файла: {file_path}")
+            
+            report = IMPORTERS[file_type](iter_table_chunks(file_path, chunk_size), chunk_size=chunk_size)
+            print(f"Загрузка завершена: добавлено {report.inserted}, пропущено {report.skipped}, "
+                  f"с ошибками {report.failed_count}")
+            return report
+            
+        except Exception as e:
+            print(f"Ошибка при загрузке файла: {e}")
+            db.session.rollback()
+            raise
 
 def create_sample_data():
     """Создание примеров данных для демонстрации"""
-    app = create_app()
-    
-    with app.app_context():
+    with _app_context():
         try:
             print("Создаем примеры данных...")
             
@@ -249,22 +212,31 @@ def main():
     """Главная функция для загрузки данных"""
     print("=== Загрузка данных в CRM Тепло Ресурс ===\n")
     
-    # Создаем примеры данных
-    create_sample_data()
-    
-    # Если есть Excel файлы, загружаем их
-    excel_files = {
-        'companies.xlsx': load_companies_from_excel,
-        'resources.xlsx': load_resources_from_excel,
-        'products.xlsx': load_products_from_excel
-    }
-    
-    for filename, load_function in excel_files.items():
-        if os.path.exists(filename):
-            print(f"\nНайден файл: {filename}")
-            load_function(filename)
-        else:
-            print(f"Файл {filename} не найден, пропускаем...")
+    # Одно приложение на все загрузки
+    with _app_context():
+        # Создаем примеры данных
+        create_sample_data()
+        
+        # Если есть Excel файлы, загружаем их
+        excel_files = {
+            'companies.xlsx': load_companies_from_excel,
+            'resources.xlsx': load_resources_from_excel,
+            'products.xlsx': load_products_from_excel
+        }
+        
+        for filename, load_function in excel_files.items():
+            if os.path.exists(filename):
+                print(f"\nНайден файл: {filename}")
+                load_function(filename)
+            else:
+                print(f"Файл {filename} не найден, пропускаем...")
+        
+        # CSV файлы загружаются потоково
+        for file_type in ('companies', 'resources', 'products'):
+            filename = f'{file_type}.csv'
+            if os.path.exists(filename):
+                print(f"\nНайден файл: {filename}")
+                load_from_file(filename, file_type)
     
     print("\n=== Загрузка завершена ===")
 
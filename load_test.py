@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Нагрузочный прогон по сценариям ролей.
+Каждый виртуальный пользователь входит под учётной записью своей роли из setup_data.py
+(director, a1..a5) и повторяет сценарий роли: дашборды, списки API, CRUD ресурсов,
+создание заказов менеджером, загрузка Excel поставщиком. Итог - пропускная способность
+и p50/p95/p99 по каждому маршруту; результат сохраняется в JSON для сравнения прогонов.
+
+Цель: приложение в процессе (тестовый клиент Flask, база из DATABASE_URL)
+или запущенный сервер, например gunicorn -c gunicorn.conf.py wsgi:application.
+Данные: flask crm seed --scale 1 --reset
+
+Запуск: python load_test.py [--users 12] [--duration 30] [--target inprocess|http://127.0.0.1:8000]
+                            [--output load_results.json] [--compare baseline.json]
+"""
+
+import argparse
+import io
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from urllib import error, request as urlrequest
+from urllib.parse import urlparse
+
+ROLES = ['director', 'manager', 'supplier', 'warehouse', 'production', 'accountant']
+# Рост p95 маршрута относительно базового прогона, считающийся регрессией
+REGRESSION_THRESHOLD = 0.2
+# Меньше замеров - p95 слишком шумный, чтобы считать регрессией
+MIN_SAMPLES = 20
+
+
+class InProcessClient:
+    """Тестовый клиент Flask; у каждого виртуального пользователя свой (свои cookie)"""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, data=None, json_body=None, files=None):
+        if files:
+            data = dict(data or {}, **{name: (io.BytesIO(content), filename)
+                                       for name, (filename, content) in files.items()})
+        response = self.client.open(path, method=method, data=data, json=json_body)
+        body = response.get_data()
+        response.close()
+        return response.status_code, body
+
+
+class _NoRedirect(urlrequest.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class _LocalSecureCookies(DefaultCookiePolicy):
+    """Cookie с Secure (production: SESSION_COOKIE_SECURE) отправляются и на локальный сервер по HTTP,
+    как в браузерах, считающих localhost безопасным источником"""
+
+    def return_ok_secure(self, cookie, request):
+        host = urlparse(request.get_full_url()).hostname
+        return host in ('127.0.0.1', 'localhost', '::1') or super().return_ok_secure(cookie, request)
+
+
+class HTTPClient:
+    """Клиент для запущенного сервера: urllib с cookie, без перехода по редиректам"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        jar = CookieJar(_LocalSecureCookies())
+        self.opener = urlrequest.build_opener(urlrequest.HTTPCookieProcessor(jar), _NoRedirect)
+
+    def request(self, method, path, data=None, json_body=None, files=None):
+        headers = {}
+        body = None
+        if files:
+            body, content_type = _multipart(data or {}, files)
+            headers['Content-Type'] = content_type
+        elif json_body is not None:
+            body = json.dumps(json_body).encode()
+            headers['Content-Type'] = 'application/json'
+        elif data is not None:
+            from urllib.parse import urlencode
+            body = urlencode(data).encode()
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        req = urlrequest.Request(self.base_url + path, data=body, headers=headers, method=method)
+        try:
+            with self.opener.open(req, timeout=60) as response:
+                return response.status, response.read()
+        except error.HTTPError as e:
+            return e.code, e.read()
+
+
+def _multipart(fields, files):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, (filename, content) in files.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                     f'Content-Type: application/octet-stream\r\n\r\n'.encode() + content + b'\r\n')
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+def resources_workbook(prefix, rows=20):
+    """Небольшой файл импорта ресурсов с уникальными названиями"""
+    from openpyxl import Workbook
+
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(['company_name', 'resource_name', 'resource_type', 'quantity', 'unit', 'cost_per_unit'])
+    for i in range(rows):
+        sheet.append(['ООО "Нагрузка"', f'{prefix} ресурс {i}', 'material', 10 + i, 'м', 15000])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+class VirtualUser:
+    """Сессия одного пользователя: вход, сценарий роли, замеры по маршрутам"""
+
+    def __init__(self, number, role, client, results):
+        self.number = number
+        self.role = role
+        self.client = client
+        self.results = results
+        self.rng = random.Random(number)
+        self.company_id = None
+        self.iteration = 0
+
+    def call(self, method, path, label=None, expect=(200,), **kwargs):
+        label = label or f'{method} {path.split("?")[0]}'
+        start = time.perf_counter()
+        try:
+            status, body = self.client.request(method, path, **kwargs)
+        except OSError:
+            status, body = 0, b''
+        elapsed = time.perf_counter() - start
+        self.results.record(label, elapsed, status in expect)
+        return status, body
+
+    def get(self, path, label=None):
+        return self.call('GET', path, label)
+
+    def json(self, method, path, body, label=None, expect=(200, 201)):
+        status, content = self.call(method, path, label, expect, json_body=body)
+        try:
+            return status, json.loads(content)
+        except ValueError:
+            return status, None
+
+    def login(self, accounts):
+        username, password = accounts[self.role]
+        status, _ = self.call('POST', '/login', expect=(302,), data={'username': username, 'password': password})
+        return status == 302
+
+    def run_iteration(self):
+        self.iteration += 1
+        SCENARIOS[self.role](self)
+
+    def resource_crud(self):
+        if self.company_id is None:
+            status, body = self.get('/api/companies')
+            companies = json.loads(body) if status == 200 else []
+            self.company_id = companies[0]['id'] if companies else None
+        if self.company_id is None:
+            return
+        name = f'Нагрузка {self.number}-{self.iteration}'
+        status, created = self.json('POST', '/api/resources', {
+            'name': name, 'resource_type': 'material', 'quantity': 10, 'unit': 'м',
+            'cost_per_unit': 1000.0, 'company_id': self.company_id})
+        if status != 201:
+            return
+        path = f'/api/resources/{created["id"]}'
+        self.json('PUT', path, {'quantity': self.rng.randrange(1, 100)}, label='PUT /api/resources/<id>')
+        self.call('DELETE', path, label='DELETE /api/resources/<id>')
+
+
+def director_scenario(vu):
+    vu.get('/director')
+    vu.get('/api/orders?limit=50')
+    vu.get('/api/financial-transactions?limit=50')
+    vu.get('/api/finance/timeseries?granularity=month')
+    vu.get('/api/resources?limit=50')
+    vu.resource_crud()
+
+
+def manager_scenario(vu):
+    vu.get('/manager')
+    vu.get('/api/orders?limit=50&status=pending')
+    vu.json('POST', '/manager', {
+        'customer_name': f'Клиент {vu.number}-{vu.iteration}', 'customer_phone': '+998 90 000-00-00',
+        'total_amount': vu.rng.randrange(1, 20), 'unit_price': 15000, 'product_id': 1,
+        'delivery_date': datetime.now().strftime('%m/%d/%Y'), 'notes': 'load test'})
+
+
+def supplier_scenario(vu):
+    vu.get('/supplier')
+    vu.get('/api/resources?limit=50&resource_type=material')
+    vu.get('/api/resource-requests?limit=50&status=pending')
+    vu.resource_crud()
+    if vu.iteration % 5 == 1:
+        # Импорт реже остальных действий, как и в реальной работе
+        content = resources_workbook(f'Нагрузка {vu.number}-{vu.iteration}')
+        status, body = vu.call('POST', '/upload-excel', expect=(202,), data={'file_type': 'resources'},
+                               files={'file': ('resources.xlsx', content)})
+        if status == 202:
+            vu.get(json.loads(body)['status_url'], label='GET /api/jobs/<id>')
+
+
+def warehouse_scenario(vu):
+    vu.get('/warehouse')
+    vu.get('/api/resources?limit=50')
+    vu.json('POST', '/api/resource-requests', {
+        'resource_name': f'Труба стальная {vu.rng.randrange(10, 200)}мм',
+        'quantity': vu.rng.randrange(1, 100), 'priority': vu.rng.choice(['low', 'medium', 'high'])})
+    vu.get('/api/resource-requests?limit=50')
+
+
+def production_scenario(vu):
+    vu.get('/production')
+    vu.get('/api/orders?limit=50&status=in_progress')
+    vu.get('/api/resource-requests?limit=50&status=approved')
+
+
+def accountant_scenario(vu):
+    vu.get('/accountant')
+    vu.get('/accountant/cash-flow')
+    vu.get('/accountant/financial-analysis?period=quarter')
+    vu.get('/api/financial-transactions?limit=50&transaction_type=income')
+    vu.get('/api/finance/timeseries?granularity=week')
+
+
+SCENARIOS = {
+    'director': director_scenario,
+    'manager': manager_scenario,
+    'supplier': supplier_scenario,
+    'warehouse': warehouse_scenario,
+    'production': production_scenario,
+    'accountant': accountant_scenario,
+}
+
+
+class Results:
+    """Длительности по маршрутам из всех потоков"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {}
+        self.errors = {}
+
+    def record(self, label, elapsed, ok):
+        with self._lock:
+            self.samples.setdefault(label, []).append(elapsed)
+            if not ok:
+                self.errors[label] = self.errors.get(label, 0) + 1
+
+    def summary(self, duration):
+        routes = {}
+        for label, samples in sorted(self.samples.items()):
+            samples = sorted(samples)
+            routes[label] = {
+                'count': len(samples),
+                'errors': self.errors.get(label, 0),
+                'rps': round(len(samples) / duration, 2),
+                'p50_ms': _percentile(samples, 50),
+                'p95_ms': _percentile(samples, 95),
+                'p99_ms': _percentile(samples, 99),
+                'max_ms': round(samples[-1] * 1000, 1),
+            }
+        total = sum(route['count'] for route in routes.values())
+        overall = sorted(sample for samples in self.samples.values() for sample in samples)
+        return {
+            'requests': total,
+            'errors': sum(route['errors'] for route in routes.values()),
+            'rps': round(total / duration, 2),
+            'p50_ms': _percentile(overall, 50) if overall else None,
+            'p95_ms': _percentile(overall, 95) if overall else None,
+        }, routes
+
+
+def _percentile(sorted_samples, percent):
+    index = max(int(round(percent / 100 * len(sorted_samples))) - 1, 0)
+    return round(sorted_samples[index] * 1000, 1)
+
+
+def make_client_factory(target):
+    if target == 'inprocess':
+        from app import create_app
+
+        app = create_app(os.environ.get('FLASK_ENV', 'development'))
+        app.config['DEBUG'] = False
+        return lambda: InProcessClient(app)
+    return lambda: HTTPClient(target)
+
+
+def run(args):
+    from setup_data import USERS_DATA
+
+    accounts = {user['roles'][0]: (user['username'], user['password']) for user in USERS_DATA}
+    roles = [role for role in args.roles if role in accounts]
+    new_client = make_client_factory(args.target)
+    results = Results()
+    users = [VirtualUser(number, role, new_client(), results)
+             for number, role in zip(range(args.users), itertools.cycle(roles))]
+
+    failed_logins = [vu.role for vu in users if not vu.login(accounts)]
+    if failed_logins:
+        sys.exit(f'Не удалось войти: {", ".join(sorted(set(failed_logins)))} (нужны данные setup_data.py / flask crm seed)')
+
+    deadline = time.perf_counter() + args.duration
+
+    def worker(vu):
+        while time.perf_counter() < deadline:
+            vu.run_iteration()
+
+    started_at = datetime.now()
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(vu,)) for vu in users]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - start
+
+    total, routes = results.summary(duration)
+    return {
+        'meta': {
+            'target': args.target,
+            'users': args.users,
+            'roles': roles,
+            'duration_s': round(duration, 1),
+            'started_at': started_at.isoformat(timespec='seconds'),
+            'revision': _git_revision(),
+            'python': platform.python_version(),
+        },
+        'total': total,
+        'routes': routes,
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def print_report(report):
+    meta, total = report['meta'], report['total']
+    print(f"Цель: {meta['target']}, пользователей: {meta['users']}, {meta['duration_s']} с")
+    print(f"Всего: {total['requests']} запросов, {total['rps']} в секунду, ошибок: {total['errors']}, "
+          f"p50 {total.get('p50_ms')} мс, p95 {total.get('p95_ms')} мс")
+    print(f"{'Маршрут':<46}{'Кол-во':>8}{'Ошибки':>8}{'Запр/с':>9}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for label, route in report['routes'].items():
+        print(f"{label:<46}{route['count']:>8}{route['errors']:>8}{route['rps']:>9}"
+              f"{route['p50_ms']:>9}{route['p95_ms']:>9}{route['p99_ms']:>9}")
+
+
+def compare(report, baseline, threshold):
+    """Изменение p95 относительно базового прогона; возвращает список регрессий"""
+    regressions = []
+    print(f"\nСравнение с {baseline['meta'].get('revision')} ({baseline['meta'].get('started_at')}):")
+    print(f"{'Маршрут':<46}{'p95 было':>10}{'p95 стало':>11}{'Изменение':>11}")
+    for label, route in report['routes'].items():
+        before = baseline['routes'].get(label)
+        if before is None or not before['p95_ms']:
+            continue
+        change = route['p95_ms'] / before['p95_ms'] - 1
+        mark = ''
+        if min(route['count'], before['count']) < MIN_SAMPLES:
+            mark = '  (мало замеров)'
+        elif change > threshold:
+            mark = '  <- регрессия'
+            regressions.append(label)
+        print(f"{label:<46}{before['p95_ms']:>10}{route['p95_ms']:>11}{change:>+11.0%}{mark}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--target', default='inprocess', help='inprocess или адрес сервера (http://127.0.0.1:8000)')
+    parser.add_argument('--users', type=int, default=12, help='одновременных виртуальных пользователей')
+    parser.add_argument('--duration', type=float, default=30, help='длительность прогона, секунд')
+    parser.add_argument('--roles', nargs='+', default=ROLES, choices=ROLES)
+    parser.add_argument('--output', help='сохранить результат в JSON')
+    parser.add_argument('--compare', help='JSON базового прогона для сравнения p95')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help='допустимый рост p95 (доля), больше - регрессия и код выхода 1')
+    args = parser.parse_args()
+
+    report = run(args)
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f'\nРезультат сохранён: {args.output}')
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
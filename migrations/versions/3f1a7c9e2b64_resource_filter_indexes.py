@@ -0,0 +1,36 @@
+"""indexes for resource and resource request API filters
+
+Revision ID: 3f1a7c9e2b64
+Revises: 489d05192fe2
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1a7c9e2b64'
+down_revision = '489d05192fe2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('resource', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_resource_resource_type'), ['resource_type'], unique=False)
+        batch_op.create_index(batch_op.f('ix_resource_company_id'), ['company_id'], unique=False)
+
+    with op.batch_alter_table('resource_request', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_resource_request_status'), ['status'], unique=False)
+        batch_op.create_index(batch_op.f('ix_resource_request_priority'), ['priority'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('resource_request', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_resource_request_priority'))
+        batch_op.drop_index(batch_op.f('ix_resource_request_status'))
+
+    with op.batch_alter_table('resource', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_resource_company_id'))
+        batch_op.drop_index(batch_op.f('ix_resource_resource_type'))
@@ -0,0 +1,35 @@
+"""table version counters for conditional GET
+
+Revision ID: a3d9e6c1f24b
+Revises: f5c1d8e3b702
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+import time
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3d9e6c1f24b'
+down_revision = 'f5c1d8e3b702'
+branch_labels = None
+depends_on = None
+
+# VERSIONED_TABLES из models.py на момент миграции
+VERSIONED_TABLES = ('company', 'resource', 'resource_request', 'order', 'financial_transaction')
+
+
+def upgrade():
+    table_version = op.create_table('table_version',
+        sa.Column('name', sa.String(length=64), nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+    start = int(time.time())
+    op.bulk_insert(table_version, [{'name': name, 'version': start} for name in VERSIONED_TABLES])
+
+
+def downgrade():
+    op.drop_table('table_version')
@@ -0,0 +1,26 @@
+"""import job lease owner
+
+Revision ID: a7d3e9b1c460
+Revises: c9a4e7f2d315
+Create Date: 2026-10-20 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d3e9b1c460'
+down_revision = 'c9a4e7f2d315'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('import_job', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('locked_by', sa.String(length=64), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('import_job', schema=None) as batch_op:
+        batch_op.drop_column('locked_by')
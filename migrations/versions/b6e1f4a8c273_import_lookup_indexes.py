@@ -0,0 +1,39 @@
+"""indexes for per-chunk duplicate lookups in bulk import
+
+Revision ID: b6e1f4a8c273
+Revises: a3d9e6c1f24b
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6e1f4a8c273'
+down_revision = 'a3d9e6c1f24b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Импорт проверяет дубликаты каждой пачки запросом WHERE name IN (...)
+    with op.batch_alter_table('company', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_company_name'), ['name'], unique=False)
+
+    with op.batch_alter_table('product', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_product_name'), ['name'], unique=False)
+
+    with op.batch_alter_table('resource', schema=None) as batch_op:
+        batch_op.create_index('ix_resource_name_company_id', ['name', 'company_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('resource', schema=None) as batch_op:
+        batch_op.drop_index('ix_resource_name_company_id')
+
+    with op.batch_alter_table('product', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_product_name'))
+
+    with op.batch_alter_table('company', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_company_name'))
@@ -0,0 +1,56 @@
+"""indexes for dashboard status counters and foreign keys
+
+Revision ID: c4e8a2d6f013
+Revises: 8b2d4f6a1c35
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e8a2d6f013'
+down_revision = '8b2d4f6a1c35'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # GROUP BY status в счётчиках дашбордов читает только индекс
+    with op.batch_alter_table('order', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_order_status'), ['status'], unique=False)
+        batch_op.create_index(batch_op.f('ix_order_user_id'), ['user_id'], unique=False)
+
+    with op.batch_alter_table('production_task', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_production_task_status'), ['status'], unique=False)
+
+    # Ленивые загрузки order.items / order.custom_orders и остатки по продукту
+    with op.batch_alter_table('order_item', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_order_item_order_id'), ['order_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_order_item_product_id'), ['product_id'], unique=False)
+
+    with op.batch_alter_table('custom_order', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_custom_order_order_id'), ['order_id'], unique=False)
+
+    with op.batch_alter_table('inventory_item', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_inventory_item_product_id'), ['product_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('inventory_item', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_inventory_item_product_id'))
+
+    with op.batch_alter_table('custom_order', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_custom_order_order_id'))
+
+    with op.batch_alter_table('order_item', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_order_item_product_id'))
+        batch_op.drop_index(batch_op.f('ix_order_item_order_id'))
+
+    with op.batch_alter_table('production_task', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_production_task_status'))
+
+    with op.batch_alter_table('order', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_order_user_id'))
+        batch_op.drop_index(batch_op.f('ix_order_status'))
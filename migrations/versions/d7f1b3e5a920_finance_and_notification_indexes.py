@@ -0,0 +1,40 @@
+"""composite indexes for financial transactions and notifications
+
+Revision ID: d7f1b3e5a920
+Revises: c4e8a2d6f013
+Create Date: 2026-10-18 12:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7f1b3e5a920'
+down_revision = 'c4e8a2d6f013'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('financial_transaction', schema=None) as batch_op:
+        # Суммы доходов/расходов за период: WHERE transaction_type = ? AND created_at >= ? AND created_at < ?
+        batch_op.create_index('ix_financial_transaction_type_created_at',
+                              ['transaction_type', 'created_at'], unique=False)
+        # Последние операции: ORDER BY created_at DESC LIMIT 10
+        batch_op.create_index(batch_op.f('ix_financial_transaction_created_at'), ['created_at'], unique=False)
+        # Постраничный список с фильтром по типу: WHERE transaction_type = ? AND id > ? ORDER BY id
+        batch_op.create_index(batch_op.f('ix_financial_transaction_transaction_type'), ['transaction_type'], unique=False)
+
+    with op.batch_alter_table('notification', schema=None) as batch_op:
+        batch_op.create_index('ix_notification_user_id_is_read', ['user_id', 'is_read'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('notification', schema=None) as batch_op:
+        batch_op.drop_index('ix_notification_user_id_is_read')
+
+    with op.batch_alter_table('financial_transaction', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_financial_transaction_transaction_type'))
+        batch_op.drop_index(batch_op.f('ix_financial_transaction_created_at'))
+        batch_op.drop_index('ix_financial_transaction_type_created_at')
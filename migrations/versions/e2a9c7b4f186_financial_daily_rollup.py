@@ -0,0 +1,41 @@
+"""financial daily rollup table
+
+Revision ID: e2a9c7b4f186
+Revises: d7f1b3e5a920
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a9c7b4f186'
+down_revision = 'd7f1b3e5a920'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('financial_daily_rollup',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('transaction_type', sa.String(length=50), nullable=False),
+        sa.Column('category', sa.String(length=50), nullable=False),
+        sa.Column('total_amount', sa.Float(), nullable=False),
+        sa.Column('transaction_count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('day', 'transaction_type', 'category', name='uq_financial_daily_rollup_key')
+    )
+
+    # Сводка по уже существующим операциям; дальше она обновляется приложением
+    op.execute(
+        "INSERT INTO financial_daily_rollup (day, transaction_type, category, total_amount, transaction_count) "
+        "SELECT DATE(created_at), transaction_type, COALESCE(category, ''), SUM(amount), COUNT(id) "
+        "FROM financial_transaction WHERE created_at IS NOT NULL "
+        "GROUP BY DATE(created_at), transaction_type, COALESCE(category, '')"
+    )
+
+
+def downgrade():
+    op.drop_table('financial_daily_rollup')
@@ -1,9 +1,14 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
+import time
 from datetime import datetime
+from sqlalchemy import event
 
-db = SQLAlchemy()
+from read_replica import RoutingSession
+
+# Сессия отправляет чтение на реплику, если она настроена (read_replica.py)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -30,6 +35,9 @@ class User(UserMixin, db.Model):
     def has_role(self, role_name):
         return any(role.name == role_name for role in self.roles)
     
+    def has_any_role(self, role_names):
+        return any(role.name in role_names for role in self.roles)
+    
     def __repr__(self):
         return f'<User {self.username}>'
 
@@ -49,7 +57,7 @@ user_roles = db.Table('user_roles',
 
 class Company(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
+    name = db.Column(db.String(100), nullable=False, index=True)  # поиск компании при импорте
     address = db.Column(db.Text)
     phone = db.Column(db.String(20))
     email = db.Column(db.String(120))
@@ -63,7 +71,7 @@ class Company(db.Model):
 
 class Product(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
+    name = db.Column(db.String(100), nullable=False, index=True)  # проверка дубликатов при импорте
     description = db.Column(db.Text)
     price = db.Column(db.Float, nullable=False)
     category = db.Column(db.String(50))
@@ -85,11 +93,11 @@ class Order(db.Model):
     customer_phone = db.Column(db.String(20))
     customer_email = db.Column(db.String(120))
     total_amount = db.Column(db.Float, nullable=False)
-    status = db.Column(db.String(20), default='pending')
+    status = db.Column(db.String(20), default='pending', index=True)
     order_date = db.Column(db.DateTime, default=datetime.utcnow)
     delivery_date = db.Column(db.DateTime)
     notes = db.Column(db.Text)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
     
     # Связи
     items = db.relationship('OrderItem', backref='order', lazy=True, cascade='all, delete-orphan')
@@ -100,8 +108,8 @@ class Order(db.Model):
 
 class OrderItem(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    order_id = db.Column(db.Integer, db.ForeignKey('order.id'), nullable=False)
-    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False)
+    order_id = db.Column(db.Integer, db.ForeignKey('order.id'), nullable=False, index=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False, index=True)
     quantity = db.Column(db.Integer, nullable=False)
     unit_price = db.Column(db.Float, nullable=False)
     total_price = db.Column(db.Float, nullable=False)
@@ -111,7 +119,7 @@ class OrderItem(db.Model):
 
 class CustomOrder(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    order_id = db.Column(db.Integer, db.ForeignKey('order.id'), nullable=False)
+    order_id = db.Column(db.Integer, db.ForeignKey('order.id'), nullable=False, index=True)
     product_name = db.Column(db.String(100), nullable=False)
     specifications = db.Column(db.Text)
     quantity = db.Column(db.Integer, nullable=False)
@@ -125,7 +133,7 @@ class ProductionTask(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
-    status = db.Column(db.String(20), default='pending')
+    status = db.Column(db.String(20), default='pending', index=True)
     priority = db.Column(db.String(20), default='medium')
     start_date = db.Column(db.DateTime)
     end_date = db.Column(db.DateTime)
@@ -136,20 +144,42 @@ class ProductionTask(db.Model):
         return f'<ProductionTask {self.name}>'
 
 class FinancialTransaction(db.Model):
+    __table_args__ = (
+        # Суммы по типу за период (бухгалтер) и последние операции по дате
+        db.Index('ix_financial_transaction_type_created_at', 'transaction_type', 'created_at'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
-    transaction_type = db.Column(db.String(50), nullable=False)
+    # Отдельный индекс по типу неявно упорядочен по id - для постраничного API с фильтром по типу
+    transaction_type = db.Column(db.String(50), nullable=False, index=True)
     amount = db.Column(db.Float, nullable=False)
     description = db.Column(db.Text)
     date = db.Column(db.DateTime, default=datetime.utcnow)
     category = db.Column(db.String(50))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     
     def __repr__(self):
         return f'<FinancialTransaction {self.id}>'
 
+class FinancialDailyRollup(db.Model):
+    """Суммы финансовых операций по дням, типам и категориям (см. finance_rollup.py)"""
+    __table_args__ = (
+        db.UniqueConstraint('day', 'transaction_type', 'category', name='uq_financial_daily_rollup_key'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    transaction_type = db.Column(db.String(50), nullable=False)
+    category = db.Column(db.String(50), nullable=False, default='')  # '' - без категории
+    total_amount = db.Column(db.Float, nullable=False, default=0)
+    transaction_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<FinancialDailyRollup {self.day} {self.transaction_type} {self.category}>'
+
 class InventoryItem(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False)
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False, index=True)
     quantity = db.Column(db.Integer, nullable=False)
     min_stock = db.Column(db.Integer, default=10)
     price_per_unit = db.Column(db.Float, default=0.0)
@@ -171,6 +201,11 @@ class SupplierOrder(db.Model):
         return f'<SupplierOrder {self.id}>'
 
 class Notification(db.Model):
+    __table_args__ = (
+        # Непрочитанные уведомления пользователя
+        db.Index('ix_notification_user_id_is_read', 'user_id', 'is_read'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
     message = db.Column(db.Text, nullable=False)
@@ -182,13 +217,18 @@ class Notification(db.Model):
         return f'<Notification {self.title}>'
 
 class Resource(db.Model):
+    __table_args__ = (
+        # Проверка дубликатов пачки импорта: WHERE name IN (...)
+        db.Index('ix_resource_name_company_id', 'name', 'company_id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
-    resource_type = db.Column(db.String(50), nullable=False)
+    resource_type = db.Column(db.String(50), nullable=False, index=True)
     quantity = db.Column(db.Integer, nullable=False)
     unit = db.Column(db.String(20))
     cost_per_unit = db.Column(db.Float)
-    company_id = db.Column(db.Integer, db.ForeignKey('company.id'), nullable=False)
+    company_id = db.Column(db.Integer, db.ForeignKey('company.id'), nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     def __repr__(self):
@@ -198,8 +238,8 @@ class ResourceRequest(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     resource_name = db.Column(db.String(100), nullable=False)
     quantity = db.Column(db.Integer, nullable=False)
-    priority = db.Column(db.String(20), default='medium')
-    status = db.Column(db.String(20), default='pending')
+    priority = db.Column(db.String(20), default='medium', index=True)
+    status = db.Column(db.String(20), default='pending', index=True)
     requested_by = db.Column(db.String(100))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
@@ -313,3 +353,52 @@ class Report(db.Model):
     
     def __repr__(self):
         return f'<Report {self.title}>'
+
+class ImportJob(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    job_type = db.Column(db.String(20), nullable=False)  # companies, resources, products
+    file_path = db.Column(db.String(255), nullable=False)
+    original_filename = db.Column(db.String(255))
+    status = db.Column(db.String(20), default='queued', index=True)  # queued, running, done, failed
+    total_rows = db.Column(db.Integer)
+    processed_rows = db.Column(db.Integer, default=0)
+    inserted_rows = db.Column(db.Integer, default=0)
+    skipped_rows = db.Column(db.Integer, default=0)
+    failed_rows = db.Column(db.Integer, default=0)
+    errors = db.Column(db.Text)  # JSON со списком ошибок по строкам
+    error_message = db.Column(db.Text)
+    created_by = db.Column(db.String(80))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    # Аренда задачи: обработчик продлевает heartbeat_at после каждой пачки; задачу с истёкшей
+    # арендой (обработчик умер) claim_next_job возвращает в очередь или завершает с ошибкой
+    heartbeat_at = db.Column(db.DateTime)
+    attempts = db.Column(db.Integer, default=0)
+    # Токен аренды: записи обработчика проходят, только пока токен его и аренда не истекла
+    locked_by = db.Column(db.String(64))
+    
+    def __repr__(self):
+        return f'<ImportJob {self.id} {self.status}>'
+
+class ReplicaHeartbeat(db.Model):
+    """Одна строка (id=1), обновляется на основной БД; по её копии на реплике определяется задержка"""
+    __tablename__ = 'replica_heartbeat'
+    id = db.Column(db.Integer, primary_key=True)
+    updated_at = db.Column(db.DateTime, nullable=False)
+
+# Таблицы, по которым списки API отдают ETag (conditional_get.py)
+VERSIONED_TABLES = ('company', 'resource', 'resource_request', 'order', 'financial_transaction')
+
+class TableVersion(db.Model):
+    """Счётчик изменений таблицы: увеличивается в той же транзакции, что и запись (conditional_get.py)"""
+    __tablename__ = 'table_version'
+    name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False)
+
+@event.listens_for(TableVersion.__table__, 'after_create')
+def _create_table_versions(table, connection, **kwargs):
+    # Строки нужны заранее: запись только увеличивает счётчик (UPDATE без гонки на INSERT).
+    # Начало отсчёта - время создания: ETag заново созданной БД не совпадёт с закэшированным браузером
+    start = int(time.time())
+    connection.execute(table.insert(), [{'name': name, 'version': start} for name in VERSIONED_TABLES])
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Keyset-пагинация для API-списков.
+Страница выбирается условием id > after_id с сортировкой по id, поэтому
+стоимость запроса не зависит от номера страницы (в отличие от OFFSET).
+"""
+
+from flask import request
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+def page_args():
+    """Параметры страницы из запроса: (after_id, limit)"""
+    after_id = request.args.get('after_id', type=int)
+    limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+    return after_id, max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def apply_filters(query, model, filters):
+    """Фильтры равенства из параметров запроса; пустые значения пропускаются"""
+    for name, value_type in filters.items():
+        value = request.args.get(name, type=value_type)
+        if value is not None and value != '':
+            query = query.filter(getattr(model, name) == value)
+    return query
+
+
+def keyset_page(query, model, after_id=None, limit=DEFAULT_PAGE_SIZE):
+    """Одна страница записей и курсор следующей страницы (None - страниц больше нет)"""
+    if after_id is not None:
+        query = query.filter(model.id > after_id)
+
+    # Берём на одну запись больше, чтобы узнать, есть ли следующая страница
+    rows = query.order_by(model.id).limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, rows[-1].id
+    return rows, None
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Календарные периоды для финансовых отчётов.
+Месяц, квартал, год или произвольный интервал переводятся в полуинтервал
+[start, end), чтобы фильтр по дате был вида created_at >= start AND created_at < end
+и использовал индекс, а не вычислял EXTRACT(...) для каждой строки.
+"""
+
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+
+from flask import request
+
+# Помесячные отчёты (months()) - не больше 10 лет
+MAX_MONTHS = 120
+
+MONTH_NAMES = ('Январь', 'Февраль', 'Март', 'Апрель', 'Май', 'Июнь', 'Июль',
+               'Август', 'Сентябрь', 'Октябрь', 'Ноябрь', 'Декабрь')
+
+
+class Period(namedtuple('Period', 'kind start end')):
+    """Полуинтервал [start, end) с типом периода"""
+
+    def filter(self, column):
+        """Условия для query.filter(): индексируемое сравнение по диапазону"""
+        return column >= self.start, column < self.end
+
+    def month_count(self):
+        """Число месяцев, пересекающихся с периодом"""
+        last = self.end - timedelta(microseconds=1)
+        return (last.year - self.start.year) * 12 + last.month - self.start.month + 1
+
+    def months(self, limit=MAX_MONTHS):
+        """Начала месяцев, пересекающихся с периодом (не больше limit)"""
+        count = self.month_count()
+        if count > limit:
+            raise ValueError(f'Период длиннее {limit} месяцев')
+        first = datetime(self.start.year, self.start.month, 1)
+        # Без перехода за последний месяц: после декабря 9999 года месяца нет
+        for index in range(count):
+            yield _add_months(first, index)
+
+    @property
+    def last_day(self):
+        """Последний день периода включительно - для отображения"""
+        return (self.end - timedelta(microseconds=1)).date()
+
+    @property
+    def label(self):
+        if self.kind == 'month':
+            return f'{MONTH_NAMES[self.start.month - 1]} {self.start.year}'
+        if self.kind == 'quarter':
+            return f'{(self.start.month - 1) // 3 + 1} квартал {self.start.year}'
+        if self.kind == 'year':
+            return f'{self.start.year} год'
+        return f'{self.start:%d.%m.%Y} - {self.last_day:%d.%m.%Y}'
+
+
+def _add_months(moment, months):
+    month_index = moment.month - 1 + months
+    return datetime(moment.year + month_index // 12, month_index % 12 + 1, 1)
+
+
+def _as_datetime(value):
+    if isinstance(value, datetime):
+        return value
+    return datetime(value.year, value.month, value.day)
+
+
+def month_period(year, month):
+    start = datetime(year, month, 1)
+    return Period('month', start, _add_months(start, 1))
+
+
+def quarter_period(year, quarter):
+    start = datetime(year, (quarter - 1) * 3 + 1, 1)
+    return Period('quarter', start, _add_months(start, 3))
+
+
+def year_period(year):
+    return Period('year', datetime(year, 1, 1), datetime(year + 1, 1, 1))
+
+
+def custom_period(first_day, last_day):
+    """Произвольный интервал по дням; последний день входит в период"""
+    if last_day < first_day:
+        raise ValueError('Дата окончания периода раньше даты начала')
+    # Следующего дня после date.max нет: конец периода - последний момент календаря
+    end = _as_datetime(last_day) + timedelta(days=1) if last_day < date.max else datetime.max
+    return Period('custom', _as_datetime(first_day), end)
+
+
+def current_period(kind='month', now=None):
+    """Месяц, квартал или год, содержащий момент now (по умолчанию текущий)"""
+    now = now or datetime.now()
+    if kind == 'month':
+        return month_period(now.year, now.month)
+    if kind == 'quarter':
+        return quarter_period(now.year, (now.month - 1) // 3 + 1)
+    if kind == 'year':
+        return year_period(now.year)
+    raise ValueError(f'Неизвестный тип периода: {kind}')
+
+
+def period_from_request(default='month', max_months=None):
+    """Период из параметров запроса: ?period=month|quarter|year, ?period=custom&start=...&end=...
+
+    Для календарных периодов необязательный ?date=YYYY-MM-DD (или ?start=) выбирает период,
+    содержащий эту дату. Некорректные параметры и произвольный период длиннее max_months
+    месяцев заменяются периодом по умолчанию.
+    """
+    kind = request.args.get('period', default)
+    try:
+        if kind == 'custom':
+            first_day = date.fromisoformat(request.args['start'])
+            last_day = date.fromisoformat(request.args.get('end') or request.args['start'])
+            period = custom_period(first_day, last_day)
+            if max_months is not None and period.month_count() > max_months:
+                raise ValueError(f'Период длиннее {max_months} месяцев')
+            return period
+        anchor = request.args.get('date') or request.args.get('start')
+        return current_period(kind, _as_datetime(date.fromisoformat(anchor)) if anchor else None)
+    except (KeyError, ValueError, OverflowError):
+        # OverflowError - дата за пределами календаря datetime (например, год 9999 + 1 день)
+        return current_period(default)
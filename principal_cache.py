@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Кэш принципалов: id пользователя, признак активности, имена ролей и битовая маска ролей.
+Заполняется при входе, поэтому load_user и role_required не обращаются к БД.
+Каждая запись сверяется с версией пользователя в общем хранилище кэша KPI
+(memory или файл SQLite, общий для воркеров). Версия меняется после commit,
+в котором пользователь создан, изменён (в том числе его роли) или удалён,
+и устаревшие записи во всех воркерах перечитываются из БД при следующем запросе.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from flask import current_app, has_app_context
+from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session, selectinload
+
+from kpi_cache import MISSING, MemoryBackend
+from models import db, User
+from read_replica import use_primary
+
+# Порядок ролей задаёт биты маски; роли вне списка проверяются только по именам
+ROLE_BITS = {name: 1 << i for i, name in enumerate(
+    ('director', 'manager', 'supplier', 'warehouse', 'production', 'accountant'))}
+
+VERSION_TTL = 30 * 24 * 3600  # секунд; пропавшая версия просто вызывает перечитывание из БД
+
+
+@lru_cache(maxsize=256)
+def role_mask(role_names):
+    """Маска ролей; None, если среди ролей есть неизвестная битовой схеме"""
+    mask = 0
+    for name in role_names:
+        if name not in ROLE_BITS:
+            return None
+        mask |= ROLE_BITS[name]
+    return mask
+
+
+class Principal(UserMixin):
+    """Текущий пользователь без ORM-сессии: только то, что нужно для проверки доступа"""
+
+    def __init__(self, id, username, is_active, roles, version):
+        self.id = id
+        self.username = username
+        self._is_active = is_active
+        self.roles = frozenset(roles)
+        self.role_mask = sum(ROLE_BITS.get(name, 0) for name in self.roles)
+        self.version = version
+
+    @property
+    def is_active(self):
+        return self._is_active
+
+    def has_role(self, role_name):
+        return role_name in self.roles
+
+    def has_any_role(self, role_names):
+        mask = role_mask(tuple(role_names))
+        if mask is None:
+            return not self.roles.isdisjoint(role_names)
+        return bool(self.role_mask & mask)
+
+    @property
+    def user(self):
+        """ORM-объект пользователя для операций, которым он действительно нужен"""
+        return db.session.get(User, self.id)
+
+    def __repr__(self):
+        return f'<Principal {self.username} {sorted(self.roles)}>'
+
+
+class PrincipalCache:
+    """Принципалы в памяти воркера, проверяемые по версиям в общем хранилище"""
+
+    def __init__(self, versions, maxsize=1024):
+        self.versions = versions
+        self.maxsize = maxsize
+        self._principals = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _version_key(self, user_id):
+        return f'principal-version:{user_id}'
+
+    def _current_version(self, user_id):
+        version = self.versions.get(self._version_key(user_id))
+        if version is MISSING:
+            version = self.bump(user_id)
+        return version
+
+    def bump(self, user_id):
+        """Новая версия пользователя: все закэшированные записи о нём становятся устаревшими"""
+        version = time.time_ns()
+        self.versions.set(self._version_key(user_id), version, VERSION_TTL)
+        return version
+
+    def remember(self, user, version=MISSING):
+        """Запомнить принципала по уже загруженному пользователю (при входе)"""
+        if version is MISSING:
+            version = self._current_version(user.id)
+        principal = Principal(user.id, user.username, bool(user.is_active),
+                              [role.name for role in user.roles], version)
+        with self._lock:
+            self._principals[user.id] = principal
+            self._principals.move_to_end(user.id)
+            while len(self._principals) > self.maxsize:
+                self._principals.popitem(last=False)
+        return principal
+
+    def forget(self, user_id):
+        with self._lock:
+            self._principals.pop(user_id, None)
+
+    def load(self, user_id):
+        """Принципал для запроса: из памяти, если версия совпадает, иначе из БД"""
+        with self._lock:
+            principal = self._principals.get(user_id)
+        version = self._current_version(user_id)
+        if principal is not None and principal.version == version:
+            return principal
+
+        # Версия прочитана до загрузки: если роли изменятся в это время, запись сразу устареет
+        # С основной БД: роли с отстающей реплики закэшировались бы с новой версией
+        with use_primary():
+            user = User.query.options(selectinload(User.roles)).filter_by(id=user_id).first()
+        if user is None:
+            self.forget(user_id)
+            return None
+        return self.remember(user, version)
+
+
+def _mark_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None and target.id is not None:
+        session.info.setdefault('principal_changes', set()).add(target.id)
+
+
+def _after_commit(session):
+    changed = session.info.pop('principal_changes', None)
+    if not changed:
+        return
+    principals = current_app.extensions.get('principals') if has_app_context() else None
+    if principals is not None:
+        for user_id in changed:
+            principals.bump(user_id)
+
+
+def _after_rollback(session):
+    session.info.pop('principal_changes', None)
+
+
+def register_principal_events():
+    """Смена версии после commit с изменением пользователя (повторный вызов ничего не делает)"""
+    # after_update срабатывает и когда у пользователя изменился только список ролей
+    for name in ('after_insert', 'after_update', 'after_delete'):
+        if not event.contains(User, name, _mark_changed):
+            event.listen(User, name, _mark_changed)
+    for name, handler in (('after_commit', _after_commit), ('after_rollback', _after_rollback)):
+        if not event.contains(Session, name, handler):
+            event.listen(Session, name, handler)
+
+
+def init_principal_cache(app, versions):
+    """Кэш принципалов; версии хранятся в бэкенде кэша KPI, общем для воркеров при KPI_CACHE_BACKEND=sqlite"""
+    register_principal_events()
+    maxsize = app.config.get('PRINCIPAL_CACHE_SIZE', 1024)
+    if versions.name == 'memory':
+        # Отдельный LRU, чтобы версии пользователей не вытесняли снимки KPI
+        versions = MemoryBackend(maxsize)
+    principals = PrincipalCache(versions, maxsize=maxsize)
+    app.extensions['principals'] = principals
+    return principals
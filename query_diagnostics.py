@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Диагностика SQL-запросов (включается SQL_DIAGNOSTICS).
+- Медленные запросы дольше SLOW_QUERY_MS пишутся в лог с маршрутом и стеком вызова.
+- Запросы одинаковой формы, повторённые за один HTTP-запрос не менее N_PLUS_ONE_THRESHOLD раз,
+  считаются шаблоном N+1 и тоже попадают в лог со стеком первого повтора.
+- SQL_STRICT_RENDERING: ленивая загрузка связи во время отрисовки шаблона
+  вызывает LazyLoadDuringRender - для тестов, чтобы N+1 из шаблонов не проходили незаметно.
+"""
+
+import logging
+import os
+import re
+import time
+import traceback
+
+from flask import before_render_template, current_app, g, has_request_context, request, template_rendered
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models import db
+
+logger = logging.getLogger('sql_diagnostics')
+
+STACK_DEPTH = 8
+
+# Списки параметров IN (?, ?, ...) разной длины считаются одной формой запроса
+IN_LIST = re.compile(r'\((?:\s*(?:\?|%s|%\(\w+\)s)\s*,)+\s*(?:\?|%s|%\(\w+\)s)\s*\)')
+SPACES = re.compile(r'\s+')
+
+
+class LazyLoadDuringRender(RuntimeError):
+    """Ленивая загрузка связи во время отрисовки шаблона в строгом режиме"""
+
+
+def statement_shape(statement):
+    return IN_LIST.sub('(?)', SPACES.sub(' ', statement).strip())
+
+
+def _project_stack(root):
+    """Кадры стека из кода проекта (без библиотек и этого модуля), ближайшие к запросу"""
+    frames = [frame for frame in traceback.extract_stack()[:-2]
+              if frame.filename.startswith(root)
+              and 'site-packages' not in frame.filename
+              and frame.filename != __file__]
+    return ''.join(traceback.format_list(frames[-STACK_DEPTH:]))
+
+
+class QueryDiagnostics:
+    """Сбор запросов текущего HTTP-запроса и отчёт о медленных и повторяющихся"""
+
+    def __init__(self, app):
+        self.root = app.root_path + os.sep
+        self.slow_query_seconds = app.config.get('SLOW_QUERY_MS', 100) / 1000
+        self.repeat_threshold = app.config.get('N_PLUS_ONE_THRESHOLD', 5)
+        self.strict_rendering = app.config.get('SQL_STRICT_RENDERING', False)
+
+    def route(self):
+        return f'{request.method} {request.path} ({request.endpoint})'
+
+    def before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('diagnostics_query_start', []).append(time.perf_counter())
+
+    def after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('diagnostics_query_start')
+        if not starts:
+            return
+        duration = time.perf_counter() - starts.pop()
+        if not has_request_context() or 'sql_shapes' not in g:
+            return
+
+        shape = statement_shape(statement)
+        seen = g.sql_shapes.get(shape)
+        if seen is None:
+            g.sql_shapes[shape] = [1, None]
+        else:
+            seen[0] += 1
+            if seen[0] == 2:
+                # Стек первого повтора показывает цикл, порождающий запросы
+                seen[1] = _project_stack(self.root)
+
+        if duration >= self.slow_query_seconds:
+            logger.warning('Медленный запрос %.1f мс в %s:\n%s\nСтек:\n%s',
+                           duration * 1000, self.route(), statement, _project_stack(self.root))
+
+    def handle_error(self, exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get('diagnostics_query_start'):
+            connection.info['diagnostics_query_start'].pop()
+
+    def repeated(self):
+        """Формы запросов, повторённые не менее порога раз за текущий HTTP-запрос"""
+        shapes = g.get('sql_shapes') or {}
+        return [(shape, count, stack) for shape, (count, stack) in shapes.items()
+                if count >= self.repeat_threshold]
+
+    def report(self, response):
+        for shape, count, stack in self.repeated():
+            logger.warning('Возможный N+1 в %s: %d одинаковых запросов\n%s\nСтек первого повтора:\n%s',
+                           self.route(), count, shape, stack)
+        return response
+
+    def on_orm_execute(self, orm_execute_state):
+        if (self.strict_rendering and orm_execute_state.is_relationship_load
+                and has_request_context() and g.get('rendering_template')):
+            raise LazyLoadDuringRender(
+                f'Ленивая загрузка при отрисовке {g.rendering_template} в {self.route()}: '
+                f'{statement_shape(str(orm_execute_state.statement))}. '
+                f'Загрузите связь во view (joinedload/selectinload)')
+
+
+def _on_orm_execute(orm_execute_state):
+    # Один слушатель на класс Session; проверку выполняет диагностика текущего приложения
+    if has_request_context():
+        diagnostics = current_app.extensions.get('query_diagnostics')
+        if diagnostics is not None:
+            diagnostics.on_orm_execute(orm_execute_state)
+
+
+def init_query_diagnostics(app):
+    """Подключить диагностику, если SQL_DIAGNOSTICS включён"""
+    if not app.config.get('SQL_DIAGNOSTICS', False):
+        return None
+
+    diagnostics = QueryDiagnostics(app)
+    with app.app_context():
+        # Все движки приложения, включая дополнительные binds
+        for engine in db.engines.values():
+            event.listen(engine, 'before_cursor_execute', diagnostics.before_execute)
+            event.listen(engine, 'after_cursor_execute', diagnostics.after_execute)
+            event.listen(engine, 'handle_error', diagnostics.handle_error)
+    if not event.contains(Session, 'do_orm_execute', _on_orm_execute):
+        event.listen(Session, 'do_orm_execute', _on_orm_execute)
+
+    @app.before_request
+    def start_query_diagnostics():
+        g.sql_shapes = {}
+
+    app.after_request(diagnostics.report)
+
+    def rendering_started(sender, template, context, **extra):
+        g.rendering_template = template.name
+
+    def rendering_finished(sender, template, context, **extra):
+        g.pop('rendering_template', None)
+
+    before_render_template.connect(rendering_started, app, weak=False)
+    template_rendered.connect(rendering_finished, app, weak=False)
+
+    app.extensions['query_diagnostics'] = diagnostics
+    return diagnostics
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Маршрутизация чтения на реплику (bind REPLICA_BIND в SQLALCHEMY_BINDS).
+- На реплику идут SELECT в GET-запросах к /api/* и к страницам с @read_replica.
+- Запись, SELECT ... FOR UPDATE и всё чтение после первой записи в сессии идут на основную БД;
+  после записи пользователь ещё REPLICA_STICKY_SECONDS читает с основной (видит свои изменения).
+- Защита от устаревания: задержка реплики определяется по строке replica_heartbeat,
+  которую на основной БД обновляет flask crm replica-heartbeat (или копирование
+  flask crm replicate-sqlite); если задержка больше допустимой для страницы
+  (REPLICA_MAX_LAG или max_lag декоратора), чтение идёт на основную БД.
+Модуль не импортирует models: RoutingSession используется при создании db.
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from flask import current_app, g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import DateTime, event, text
+from sqlalchemy.exc import SQLAlchemyError
+
+logger = logging.getLogger(__name__)
+
+# Допустимая задержка из конфигурации (REPLICA_MAX_LAG)
+DEFAULT_LAG = 'default'
+
+HEARTBEAT_QUERY = text('SELECT updated_at FROM replica_heartbeat WHERE id = 1').columns(updated_at=DateTime)
+
+
+def read_replica(max_lag=DEFAULT_LAG):
+    """Страница читает с реплики, если она отстаёт не больше max_lag секунд"""
+    def decorator(view):
+        view.replica_max_lag = max_lag
+        return view
+    return decorator
+
+
+def read_primary(view):
+    """GET /api/*, которому нужна актуальная основная БД (например, статус фоновой задачи)"""
+    view.replica_max_lag = None
+    return view
+
+
+@contextmanager
+def use_primary():
+    """Чтение внутри блока идёт на основную БД независимо от маршрута запроса"""
+    previous = g.get('replica_max_lag') if has_request_context() else None
+    if has_request_context():
+        g.replica_max_lag = None
+    try:
+        yield
+    finally:
+        if has_request_context():
+            g.replica_max_lag = previous
+
+
+class RoutingSession(Session):
+    """Сессия Flask-SQLAlchemy, отправляющая чтение на реплику по решению ReplicaRouter"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and clause is not None:
+            if not getattr(clause, 'is_select', False) or getattr(clause, '_for_update_arg', None) is not None:
+                # DML, DDL и произвольный text() считаются записью
+                self.info['wrote'] = True
+            elif not self._flushing and not self.info.get('wrote') and has_request_context():
+                router = current_app.extensions.get('read_replica')
+                if router is not None and router.replica_allowed():
+                    return router.engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'before_flush')
+def _mark_write(session, flush_context, instances):
+    session.info['wrote'] = True
+
+
+class ReplicaRouter:
+    """Выбор реплики для текущего запроса и измерение её задержки"""
+
+    def __init__(self, app, engine):
+        self.engine = engine
+        self.max_lag = app.config.get('REPLICA_MAX_LAG', 30)
+        self.sticky_seconds = app.config.get('REPLICA_STICKY_SECONDS', 10)
+        self.check_interval = app.config.get('REPLICA_LAG_CHECK_INTERVAL', 1.0)
+        self._lag = None
+        self._checked_at = None
+
+    def lag(self):
+        """Задержка реплики в секундах (None - неизвестна); измеряется не чаще check_interval"""
+        now = time.monotonic()
+        if self._checked_at is None or now - self._checked_at >= self.check_interval:
+            self._lag = self._measure_lag()
+            self._checked_at = now
+        return self._lag
+
+    def _measure_lag(self):
+        try:
+            with self.engine.connect() as connection:
+                beat = connection.execute(HEARTBEAT_QUERY).scalar()
+        except SQLAlchemyError as e:
+            logger.warning('Реплика недоступна, чтение идёт на основную БД: %s', e)
+            return None
+        if beat is None:
+            return None
+        return max((datetime.utcnow() - beat).total_seconds(), 0.0)
+
+    def replica_allowed(self):
+        max_lag = g.get('replica_max_lag')
+        if max_lag is None:
+            return False
+        lag = self.lag()
+        return lag is not None and lag <= max_lag
+
+    def choose_route(self):
+        """before_request: допустимая задержка для запроса или None (только основная БД)"""
+        if request.method not in ('GET', 'HEAD'):
+            return
+        view = current_app.view_functions.get(request.endpoint)
+        default = DEFAULT_LAG if request.path.startswith('/api/') else None
+        max_lag = getattr(view, 'replica_max_lag', default)
+        if max_lag is None or session.get('db_primary_until', 0) > time.time():
+            return
+        g.replica_max_lag = self.max_lag if max_lag == DEFAULT_LAG else max_lag
+
+    def remember_write(self, response):
+        """after_request: после записи пользователь какое-то время читает с основной БД"""
+        db = current_app.extensions['sqlalchemy']
+        if db.session.registry.has() and db.session.info.get('wrote'):
+            session['db_primary_until'] = time.time() + self.sticky_seconds
+        return response
+
+
+def stamp_heartbeat():
+    """Отметка времени на основной БД; на реплике по ней определяется задержка"""
+    from models import db, ReplicaHeartbeat
+
+    heartbeat = db.session.merge(ReplicaHeartbeat(id=1, updated_at=datetime.utcnow()))
+    db.session.commit()
+    return heartbeat.updated_at
+
+
+def init_read_replica(app, db):
+    """Маршрутизация чтения, если в SQLALCHEMY_BINDS задан bind реплики"""
+    bind = app.config.get('REPLICA_BIND', 'replica')
+    if bind not in (app.config.get('SQLALCHEMY_BINDS') or {}):
+        return None
+
+    with app.app_context():
+        router = ReplicaRouter(app, db.engines[bind])
+    app.before_request(router.choose_route)
+    app.after_request(router.remember_write)
+    app.extensions['read_replica'] = router
+    return router
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Метрики запросов в формате Prometheus.
+Хуки Flask измеряют длительность и размер ответа, события SQLAlchemy
+before/after_cursor_execute - число и время SQL-запросов; всё группируется по endpoint.
+Каждый воркер копит метрики в памяти и не чаще раза в METRICS_FLUSH_INTERVAL секунд
+записывает их в свой файл metrics_<pid>.json; /metrics складывает файлы всех воркеров.
+Файл завершённого воркера мастер gunicorn прибавляет к metrics_archive.json и удаляет
+(mark_process_dead из child_exit в gunicorn.conf.py): счётчики не уменьшаются, а число файлов
+не растёт с перезапусками воркеров. Каталог очищается при старте gunicorn (on_starting).
+"""
+
+import glob
+import json
+import os
+import threading
+import time
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+# Имя метрики -> (тип, описание, границы гистограммы)
+METRICS = {
+    'crm_http_request_duration_seconds': (
+        'histogram', 'Длительность обработки запроса до отдачи ответа', DURATION_BUCKETS),
+    'crm_http_request_sql_queries': (
+        'histogram', 'Число SQL-запросов на один HTTP-запрос', QUERY_COUNT_BUCKETS),
+    'crm_http_sql_duration_seconds_total': (
+        'counter', 'Суммарное время выполнения SQL-запросов', None),
+    'crm_http_response_size_bytes_total': (
+        'counter', 'Суммарный размер ответов с известной длиной', None),
+}
+
+ARCHIVE_FILE = 'metrics_archive.json'  # сумма метрик завершённых воркеров
+
+
+def default_metrics_dir(root):
+    return os.path.join(root, 'instance', 'metrics')
+
+
+def _read_entries(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+def _write_entries(path, entries):
+    # Свой временный файл у каждого потока (gthread): иначе два сброса заменяют один файл
+    tmp_path = f'{path}.{threading.get_ident()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(entries, f)
+    os.replace(tmp_path, path)
+
+
+def _merge(merged, entries):
+    """Прибавить записи файла метрик [имя, метки, значение] к словарю (имя, метки) -> значение"""
+    for name, labels, value in entries:
+        if name not in METRICS:
+            continue
+        key = (name, tuple(tuple(pair) for pair in labels))
+        if isinstance(value, dict):
+            total = merged.setdefault(key, {'buckets': [0] * len(value['buckets']), 'sum': 0.0, 'count': 0})
+            total['buckets'] = [a + b for a, b in zip(total['buckets'], value['buckets'])]
+            total['sum'] += value['sum']
+            total['count'] += value['count']
+        else:
+            merged[key] = merged.get(key, 0) + value
+    return merged
+
+
+def mark_process_dead(directory, pid):
+    """Перенести метрики завершённого воркера в архив и удалить его файл (вызывает мастер gunicorn)"""
+    path = os.path.join(directory, f'metrics_{pid}.json')
+    if not os.path.exists(path):
+        return
+    archive_path = os.path.join(directory, ARCHIVE_FILE)
+    merged = _merge(_merge({}, _read_entries(archive_path)), _read_entries(path))
+    _write_entries(archive_path, [[name, list(labels), value] for (name, labels), value in merged.items()])
+    os.remove(path)
+
+
+class MetricsRegistry:
+    """Метрики одного процесса и их слияние с файлами других воркеров"""
+
+    def __init__(self, directory, flush_interval=1.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._values = {}
+        self._last_flush = 0.0
+
+    def _check_fork(self):
+        # После fork метрики мастера не должны попасть в файл воркера
+        if self._pid != os.getpid():
+            self._reset()
+
+    def observe(self, name, labels, value):
+        kind, _, buckets = METRICS[name]
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._check_fork()
+            if kind == 'histogram':
+                entry = self._values.setdefault(key, {'buckets': [0] * len(buckets), 'sum': 0.0, 'count': 0})
+                for i, bound in enumerate(buckets):
+                    if value <= bound:
+                        entry['buckets'][i] += 1
+                        break
+                entry['sum'] += value
+                entry['count'] += 1
+            else:
+                self._values[key] = self._values.get(key, 0) + value
+
+    def flush(self, force=False):
+        """Записать метрики процесса в его файл, если прошёл интервал (или force)"""
+        now = time.monotonic()
+        with self._lock:
+            self._check_fork()
+            if not force and now - self._last_flush < self.flush_interval:
+                return
+            self._last_flush = now
+            entries = [[name, list(labels), value] for (name, labels), value in self._values.items()]
+
+        _write_entries(os.path.join(self.directory, f'metrics_{self._pid}.json'), entries)
+
+    def collect(self):
+        """Сумма метрик работающих воркеров и архива завершённых"""
+        self.flush(force=True)
+        merged = {}
+        for path in glob.glob(os.path.join(self.directory, 'metrics_*.json')):
+            _merge(merged, _read_entries(path))
+        return merged
+
+    def render(self):
+        """Текстовый формат Prometheus"""
+        merged = self.collect()
+        lines = []
+        for name, (kind, help_text, buckets) in METRICS.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for (metric, labels), value in sorted(merged.items()):
+                if metric != name:
+                    continue
+                if kind == 'histogram':
+                    cumulative = 0
+                    for bound, count in zip(buckets, value['buckets']):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{_labels(labels, le=_number(bound))} {cumulative}')
+                    lines.append(f'{name}_bucket{_labels(labels, le="+Inf")} {value["count"]}')
+                    lines.append(f'{name}_sum{_labels(labels)} {_number(value["sum"])}')
+                    lines.append(f'{name}_count{_labels(labels)} {value["count"]}')
+                else:
+                    lines.append(f'{name}{_labels(labels)} {_number(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'metrics_start' in g:
+        conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('metrics_query_start')
+    if not starts:
+        return
+    start = starts.pop()
+    if has_request_context() and 'metrics_start' in g:
+        g.metrics_sql_count += 1
+        g.metrics_sql_time += time.perf_counter() - start
+
+
+def _handle_error(exception_context):
+    # Упавший запрос не должен оставлять время начала в стеке соединения
+    connection = exception_context.connection
+    if connection is not None and connection.info.get('metrics_query_start'):
+        connection.info['metrics_query_start'].pop()
+
+
+def register_sql_events():
+    """События на все движки, включая дополнительные binds (повторный вызов ничего не делает)"""
+    for name, handler in (('before_cursor_execute', _before_cursor_execute),
+                          ('after_cursor_execute', _after_cursor_execute),
+                          ('handle_error', _handle_error)):
+        if not event.contains(Engine, name, handler):
+            event.listen(Engine, name, handler)
+
+
+def init_metrics(app):
+    """Сбор метрик запросов, если METRICS_ENABLED"""
+    if not app.config.get('METRICS_ENABLED', True):
+        return None
+
+    directory = app.config.get('METRICS_DIR') or default_metrics_dir(app.root_path)
+    registry = MetricsRegistry(directory, app.config.get('METRICS_FLUSH_INTERVAL', 1.0))
+    register_sql_events()
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_start = time.perf_counter()
+        g.metrics_sql_count = 0
+        g.metrics_sql_time = 0.0
+
+    @app.after_request
+    def record_request_metrics(response):
+        if 'metrics_start' not in g:
+            return response
+        # Для потоковых ответов это время до первого байта
+        duration = time.perf_counter() - g.pop('metrics_start')
+        endpoint = request.endpoint or 'unmatched'
+        labels = {'endpoint': endpoint, 'method': request.method, 'status': str(response.status_code)}
+        registry.observe('crm_http_request_duration_seconds', labels, duration)
+        registry.observe('crm_http_request_sql_queries', {'endpoint': endpoint}, g.metrics_sql_count)
+        registry.observe('crm_http_sql_duration_seconds_total', {'endpoint': endpoint}, g.metrics_sql_time)
+        if response.content_length is not None:
+            registry.observe('crm_http_response_size_bytes_total', {'endpoint': endpoint}, response.content_length)
+        registry.flush()
+        return response
+
+    app.extensions['metrics'] = registry
+    return registry
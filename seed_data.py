@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Синтетический набор данных для нагрузочных проверок: flask crm seed --scale N.
+Объёмы задаются на единицу масштаба (VOLUMES): --scale 1 - средний набор,
+--scale 50 - порядка продакшена (2,5 млн финансовых операций, 250 тыс. заказов,
+100 тыс. ресурсов, 2,5 тыс. пользователей).
+Данные детерминированы: одинаковые seed и anchor дают одинаковые строки. Вставка идёт
+пачками через Core INSERT (executemany) с заранее известными id, без ORM-объектов,
+поэтому события моделей не срабатывают и дневная сводка пересчитывается после вставки.
+Быстрый сброс (reset_database): TRUNCATE для MySQL/PostgreSQL, DELETE без условия для SQLite
+(схема и версия миграций сохраняются).
+"""
+
+import random
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import text
+from werkzeug.security import generate_password_hash
+
+from finance_rollup import backfill_rollup
+from models import (db, User, Role, Company, Product, Order, OrderItem, ProductionTask,
+                    FinancialTransaction, InventoryItem, Notification, Resource, ResourceRequest,
+                    SalaryPayment, TableVersion)
+
+# Строк на единицу масштаба
+VOLUMES = {
+    'users': 50,
+    'companies': 20,
+    'products': 100,
+    'resources': 2000,
+    'orders': 5000,
+    'financial_transactions': 50000,
+    'production_tasks': 500,
+    'resource_requests': 1000,
+    'notifications': 2000,
+    'salary_payments': 500,
+}
+ITEMS_PER_ORDER = (1, 5)
+HISTORY_DAYS = 730
+CHUNK_SIZE = 10000
+# Пароль всех синтетических пользователей; хеш считается один раз
+SEED_PASSWORD = 'seed123'
+
+ROLE_NAMES = ['director', 'manager', 'supplier', 'warehouse', 'production', 'accountant']
+ORDER_STATUSES = ['pending', 'in_progress', 'completed', 'cancelled']
+ORDER_STATUS_WEIGHTS = [2, 2, 5, 1]
+TASK_STATUSES = ['pending', 'in_progress', 'completed']
+REQUEST_STATUSES = ['pending', 'approved', 'rejected', 'delivered']
+PRIORITIES = ['low', 'medium', 'high', 'urgent']
+RESOURCE_TYPES = {
+    'material': ('Труба стальная', 'Труба медная', 'Изоляция', 'Лист металлический', 'Кабель'),
+    'equipment': ('Котел газовый', 'Насос циркуляционный', 'Газовый счетчик', 'Теплообменник'),
+    'component': ('Фитинг', 'Клапан', 'Задвижка', 'Манометр', 'Фильтр'),
+}
+UNITS = {'material': 'м', 'equipment': 'шт', 'component': 'шт'}
+INCOME_CATEGORIES = ['Продажи', 'Монтаж', 'Сервис', 'Проектирование']
+EXPENSE_CATEGORIES = ['Материалы', 'Зарплата', 'Аренда', 'Транспорт', 'Налоги', 'Коммунальные']
+FIRST_NAMES = ['Алишер', 'Дилшод', 'Анна', 'Ольга', 'Сергей', 'Бахтиёр', 'Нодира', 'Иван', 'Мадина', 'Рустам']
+LAST_NAMES = ['Каримов', 'Усманов', 'Иванова', 'Петрова', 'Ахмедов', 'Юсупова', 'Смирнов', 'Рахимов']
+
+
+def _rng(seed, table):
+    # Отдельный генератор на таблицу: объём одной таблицы не меняет строки другой
+    return random.Random(f'{seed}:{table}')
+
+
+def _moment(rng, anchor):
+    """Случайный момент за HISTORY_DAYS до anchor; свежие даты встречаются чаще"""
+    days = int(HISTORY_DAYS * rng.random() ** 2)
+    return datetime.combine(anchor - timedelta(days=days), time()) + timedelta(seconds=rng.randrange(86400))
+
+
+def _next_id(model):
+    return (db.session.query(db.func.max(model.id)).scalar() or 0) + 1
+
+
+def _insert(table, rows):
+    """Вставка пачками по CHUNK_SIZE с фиксацией каждой пачки; rows - генератор словарей"""
+    total = 0
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= CHUNK_SIZE:
+            total += _insert_chunk(table, chunk)
+            chunk = []
+    if chunk:
+        total += _insert_chunk(table, chunk)
+    return total
+
+
+def _insert_chunk(table, chunk):
+    db.session.execute(table.insert(), chunk)
+    db.session.commit()
+    return len(chunk)
+
+
+def _sync_sequences():
+    """PostgreSQL: последовательности id после вставки с явными id (MySQL и SQLite сдвигают счётчик сами)"""
+    if db.engine.dialect.name != 'postgresql':
+        return
+    for table in db.metadata.sorted_tables:
+        if 'id' in table.columns and table.columns['id'].autoincrement:
+            db.session.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('\"{table.name}\"', 'id'), "
+                f'COALESCE((SELECT MAX(id) FROM "{table.name}"), 1))'))
+    db.session.commit()
+
+
+def ensure_accounts():
+    """Роли и учётные записи из setup_data.py (director / 1234, a1..a5 / 123), если их нет"""
+    from setup_data import ROLES_DATA, USERS_DATA
+
+    roles = {role.name: role for role in Role.query.all()}
+    for role_info in ROLES_DATA:
+        if role_info['name'] not in roles:
+            roles[role_info['name']] = Role(**role_info)
+            db.session.add(roles[role_info['name']])
+
+    existing = {username for (username,) in db.session.query(User.username)}
+    for user_info in USERS_DATA:
+        if user_info['username'] in existing:
+            continue
+        user = User(username=user_info['username'], email=user_info['email'],
+                    first_name=user_info['first_name'], last_name=user_info['last_name'])
+        user.set_password(user_info['password'])
+        user.roles.extend(roles[name] for name in user_info['roles'])
+        db.session.add(user)
+    db.session.commit()
+
+
+def reset_database(accounts=True):
+    """Удалить все данные, сохранив схему; по умолчанию заново создать учётные записи"""
+    engine = db.engine
+    # Счётчики изменений не сбрасываются: иначе ETag новых данных совпал бы с прежним
+    tables = [table for table in reversed(db.metadata.sorted_tables) if table.name != TableVersion.__tablename__]
+    with engine.begin() as connection:
+        if engine.dialect.name == 'mysql':
+            connection.execute(text('SET FOREIGN_KEY_CHECKS = 0'))
+            for table in tables:
+                connection.execute(text(f'TRUNCATE TABLE `{table.name}`'))
+            connection.execute(text('SET FOREIGN_KEY_CHECKS = 1'))
+        elif engine.dialect.name == 'postgresql':
+            names = ', '.join(f'"{table.name}"' for table in tables)
+            connection.execute(text(f'TRUNCATE TABLE {names} RESTART IDENTITY CASCADE'))
+        else:
+            # DELETE без WHERE в SQLite очищает таблицу целиком, не удаляя строки по одной
+            for table in tables:
+                connection.execute(table.delete())
+        connection.execute(TableVersion.__table__.update().values(version=TableVersion.version + 1))
+    db.session.remove()
+    if accounts:
+        ensure_accounts()
+
+
+def seed(scale=1, seed=42, anchor=None, progress=print):
+    """Добавить синтетические данные объёмом VOLUMES * scale; возвращает число строк по таблицам"""
+    anchor = anchor or date.today()
+    volume = {name: max(int(count * scale), 1) for name, count in VOLUMES.items()}
+    ensure_accounts()
+    counts = {}
+
+    def load(model, rows):
+        counts[model.__tablename__] = _insert(model.__table__, rows)
+        progress(f'{model.__tablename__}: {counts[model.__tablename__]}')
+
+    # Пользователи с одной ролью каждый
+    first_user = _next_id(User)
+    password_hash = generate_password_hash(SEED_PASSWORD, method='pbkdf2:sha256')
+    rng = _rng(seed, 'user')
+    user_ids = range(first_user, first_user + volume['users'])
+    load(User, ({
+        'id': user_id,
+        'username': f'seed{seed}_{user_id}',
+        'email': f'seed{seed}_{user_id}@seed.local',
+        'password_hash': password_hash,
+        'first_name': rng.choice(FIRST_NAMES),
+        'last_name': rng.choice(LAST_NAMES),
+        'phone': f'+998 90 {rng.randrange(10 ** 7):07d}',
+        'is_active': rng.random() > 0.05,
+        'created_at': _moment(rng, anchor),
+    } for user_id in user_ids))
+    role_ids = {role.name: role.id for role in Role.query.all()}
+    user_roles = db.metadata.tables['user_roles']
+    counts['user_roles'] = _insert(user_roles, ({
+        'user_id': user_id,
+        'role_id': role_ids[ROLE_NAMES[user_id % len(ROLE_NAMES)]],
+    } for user_id in user_ids))
+    all_user_ids = [user_id for (user_id,) in db.session.query(User.id)]
+
+    first_company = _next_id(Company)
+    rng = _rng(seed, 'company')
+    company_ids = range(first_company, first_company + volume['companies'])
+    load(Company, ({
+        'id': company_id,
+        'name': f'ООО "Поставщик {company_id}"',
+        'address': f'г. Ташкент, ул. Промышленная, {rng.randrange(1, 200)}',
+        'phone': f'+998 71 {rng.randrange(10 ** 7):07d}',
+        'email': f'supplier{company_id}@seed.local',
+        'created_at': _moment(rng, anchor),
+    } for company_id in company_ids))
+
+    first_product = _next_id(Product)
+    rng = _rng(seed, 'product')
+    products = {}
+    for product_id in range(first_product, first_product + volume['products']):
+        resource_type = rng.choice(list(RESOURCE_TYPES))
+        products[product_id] = (f'{rng.choice(RESOURCE_TYPES[resource_type])} {product_id}',
+                                resource_type, round(rng.uniform(1000, 3000000), -2))
+    load(Product, ({
+        'id': product_id,
+        'name': name,
+        'description': f'Синтетический товар {product_id}',
+        'price': price,
+        'category': category,
+        'stock_quantity': rng.randrange(0, 1000),
+        'min_stock_level': rng.randrange(5, 50),
+        'created_at': _moment(rng, anchor),
+    } for product_id, (name, category, price) in products.items()))
+    product_ids = list(products)
+
+    rng = _rng(seed, 'inventory_item')
+    first_item = _next_id(InventoryItem)
+    load(InventoryItem, ({
+        'id': first_item + offset,
+        'product_id': product_id,
+        'quantity': rng.randrange(0, 2000),
+        'min_stock': rng.randrange(5, 100),
+        'price_per_unit': products[product_id][2],
+        'location': f'Зона {rng.choice("ABCD")}-{rng.randrange(1, 40)}',
+        'last_updated': _moment(rng, anchor),
+    } for offset, product_id in enumerate(product_ids)))
+
+    rng = _rng(seed, 'resource')
+    first_resource = _next_id(Resource)
+
+    def resources():
+        for resource_id in range(first_resource, first_resource + volume['resources']):
+            resource_type = rng.choice(list(RESOURCE_TYPES))
+            yield {
+                'id': resource_id,
+                'name': f'{rng.choice(RESOURCE_TYPES[resource_type])} {rng.randrange(10, 200)}',
+                'resource_type': resource_type,
+                'quantity': rng.randrange(1, 5000),
+                'unit': UNITS[resource_type],
+                'cost_per_unit': round(rng.uniform(1000, 3000000), -2),
+                'company_id': rng.choice(company_ids),
+                'created_at': _moment(rng, anchor),
+            }
+    load(Resource, resources())
+
+    # Заказы и их позиции пачками: сумма заказа равна сумме позиций,
+    # позиции вставляются после своих заказов (внешние ключи)
+    rng = _rng(seed, 'order')
+    order_id = _next_id(Order)
+    item_id = _next_id(OrderItem)
+    last_order = order_id + volume['orders']
+    counts['order'] = counts['order_item'] = 0
+    while order_id < last_order:
+        orders, items = [], []
+        for order_id in range(order_id, min(order_id + CHUNK_SIZE, last_order)):
+            total = 0.0
+            for _ in range(rng.randint(*ITEMS_PER_ORDER)):
+                product_id = rng.choice(product_ids)
+                quantity = rng.randrange(1, 20)
+                unit_price = products[product_id][2]
+                items.append({
+                    'id': item_id,
+                    'order_id': order_id,
+                    'product_id': product_id,
+                    'quantity': quantity,
+                    'unit_price': unit_price,
+                    'total_price': unit_price * quantity,
+                })
+                item_id += 1
+                total += unit_price * quantity
+            ordered_at = _moment(rng, anchor)
+            orders.append({
+                'id': order_id,
+                'order_number': f'S{seed}-{order_id:08d}',
+                'customer_name': f'{rng.choice(LAST_NAMES)} {rng.choice(FIRST_NAMES)}',
+                'customer_phone': f'+998 90 {rng.randrange(10 ** 7):07d}',
+                'total_amount': total,
+                'status': rng.choices(ORDER_STATUSES, ORDER_STATUS_WEIGHTS)[0],
+                'order_date': ordered_at,
+                'delivery_date': ordered_at + timedelta(days=rng.randrange(1, 30)),
+                'user_id': rng.choice(all_user_ids),
+            })
+        order_id += 1
+        counts['order'] += _insert(Order.__table__, orders)
+        counts['order_item'] += _insert(OrderItem.__table__, items)
+    progress(f"order: {counts['order']}")
+    progress(f"order_item: {counts['order_item']}")
+
+    rng = _rng(seed, 'financial_transaction')
+    first_transaction = _next_id(FinancialTransaction)
+
+    def transactions():
+        for transaction_id in range(first_transaction, first_transaction + volume['financial_transactions']):
+            income = rng.random() < 0.55
+            created_at = _moment(rng, anchor)
+            category = rng.choice(INCOME_CATEGORIES if income else EXPENSE_CATEGORIES)
+            yield {
+                'id': transaction_id,
+                'transaction_type': 'income' if income else 'expense',
+                'amount': round(rng.lognormvariate(13, 1.2), 2),
+                'description': f'{category} №{transaction_id}',
+                'date': created_at,
+                'category': category,
+                'created_at': created_at,
+            }
+    load(FinancialTransaction, transactions())
+
+    rng = _rng(seed, 'production_task')
+    first_task = _next_id(ProductionTask)
+
+    def tasks():
+        for task_id in range(first_task, first_task + volume['production_tasks']):
+            start = _moment(rng, anchor)
+            yield {
+                'id': task_id,
+                'name': f'Изготовление партии {task_id}',
+                'description': f'{products[rng.choice(product_ids)][0]}: {rng.randrange(1, 100)} шт',
+                'status': rng.choice(TASK_STATUSES),
+                'priority': rng.choice(PRIORITIES),
+                'start_date': start,
+                'end_date': start + timedelta(days=rng.randrange(1, 20)),
+                'assigned_to': f'{rng.choice(LAST_NAMES)} {rng.choice(FIRST_NAMES)[0]}.',
+                'created_at': start,
+            }
+    load(ProductionTask, tasks())
+
+    rng = _rng(seed, 'resource_request')
+    first_request = _next_id(ResourceRequest)
+    load(ResourceRequest, ({
+        'id': request_id,
+        'resource_name': f'{rng.choice(RESOURCE_TYPES[rng.choice(list(RESOURCE_TYPES))])} {rng.randrange(10, 200)}',
+        'quantity': rng.randrange(1, 500),
+        'priority': rng.choice(PRIORITIES),
+        'status': rng.choice(REQUEST_STATUSES),
+        'requested_by': rng.choice(['a3', 'a4']),
+        'created_at': _moment(rng, anchor),
+    } for request_id in range(first_request, first_request + volume['resource_requests'])))
+
+    rng = _rng(seed, 'notification')
+    first_notification = _next_id(Notification)
+    load(Notification, ({
+        'id': notification_id,
+        'title': f'Уведомление {notification_id}',
+        'message': rng.choice(['Новый заказ', 'Заявка одобрена', 'Низкий остаток на складе', 'Задача завершена']),
+        'is_read': rng.random() < 0.7,
+        'created_at': _moment(rng, anchor),
+        'user_id': rng.choice(all_user_ids),
+    } for notification_id in range(first_notification, first_notification + volume['notifications'])))
+
+    rng = _rng(seed, 'salary_payment')
+    first_payment = _next_id(SalaryPayment)
+    load(SalaryPayment, ({
+        'id': payment_id,
+        'employee_name': f'{rng.choice(LAST_NAMES)} {rng.choice(FIRST_NAMES)}',
+        'amount': round(rng.uniform(2000000, 15000000), -3),
+        'payment_date': _moment(rng, anchor),
+        'payment_method': rng.choice(['card', 'cash', 'transfer']),
+    } for payment_id in range(first_payment, first_payment + volume['salary_payments'])))
+
+    _sync_sequences()
+    # Core INSERT не вызывает события finance_rollup: сводка пересчитывается целиком
+    counts['financial_daily_rollup'] = backfill_rollup()
+    progress(f"financial_daily_rollup: {counts['financial_daily_rollup']}")
+    return counts
@@ -10,6 +10,67 @@ from app import create_app
 from models import db, User, Role, Company, Resource, Product, ResourceRequest
 from load_excel_data import create_sample_data
 
+# Роли и учётные записи по умолчанию (используются также flask crm reset и seed)
+ROLES_DATA = [
+    {'name': 'director', 'description': 'Директор'},
+    {'name': 'manager', 'description': 'Менеджер'},
+    {'name': 'supplier', 'description': 'Поставщик'},
+    {'name': 'warehouse', 'description': 'Склад'},
+    {'name': 'production', 'description': 'Производство'},
+    {'name': 'accountant', 'description': 'Бухгалтер'}
+]
+
+USERS_DATA = [
+    {
+        'username': 'director',
+        'email': 'director@teploresurscrm.uz',
+        'first_name': 'Директор',
+        'last_name': 'Компании',
+        'password': '1234',
+        'roles': ['director']
+    },
+    {
+        'username': 'a1',
+        'email': 'manager@teploresurscrm.uz',
+        'first_name': 'Менеджер',
+        'last_name': 'A1',
+        'password': '123',
+        'roles': ['manager']
+    },
+    {
+        'username': 'a2',
+        'email': 'supplier@teploresurscrm.uz',
+        'first_name': 'Поставщик',
+        'last_name': 'A2',
+        'password': '123',
+        'roles': ['supplier']
+    },
+    {
+        'username': 'a3',
+        'email': 'warehouse@teploresurscrm.uz',
+        'first_name': 'Склад',
+        'last_name': 'A3',
+        'password': '123',
+        'roles': ['warehouse']
+    },
+    {
+        'username': 'a4',
+        'email': 'production@teploresurscrm.uz',
+        'first_name': 'Производство',
+        'last_name': 'A4',
+        'password': '123',
+        'roles': ['production']
+    },
+    {
+        'username': 'a5',
+        'email': 'accountant@teploresurscrm.uz',
+        'first_name': 'Бухгалтер',
+        'last_name': 'A5',
+        'password': '123',
+        'roles': ['accountant']
+    }
+]
+
 def setup_complete_system():
     """Полная настройка системы"""
     app = create_app()
@@ -25,16 +86,8 @@ def setup_complete_system():
             
             # 2. Создаем роли
             print("2. Создание ролей...")
-            roles_data = [
-                {'name': 'director', 'description': 'Директор'},
-                {'name': 'manager', 'description': 'Менеджер'},
-                {'name': 'supplier', 'description': 'Поставщик'},
-                {'name': 'warehouse', 'description': 'Склад'},
-                {'name': 'production', 'description': 'Производство'},
-                {'name': 'accountant', 'description': 'Бухгалтер'}
-            ]
             
-            for role_info in roles_data:
+            for role_info in ROLES_DATA:
                 existing_role = Role.query.filter_by(name=role_info['name']).first()
                 if not existing_role:
                     role = Role(name=role_info['name'], description=role_info['description'])
@@ -48,58 +101,8 @@ def setup_complete_system():
             
             # 3. Создаем пользователей
             print("3. Создание пользователей...")
-            users_data = [
-                {
-                    'username': 'director',
-                    'email': 'director@teploresurscrm.uz',
-                    'first_name': 'Директор',
-                    'last_name': 'Компании',
-                    'password': '1234',
-                    'roles': ['director']
-                },
-                {
-                    'username': 'a1',
-                    'email': 'manager@teploresurscrm.uz',
-                    'first_name': 'Менеджер',
-                    'last_name': 'A1',
-                    'password': '123',
-                    'roles': ['manager']
-                },
-                {
-                    'username': 'a2',
-                    'email': 'supplier@teploresurscrm.uz',
-                    'first_name': 'Поставщик',
-                    'last_name': 'A2',
-                    'password': '123',
-                    'roles': ['supplier']
-                },
-                {
-                    'username': 'a3',
-                    'email': 'warehouse@teploresurscrm.uz',
-                    'first_name': 'Склад',
-                    'last_name': 'A3',
-                    'password': '123',
-                    'roles': ['warehouse']
-                },
-                {
-                    'username': 'a4',
-                    'email': 'production@teploresurscrm.uz',
-                    'first_name': 'Производство',
-                    'last_name': 'A4',
-                    'password': '123',
-                    'roles': ['production']
-                },
-                {
-                    'username': 'a5',
-                    'email': 'accountant@teploresurscrm.uz',
-                    'first_name': 'Бухгалтер',
-                    'last_name': 'A5',
-                    'password': '123',
-                    'roles': ['accountant']
-                }
-            ]
             
-            for user_info in users_data:
+            for user_info in USERS_DATA:
                 existing_user = User.query.filter_by(username=user_info['username']).first()
                 if not existing_user:
                     user = User(
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Применение профиля PRAGMA (SQLITE_PRAGMAS из конфигурации) к соединениям SQLite.
+PRAGMA действуют на соединение, поэтому выполняются в событии connect для каждого
+нового соединения пула; движки других СУБД не затрагиваются.
+Профили хранятся здесь, а не в config.py, потому что config_server.py копируется поверх config.py.
+"""
+
+import os
+
+from sqlalchemy import event
+
+from models import db
+
+# Профили PRAGMA для SQLite, применяются к каждому новому соединению (init_sqlite_profile)
+SQLITE_PROFILES = {
+    # Настройки SQLite по умолчанию: журнал отката, synchronous=FULL, без ожидания блокировки
+    'default': {},
+    # Несколько воркеров gunicorn на одном файле: читатели не ждут писателя (WAL),
+    # писатель ждёт освобождения блокировки до busy_timeout вместо ошибки "database is locked"
+    'performance': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',      # в WAL безопасно: при сбое питания теряется только последняя транзакция
+        'busy_timeout': 5000,         # мс
+        'foreign_keys': 'ON',
+        'cache_size': -65536,         # КиБ (64 МБ) на соединение
+        'mmap_size': 268435456,       # 256 МБ
+        'temp_store': 'MEMORY',
+    },
+    # Для тестов: проверка внешних ключей как в MySQL, остальное по умолчанию
+    'testing': {
+        'foreign_keys': 'ON',
+        'busy_timeout': 5000,
+    },
+}
+
+
+def sqlite_profile(default):
+    """PRAGMA профиля из SQLITE_PROFILE или профиля конфигурации по умолчанию"""
+    return SQLITE_PROFILES[os.environ.get('SQLITE_PROFILE') or default]
+
+
+def _pragma_listener(pragmas):
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+    return set_pragmas
+
+
+def init_sqlite_profile(app):
+    """Подписать все SQLite-движки приложения на профиль PRAGMA"""
+    pragmas = dict(app.config.get('SQLITE_PRAGMAS') or {})
+    if not pragmas:
+        return
+    listener = _pragma_listener(pragmas)
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite':
+                event.listen(engine, 'connect', listener)
+
+
+def current_pragmas(names=('journal_mode', 'synchronous', 'busy_timeout', 'foreign_keys',
+                           'cache_size', 'mmap_size', 'temp_store')):
+    """Фактические значения PRAGMA соединения текущей сессии"""
+    connection = db.session.connection()
+    return {name: connection.exec_driver_sql(f'PRAGMA {name}').scalar() for name in names}
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Статика с отпечатками содержимого (собирается build_assets.py).
+- url_for('static', filename='css/custom.css') даёт dist/css/custom.<хеш>.css из static/dist/manifest.json;
+  файл с хешем в имени не меняется, поэтому отдаётся с Cache-Control: immutable на год.
+- Для файлов dist отдаётся заранее сжатый вариант .br или .gz по Accept-Encoding.
+- Шрифты Inter и иконки Font Awesome берутся из static/vendor (build_assets.py --vendor),
+  пока их нет - из CDN (переменная шаблонов vendored).
+Без сборки (или при STATIC_FINGERPRINT = False) статика отдаётся как раньше.
+"""
+
+import hashlib
+import json
+import mimetypes
+import os
+
+from flask import request, send_from_directory
+
+BUILD_DIR = 'dist'
+MANIFEST = 'manifest.json'
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+# Сторонние стили: имя -> (адрес CDN, локальная копия в static)
+VENDOR_STYLESHEETS = {
+    'inter': ('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap',
+              'vendor/inter/inter.css'),
+    'fontawesome': ('https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css',
+                    'vendor/fontawesome/css/all.min.css'),
+}
+
+# Предпочтение сжатых вариантов: brotli меньше gzip
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+class StaticManifest:
+    """Соответствие исходных имён файлов static именам с хешем"""
+
+    def __init__(self, static_folder):
+        self.static_folder = static_folder
+        self.files = {}
+        self.version = None
+        path = os.path.join(static_folder, BUILD_DIR, MANIFEST)
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                raw = f.read()
+            self.files = json.loads(raw)
+            self.version = hashlib.sha1(raw).hexdigest()[:12]
+        self.built = set(self.files.values())
+
+    def url_defaults(self, endpoint, values):
+        """url_for('static', filename=...) -> имя с хешем, если файл есть в сборке"""
+        if endpoint == 'static':
+            filename = values.get('filename')
+            if filename in self.files:
+                values['filename'] = self.files[filename]
+
+    def send(self, filename):
+        """Файл сборки: сжатый вариант по Accept-Encoding и кэш навсегда"""
+        if filename not in self.built:
+            return None
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        accepted = request.accept_encodings
+        for encoding, suffix in ENCODINGS:
+            if accepted[encoding] and os.path.exists(os.path.join(self.static_folder, filename + suffix)):
+                response = send_from_directory(self.static_folder, filename + suffix, mimetype=mimetype)
+                response.headers['Content-Encoding'] = encoding
+                break
+        else:
+            response = send_from_directory(self.static_folder, filename, mimetype=mimetype)
+        response.headers['Cache-Control'] = IMMUTABLE
+        response.vary.add('Accept-Encoding')
+        return response
+
+
+def init_static_assets(app):
+    """Имена с хешем в url_for и отдача сжатых вариантов; None без сборки или при STATIC_FINGERPRINT = False"""
+    app.jinja_env.globals['vendored'] = {
+        name: os.path.exists(os.path.join(app.static_folder, local))
+        for name, (_, local) in VENDOR_STYLESHEETS.items()
+    }
+    app.jinja_env.globals['vendor_cdn'] = {name: cdn for name, (cdn, _) in VENDOR_STYLESHEETS.items()}
+    if not app.config.get('STATIC_FINGERPRINT', True):
+        return None
+
+    manifest = StaticManifest(app.static_folder)
+    if not manifest.files:
+        return None
+
+    static_view = app.view_functions['static']
+
+    def static(filename):
+        return manifest.send(filename) or static_view(filename=filename)
+
+    app.view_functions['static'] = static
+    app.url_defaults(manifest.url_defaults)
+    app.extensions['static_manifest'] = manifest
+    return manifest
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Потоковая выдача больших API-коллекций.
+Строки читаются курсором на стороне сервера (yield_per) и сериализуются по одной,
+поэтому память не растёт с размером таблицы. Формат - JSON-массив или
+NDJSON (заголовок Accept: application/x-ndjson).
+"""
+
+from flask import Response, current_app, request, stream_with_context
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+BATCH_SIZE = 1000
+CHUNK_SIZE = 64 * 1024  # байт, отправляемых за одну запись в сокет
+
+
+def wants_ndjson():
+    """Клиент запросил NDJSON через заголовок Accept"""
+    best = request.accept_mimetypes.best_match([NDJSON_MIMETYPE, 'application/json'])
+    return best == NDJSON_MIMETYPE
+
+
+def wants_stream():
+    """Полная выгрузка вместо страницы: NDJSON или ?stream=1"""
+    return wants_ndjson() or request.args.get('stream', type=int) == 1
+
+
+def _chunked(parts):
+    # Склеиваем мелкие фрагменты, чтобы не писать в сокет по строке
+    buffer, size = [], 0
+    for part in parts:
+        buffer.append(part)
+        size += len(part)
+        if size >= CHUNK_SIZE:
+            yield ''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def _json_array(rows, serialize, dumps):
+    yield '['
+    first = True
+    for row in rows:
+        if first:
+            first = False
+            yield dumps(serialize(row))
+        else:
+            yield ',' + dumps(serialize(row))
+    yield ']'
+
+
+def _ndjson(rows, serialize, dumps):
+    for row in rows:
+        yield dumps(serialize(row)) + '\n'
+
+
+def stream_query(query, serialize, batch_size=BATCH_SIZE):
+    """Ответ, выдающий строки запроса по мере чтения из БД"""
+    dumps = current_app.json.dumps
+    rows = query.yield_per(batch_size)
+
+    if wants_ndjson():
+        body, mimetype = _ndjson(rows, serialize, dumps), NDJSON_MIMETYPE
+    else:
+        body, mimetype = _json_array(rows, serialize, dumps), 'application/json'
+
+    return Response(stream_with_context(_chunked(body)), mimetype=mimetype)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Потоковое чтение файлов импорта пачками.
+Excel (.xlsx) читается через openpyxl в режиме read_only, CSV - модулем csv,
+поэтому в памяти одновременно находится только одна пачка строк.
+Колонки сопоставляются по заголовку в первой строке.
+pandas и openpyxl импортируются при чтении, а не при импорте модуля.
+"""
+
+import csv
+import os
+
+CHUNK_SIZE = 1000
+
+
+def _header(row):
+    return [str(cell).strip() if cell is not None else f'column_{i + 1}' for i, cell in enumerate(row)]
+
+
+def _is_blank(row):
+    return all(cell is None or (isinstance(cell, str) and not cell.strip()) for cell in row)
+
+
+def _chunks(header, rows, chunk_size):
+    """DataFrame-пачки; индекс - номер строки данных от 0, как у pd.read_excel"""
+    buffer = []
+    for index, row in enumerate(rows):
+        if _is_blank(row):
+            continue
+        buffer.append((index, row))
+        if len(buffer) >= chunk_size:
+            yield _frame(header, buffer)
+            buffer = []
+    if buffer:
+        yield _frame(header, buffer)
+
+
+def _frame(header, buffer):
+    import pandas as pd
+
+    width = len(header)
+    index = [i for i, _ in buffer]
+    # Строки короче заголовка дополняются None, лишние ячейки отбрасываются
+    records = [tuple(row[:width]) + (None,) * (width - len(row)) for _, row in buffer]
+    return pd.DataFrame.from_records(records, columns=header, index=index)
+
+
+def iter_excel_chunks(file_path, chunk_size=CHUNK_SIZE):
+    """Пачки строк первого листа .xlsx без загрузки всей книги в память"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        yield from _chunks(_header(header), rows, chunk_size)
+    finally:
+        workbook.close()
+
+
+def iter_csv_chunks(file_path, chunk_size=CHUNK_SIZE, encoding='utf-8-sig'):
+    """Пачки строк CSV; разделитель (',' или ';') определяется по первой строке"""
+    with open(file_path, newline='', encoding=encoding) as f:
+        sample = f.readline()
+        f.seek(0)
+        delimiter = ';' if sample.count(';') > sample.count(',') else ','
+        reader = csv.reader(f, delimiter=delimiter)
+        header = next(reader, None)
+        if header is None:
+            return
+        # Пустые ячейки CSV считаются отсутствующими значениями, как в Excel
+        rows = ([cell if cell != '' else None for cell in row] for row in reader)
+        yield from _chunks(_header(header), rows, chunk_size)
+
+
+def iter_table_chunks(file_path, chunk_size=CHUNK_SIZE):
+    """Пачки строк файла импорта по расширению; .xls читается целиком через pandas"""
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == '.xlsx':
+        return iter_excel_chunks(file_path, chunk_size)
+    if extension == '.csv':
+        return iter_csv_chunks(file_path, chunk_size)
+    import pandas as pd
+
+    return iter([pd.read_excel(file_path)])
+
+
+def estimate_rows(file_path):
+    """Оценка числа строк данных для отображения прогресса (None, если неизвестно)"""
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == '.xlsx':
+        from openpyxl import load_workbook
+        workbook = load_workbook(file_path, read_only=True)
+        try:
+            max_row = workbook.active.max_row
+        finally:
+            workbook.close()
+        return max_row - 1 if max_row else None
+    if extension == '.csv':
+        with open(file_path, 'rb') as f:
+            return max(sum(1 for _ in f) - 1, 0)
+    return None
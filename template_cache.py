@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Ускорение первой отрисовки шаблонов в новом воркере.
+- Байткод скомпилированных шаблонов Jinja хранится на диске (instance/jinja_cache):
+  новый процесс загружает его вместо разбора и компиляции исходника. Ключ записи включает
+  контрольную сумму исходника, поэтому изменённый шаблон компилируется заново.
+- warm_templates компилирует все шаблоны заранее; в мастере gunicorn с preload_app
+  (when_ready в gunicorn.conf.py) скомпилированные шаблоны наследуют все воркеры,
+  в том числе перезапущенные после max_requests.
+"""
+
+import os
+import time
+
+from jinja2 import FileSystemBytecodeCache, TemplateError
+
+
+def init_template_cache(app):
+    """Байткод шаблонов на диске, если TEMPLATE_BYTECODE_CACHE; возвращает кэш или None"""
+    if not app.config.get('TEMPLATE_BYTECODE_CACHE', True):
+        return None
+    directory = app.config.get('TEMPLATE_CACHE_DIR') or os.path.join(app.instance_path, 'jinja_cache')
+    os.makedirs(directory, exist_ok=True)
+    cache = FileSystemBytecodeCache(directory)
+    app.jinja_env.bytecode_cache = cache
+    return cache
+
+
+def warm_templates(app):
+    """Компиляция всех шаблонов приложения; возвращает (число шаблонов, секунды, ошибки)"""
+    env = app.jinja_env
+    started = time.perf_counter()
+    compiled, errors = 0, {}
+    for name in env.list_templates(extensions=['html']):
+        try:
+            env.get_template(name)
+            compiled += 1
+        except TemplateError as exc:
+            # Ошибка шаблона проявится при открытии страницы, прогрев продолжается
+            errors[name] = exc
+    return compiled, time.perf_counter() - started, errors